@@ -0,0 +1,316 @@
+"""
+Compile permission ``condition`` subtrees into executable predicates.
+
+A condition is compiled once, at analysis time, into a postfix *program*: a
+tuple of ``(opcode, *args)`` instructions that is hashable, picklable and
+round-trips through JSON (it is stored on ``PermissionBlock``). At request
+time ``load_predicate`` turns a program into nested closures, cached per
+program, that evaluate against a context dict in a few microseconds.
+
+Opcodes:
+    ("const", value)            push a literal
+    ("load", "a.b.c")           push an attribute from the context
+    ("neg",)                    unary minus
+    ("add",) ("sub",) ("mul",) ("div",)
+    ("cmp", op)                 op is one of == != < > <= >=
+    ("in", [values])            left operand is one of the values
+    ("contains", value)         left operand (collection or string) contains value
+    ("not",)
+    ("and", n) ("or", n)        combine the top n conditions, short-circuiting
+
+A missing attribute, a type mismatch or an arithmetic error raises
+``ConditionError`` out of the whole predicate (it is never negated by a
+``NOT``), so the caller can fail closed: skip an ALLOW, apply a DENY.
+"""
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+from antlr4.error.ErrorStrategy import BailErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+
+from app.analyzer.fast_lexer import tokenize
+from parsing.RPLParser import RPLParser
+from parsing.RPLParserVisitor import RPLParserVisitor
+
+Program = Tuple[Tuple[Any, ...], ...]
+Predicate = Callable[[Mapping[str, Any]], bool]
+
+COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+}
+
+ARITHMETIC: Dict[str, Callable[[Any, Any], Any]] = {
+    "add": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "div": operator.truediv,
+}
+
+_ARITHMETIC_OPS = {RPLParser.PLUS: "add", RPLParser.MINUS: "sub", RPLParser.STAR: "mul", RPLParser.DIV: "div"}
+
+
+class ConditionError(Exception):
+    """A condition cannot be compiled, or cannot be evaluated against a context."""
+
+
+# -------------------------------
+# COMPILATION
+# -------------------------------
+
+class ConditionCompiler(RPLParserVisitor):
+    """Emits the postfix program for one ``condition`` subtree."""
+
+    def __init__(self):
+        self.code: List[Tuple[Any, ...]] = []
+
+    def emit(self, *instruction: Any) -> None:
+        self.code.append(instruction)
+
+    def visitOrCondition(self, ctx: RPLParser.OrConditionContext):
+        operands = ctx.andCondition()
+        for operand in operands:
+            self.visit(operand)
+        if len(operands) > 1:
+            self.emit("or", len(operands))
+
+    def visitAndCondition(self, ctx: RPLParser.AndConditionContext):
+        operands = ctx.notCondition()
+        for operand in operands:
+            self.visit(operand)
+        if len(operands) > 1:
+            self.emit("and", len(operands))
+
+    def visitNotCondition(self, ctx: RPLParser.NotConditionContext):
+        if ctx.NOT():
+            self.visit(ctx.notCondition())
+            self.emit("not")
+        else:
+            self.visit(ctx.primaryCondition())
+
+    def visitPrimaryCondition(self, ctx: RPLParser.PrimaryConditionContext):
+        self.visit(ctx.condition() or ctx.comparison())
+
+    def visitComparison(self, ctx: RPLParser.ComparisonContext):
+        expressions = ctx.expression()
+        self.visit(expressions[0])
+
+        if ctx.comparisonOp():
+            self.visit(expressions[1])
+            self.emit("cmp", ctx.comparisonOp().getText())
+        elif ctx.IN():
+            self.emit("in", [literal(v) for v in ctx.valueList().value()])
+        else:
+            self.emit("contains", literal(ctx.value()))
+
+    def visitAdditiveExpr(self, ctx: RPLParser.AdditiveExprContext):
+        self._binary(ctx, ctx.multiplicativeExpr())
+
+    def visitMultiplicativeExpr(self, ctx: RPLParser.MultiplicativeExprContext):
+        self._binary(ctx, ctx.unaryExpr())
+
+    def _binary(self, ctx, operands):
+        # children alternate operand, operator token, operand, ...
+        self.visit(operands[0])
+        for index, operand in enumerate(operands[1:], start=1):
+            self.visit(operand)
+            self.emit(_ARITHMETIC_OPS[ctx.getChild(2 * index - 1).symbol.type])
+
+    def visitUnaryExpr(self, ctx: RPLParser.UnaryExprContext):
+        if ctx.primaryExpr():
+            self.visit(ctx.primaryExpr())
+            return
+        self.visit(ctx.unaryExpr())
+        if ctx.MINUS():
+            self.emit("neg")
+
+    def visitPrimaryExpr(self, ctx: RPLParser.PrimaryExprContext):
+        self.visit(ctx.expression() or ctx.atom())
+
+    def visitAtom(self, ctx: RPLParser.AtomContext):
+        if ctx.qualifiedName():
+            self.emit("load", ctx.qualifiedName().getText())
+        elif ctx.INTEGER():
+            self.emit("const", int(ctx.INTEGER().getText()))
+        elif ctx.REAL():
+            self.emit("const", float(ctx.REAL().getText()))
+        elif ctx.STRING():
+            self.emit("const", ctx.STRING().getText().strip('"\''))
+        else:
+            self.emit("const", ctx.BOOLEAN().getText() == "true")
+
+
+def literal(ctx: RPLParser.ValueContext) -> Any:
+    """A ``value`` as plain data, read the same way as ``SemanticAnalyzer.visitValue``."""
+    if ctx.STRING():
+        return ctx.STRING().getText().strip('"\'')
+    if ctx.CHARACTER():
+        return ctx.CHARACTER().getText().strip("'")
+    if ctx.INTEGER():
+        return int(ctx.INTEGER().getText())
+    if ctx.REAL():
+        return float(ctx.REAL().getText())
+    if ctx.IDENTIFIER():
+        return ctx.IDENTIFIER().getText()
+    if ctx.BOOLEAN():
+        return ctx.BOOLEAN().getText().lower() == "true"
+    return [literal(v) for v in ctx.valueList().value()]
+
+
+def compile_condition(ctx: RPLParser.ConditionContext) -> Program:
+    compiler = ConditionCompiler()
+    compiler.visit(ctx)
+    return freeze(compiler.code)
+
+
+def compile_condition_source(text: str) -> Program:
+    """Compile a condition given as source text (e.g. conditions stored before programs existed)."""
+    token_stream, lex_errors = tokenize(text)
+    parser = RPLParser(token_stream)
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+
+    try:
+        tree = parser.condition()
+    except ParseCancellationException as e:
+        raise ConditionError(f"Invalid condition: {text!r}") from e
+
+    if lex_errors or token_stream.LA(1) != RPLParser.EOF:
+        raise ConditionError(f"Invalid condition: {text!r}")
+    return compile_condition(tree)
+
+
+def freeze(value: Any) -> Any:
+    """Lists to tuples, recursively: programs read back from JSON become hashable again."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def references(program: Sequence[Sequence[Any]]) -> Tuple[str, ...]:
+    """Attribute paths ``program`` loads, sorted and without duplicates."""
+    return tuple(sorted({instruction[1] for instruction in program if instruction[0] == "load"}))
+
+
+# -------------------------------
+# EVALUATION
+# -------------------------------
+
+_MISSING = object()
+
+# Operands each opcode pops ("and"/"or" are checked against their count).
+_ARITY = {"neg": 1, "add": 2, "sub": 2, "mul": 2, "div": 2, "cmp": 2, "in": 1, "contains": 1, "not": 1}
+
+
+def _loader(path: str) -> Callable[[Mapping[str, Any]], Any]:
+    keys = tuple(path.split("."))
+
+    def load(context):
+        # A flat "a.b" key wins over nested lookup, so callers may pass either shape.
+        value = context.get(path, _MISSING)
+        if value is _MISSING:
+            value = context
+            for key in keys:
+                if not isinstance(value, Mapping) or key not in value:
+                    raise ConditionError(f"Unknown attribute '{path}'")
+                value = value[key]
+        return value
+
+    return load
+
+
+@lru_cache(maxsize=4096)
+def attribute_loader(path: str) -> Callable[[Mapping[str, Any]], Any]:
+    """Reads ``path`` the way a ``load`` instruction does; raises ``ConditionError`` if it is missing."""
+    return _loader(path)
+
+
+def _member_set(values: Sequence[Any]) -> frozenset:
+    return frozenset(freeze(value) for value in values)
+
+
+def _build(program: Program) -> Callable[[Mapping[str, Any]], Any]:
+    stack: List[Callable] = []
+
+    for instruction in program:
+        opcode = instruction[0]
+        if len(stack) < _ARITY.get(opcode, 0):
+            raise ConditionError("Malformed condition program")
+
+        if opcode == "const":
+            stack.append(lambda context, value=instruction[1]: value)
+
+        elif opcode == "load":
+            stack.append(_loader(instruction[1]))
+
+        elif opcode == "neg":
+            operand = stack.pop()
+            stack.append(lambda context, operand=operand: -operand(context))
+
+        elif opcode in ARITHMETIC:
+            right, left = stack.pop(), stack.pop()
+            stack.append(lambda context, f=ARITHMETIC[opcode], l=left, r=right: f(l(context), r(context)))
+
+        elif opcode == "cmp":
+            right, left = stack.pop(), stack.pop()
+            stack.append(lambda context, f=COMPARISONS[instruction[1]], l=left, r=right: f(l(context), r(context)))
+
+        elif opcode == "in":
+            left = stack.pop()
+            members = _member_set(instruction[1])
+            stack.append(lambda context, l=left, m=members: freeze(l(context)) in m)
+
+        elif opcode == "contains":
+            left = stack.pop()
+            stack.append(lambda context, l=left, v=freeze(instruction[1]): v in l(context))
+
+        elif opcode == "not":
+            operand = stack.pop()
+            stack.append(lambda context, operand=operand: not operand(context))
+
+        elif opcode in ("and", "or"):
+            count = instruction[1]
+            if not 0 < count <= len(stack):
+                raise ConditionError("Malformed condition program")
+            operands = tuple(stack[-count:])
+            del stack[-count:]
+            if count == 2 and opcode == "and":
+                stack.append(lambda context, a=operands[0], b=operands[1]: a(context) and b(context))
+            elif count == 2:
+                stack.append(lambda context, a=operands[0], b=operands[1]: a(context) or b(context))
+            else:
+                combine = all if opcode == "and" else any
+                stack.append(lambda context, ops=operands, f=combine: f(op(context) for op in ops))
+
+        else:
+            raise ConditionError(f"Unknown opcode '{opcode}'")
+
+    if len(stack) != 1:
+        raise ConditionError("Malformed condition program")
+    return stack[0]
+
+
+def load_predicate(program: Sequence[Sequence[Any]]) -> Predicate:
+    """The executable form of ``program``; cached, so loading the same program again is free."""
+    return _predicate(freeze(program))
+
+
+@lru_cache(maxsize=4096)
+def _predicate(program: Program) -> Predicate:
+    try:
+        body = _build(program)
+    except (IndexError, KeyError, TypeError) as e:
+        raise ConditionError("Malformed condition program") from e
+
+    def predicate(context: Mapping[str, Any]) -> bool:
+        try:
+            return bool(body(context))
+        except (TypeError, ValueError, ArithmeticError) as e:
+            raise ConditionError(f"Condition could not be evaluated: {e}") from e
+
+    return predicate
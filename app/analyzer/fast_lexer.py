@@ -0,0 +1,209 @@
+"""
+Regex-driven tokenizer producing the same tokens as the generated ``RPLLexer``.
+
+The ANTLR lexer simulates its ATN one character at a time in pure Python;
+for well-formed sources a single compiled master regex does the same work
+several times faster. Only clean input takes the fast path: as soon as the
+regex cannot account for a character, ``tokenize`` re-lexes the whole text
+with ``RPLLexer`` so error recovery and diagnostics stay exactly ANTLR's.
+"""
+import re
+from typing import List, Optional, Tuple
+
+import structlog
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.CommonTokenFactory import CommonTokenFactory
+from antlr4.Token import CommonToken, Token
+
+from app.api.utils.guardrails import cap_diagnostics
+from app.errors.error_handler import RPLErrorListener
+from app.models.error_response import ErrorResponse
+from parsing.RPLLexer import RPLLexer
+
+logger = structlog.get_logger(__name__)
+
+
+# Case-insensitive keyword rules; each rule name lower-cased is its spelling.
+KEYWORDS = {
+    name.lower(): getattr(RPLLexer, name)
+    for name in (
+        "ROLE", "USER", "RESOURCE", "CAN", "EXTENDS", "PERMISSIONS", "ACTIONS",
+        "RESOURCES", "CONDITIONS", "GROUP", "MEMBERS", "VALID_FROM", "VALID_UNTIL",
+        "PATH", "TYPE", "METADATA", "API", "FOLDER", "DATABASE", "AND", "OR", "NOT",
+        "READ", "WRITE", "MODIFY", "START", "STOP", "DEPLOY", "DELETE", "EXECUTE",
+        "IN", "CONTAINS",
+    )
+}
+
+# BOOLEAN is case-sensitive and, being declared first, beats IDENTIFIER on a tie.
+BOOLEANS = {"true", "false"}
+
+OPERATORS = {
+    "*": RPLLexer.STAR, "==": RPLLexer.EQ, "!=": RPLLexer.NE, "<": RPLLexer.LT,
+    ">": RPLLexer.GT, "<=": RPLLexer.LE, ">=": RPLLexer.GE, "+": RPLLexer.PLUS,
+    "-": RPLLexer.MINUS, "/": RPLLexer.DIV, "[": RPLLexer.LBRACKET,
+    "]": RPLLexer.RBRACKET, "(": RPLLexer.LPAREN, ")": RPLLexer.RPAREN,
+    "{": RPLLexer.LBRACE, "}": RPLLexer.RBRACE, ":": RPLLexer.COLON,
+    ",": RPLLexer.COMMA, ".": RPLLexer.DOT,
+}
+
+# Every match is one token (or comment) with the whitespace before it; the
+# alternatives are ordered so the first match is ANTLR's longest match:
+# comments before DIV, REAL before INTEGER and DOT, two-char operators first.
+#
+# STRING: '\\' . and ~["\r\n] both accept a backslash, so any backslash may
+# escape the next character. The longest literal therefore runs to the last
+# quote before the first quote or line break *not* preceded by a backslash.
+_MASTER = re.compile(r"""[ \t\r\n]*(?:
+    (?P<LINE_COMMENT>//[^\r\n]*)
+  | (?P<BLOCK_COMMENT>/\*.*?\*/)
+  | (?P<IDENTIFIER>[a-zA-Z_][a-zA-Z0-9_]*)
+  | (?P<REAL>[0-9]+\.[0-9]*|\.[0-9]+)
+  | (?P<INTEGER>[0-9]+)
+  | (?P<STRING>"(?:[^"\r\n]|(?<=\\)["\r\n])*")
+  | (?P<CHARACTER>'(?:\\.|[^'\r\n])')
+  | (?P<OPERATOR>==|!=|<=|>=|[*<>+\-/\[\](){}:,.])
+)""", re.VERBOSE | re.DOTALL)
+
+_LITERALS = {
+    "REAL": RPLLexer.REAL,
+    "INTEGER": RPLLexer.INTEGER,
+    "STRING": RPLLexer.STRING,
+    "CHARACTER": RPLLexer.CHARACTER,
+}
+
+_SKIPPED = {"LINE_COMMENT", "BLOCK_COMMENT"}
+
+_new_token = CommonToken.__new__
+
+
+class FastLexerError(Exception):
+    """The input needs ANTLR's error recovery; raised at the first offending offset."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"no fast-path token at offset {offset}")
+        self.offset = offset
+
+
+def _token(source: tuple, token_type: int, start: int, stop: int, line: int, column: int, text: str, index: int) -> Token:
+    # Fills the slots directly; CommonToken.__init__ costs more than the regex match.
+    token = _new_token(CommonToken)
+    token.source = source
+    token.type = token_type
+    token.channel = Token.DEFAULT_CHANNEL
+    token.start = start
+    token.stop = stop
+    token.tokenIndex = index
+    token.line = line
+    token.column = column
+    token._text = text
+    return token
+
+
+def fast_tokens(text: str, line: int = 1, column: int = 0, source: tuple = CommonToken.EMPTY_SOURCE) -> List[Token]:
+    """
+    Tokenize ``text`` (positioned at ``line:column``) into ``CommonToken``s
+    ending with EOF, or raise ``FastLexerError`` on anything ANTLR would reject.
+    """
+    tokens = []
+    append = tokens.append
+    keywords = KEYWORDS
+    position = 0
+
+    # Columns are offsets from the start of the current line.
+    line_start = -column
+    next_newline = text.find("\n")
+
+    for found in _MASTER.finditer(text):
+        if found.start() != position:
+            raise FastLexerError(position)
+        position = found.end()
+
+        kind = found.lastgroup
+        start = found.start(kind)
+        while -1 < next_newline < start:
+            line += 1
+            line_start = next_newline + 1
+            next_newline = text.find("\n", line_start)
+
+        if kind in _SKIPPED:
+            continue
+
+        value = text[start:position]
+        if kind == "IDENTIFIER":
+            token_type = RPLLexer.BOOLEAN if value in BOOLEANS else keywords.get(value.lower(), RPLLexer.IDENTIFIER)
+        elif kind == "OPERATOR":
+            token_type = OPERATORS[value]
+        else:
+            token_type = _LITERALS[kind]
+
+        append(_token(source, token_type, start, position - 1, line, start - line_start, value, len(tokens)))
+
+    # Only whitespace may follow the last token.
+    length = len(text)
+    if text[position:].strip(" \t\r\n"):
+        raise FastLexerError(position)
+    while next_newline != -1:
+        line += 1
+        line_start = next_newline + 1
+        next_newline = text.find("\n", line_start)
+
+    append(_token(source, Token.EOF, length, length - 1, line, length - line_start, "<EOF>", len(tokens)))
+    return tokens
+
+
+class FastTokenSource:
+    """Token source over a pre-lexed token list, accepted by ``CommonTokenStream``."""
+
+    def __init__(self, text: str, line: int = 1, column: int = 0):
+        self._factory = CommonTokenFactory.DEFAULT
+        self.inputStream = None
+        self.line = line
+        self.column = column
+        self.tokens = fast_tokens(text, line, column, (self, None))
+        self._index = 0
+
+    def nextToken(self) -> Token:
+        token = self.tokens[self._index]
+        if self._index < len(self.tokens) - 1:
+            self._index += 1
+        return token
+
+    def getSourceName(self) -> str:
+        return "<unknown>"
+
+
+def tokenize(
+        text: str,
+        line: int = 1,
+        column: int = 0,
+        max_errors: Optional[int] = None
+) -> Tuple[CommonTokenStream, List[ErrorResponse]]:
+    """
+    Lex ``text`` into a filled ``CommonTokenStream`` and its lexical errors,
+    using the fast path when it can and ``RPLLexer`` otherwise. At most
+    ``max_errors`` errors are kept, followed by an "N more errors" summary.
+    """
+    try:
+        token_source = FastTokenSource(text, line, column)
+    except FastLexerError as e:
+        logger.debug("fast_lexer_fallback", offset=e.offset)
+    else:
+        # Hand over the finished list instead of pulling it through fetch() token by token.
+        token_stream = CommonTokenStream(token_source)
+        token_stream.tokens = list(token_source.tokens)
+        token_stream.fetchedEOF = True
+        token_stream.lazyInit()
+        return token_stream, []
+
+    lexer = RPLLexer(InputStream(text))
+    lexer.line = line
+    lexer.column = column
+
+    error_listener = RPLErrorListener(max_errors)
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(error_listener)
+
+    token_stream = CommonTokenStream(lexer)
+    token_stream.fill()
+    return token_stream, cap_diagnostics(error_listener.errors, max_errors, error_listener.dropped)
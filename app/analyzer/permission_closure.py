@@ -0,0 +1,95 @@
+"""
+Effective (inherited) permissions for every role, computed once.
+
+``Role.get_all_permissions`` walks the whole ``parent_role`` chain and
+re-deduplicates it on every call, so resolving many users in a deep
+hierarchy costs O(users x depth x permissions). ``PermissionClosure`` visits
+each role once, parents before children, and caches the result; a child's
+set is its own permissions followed by its parent's cached set.
+"""
+from typing import Any, Dict, List, Mapping, Tuple
+
+from app.analyzer.policy_ir import AnyRole
+from app.models.enums import Action
+
+
+def _unique(permissions: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """
+    Drop repeats, keeping first occurrences. IR permissions compare by value;
+    ``PermissionBlock`` rows are unhashable models, but a session hands out one
+    object per row, so they are told apart by identity.
+    """
+    seen = set()
+    unique = []
+    for permission in permissions:
+        key = permission if permission.__hash__ is not None else id(permission)
+        if key not in seen:
+            seen.add(key)
+            unique.append(permission)
+    return tuple(unique)
+
+
+class PermissionClosure:
+    """
+    Cached transitive permissions over one role registry. Build a new closure
+    when the registry changes; instances are never updated in place.
+    """
+
+    def __init__(self, roles: Mapping[str, AnyRole]):
+        self.roles = roles
+        # id(role) -> (role, effective permissions); the role is kept so its id stays unique.
+        self._effective: Dict[int, Tuple[AnyRole, Tuple[Any, ...]]] = {}
+        self._masks: Dict[str, int] = {}
+
+        for role in roles.values():
+            self.role_permissions(role)
+
+    def role_permissions(self, role: AnyRole) -> Tuple[Any, ...]:
+        """Own permissions first, then inherited ones, without duplicates (as ``get_all_permissions``)."""
+        cached = self._effective.get(id(role))
+        if cached is not None:
+            return cached[1]
+
+        # Climb to the nearest resolved ancestor, then resolve back down.
+        chain: List[AnyRole] = []
+        on_chain = set()
+        current = role
+        while current is not None and id(current) not in self._effective and id(current) not in on_chain:
+            chain.append(current)
+            on_chain.add(id(current))
+            current = current.parent_role
+
+        # A cycle (reported by validation) contributes nothing past the repeat.
+        inherited: Tuple[Any, ...] = ()
+        if current is not None and id(current) in self._effective:
+            inherited = self._effective[id(current)][1]
+
+        for member in reversed(chain):
+            inherited = _unique((*member.permissions, *inherited))
+            self._effective[id(member)] = (member, inherited)
+
+        return inherited
+
+    def permissions(self, role_name: str) -> Tuple[Any, ...]:
+        role = self.roles.get(role_name)
+        return self.role_permissions(role) if role is not None else ()
+
+    def action_mask(self, role_name: str) -> int:
+        """Union of the actions a role may perform anywhere, as an ``Action`` bitmask."""
+        mask = self._masks.get(role_name)
+        if mask is None:
+            mask = 0
+            for permission in self.permissions(role_name):
+                # Rows saved before the mask column existed only carry the action names.
+                mask |= permission.action_mask or Action.mask(permission.actions)
+            self._masks[role_name] = mask
+        return mask
+
+    def user_permissions(self, user: Any) -> List[Any]:
+        """Same result as ``user.get_all_permissions(self.roles)``: registry roles only, in order."""
+        all_perms = []
+
+        for role in user.roles:
+            all_perms.extend(self.permissions(role.name))
+
+        return all_perms
@@ -0,0 +1,188 @@
+"""
+Compact in-memory representation of a compiled policy.
+
+``SemanticAnalyzer`` and ``SemanticValidation`` work on these slotted
+dataclasses instead of SQLModel table objects: no SQLAlchemy instrumentation,
+no per-instance ``__dict__``, and plain attribute access. Rows are only built,
+by ``PolicyRows``, when a policy is persisted.
+
+Roles that already exist in the database stay ``Role`` rows (see the role
+catalog); both kinds expose ``name``, ``parent_role``, ``permissions`` and
+``get_all_permissions`` so the analyzer can mix them.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from app.models.group import Group
+from app.models.permission import PermissionBlock
+from app.models.resource import Resource, ResourceType
+from app.models.role import Role
+from app.models.user import User
+
+
+@dataclass(frozen=True, slots=True)
+class PermissionIR:
+    actions: Tuple[str, ...]
+    resources: Tuple[str, ...]
+    conditions: Optional[str] = None
+    # Compiled form of ``conditions``; see app.analyzer.condition_compiler.
+    condition_program: Optional[Tuple[Tuple[Any, ...], ...]] = None
+    # ``actions`` as an app.models.enums.Action bitmask.
+    action_mask: int = 0
+
+    def __str__(self):
+        cond = f" IF {self.conditions}" if self.conditions else ""
+        return f"{list(self.actions)} on {list(self.resources)}{cond}"
+
+
+@dataclass(eq=False, slots=True)
+class RoleIR:
+    name: str
+    permissions: List[PermissionIR] = field(default_factory=list)
+    parent_role: Optional[Union["RoleIR", Role]] = None
+    line_number: int = 0
+
+    def get_all_permissions(self, registry: Dict[str, Any]) -> List[Any]:
+        perms = list(self.permissions)
+
+        if self.parent_role:
+            perms.extend(self.parent_role.get_all_permissions(registry))
+
+        # Deduplicate, keeping first occurrence
+        return list(dict.fromkeys(perms))
+
+
+AnyRole = Union[RoleIR, Role]
+
+
+@dataclass(eq=False, slots=True)
+class UserIR:
+    name: str
+    roles: List[AnyRole] = field(default_factory=list)
+    valid_from: Optional[str] = None
+    valid_until: Optional[str] = None
+    line_number: int = 0
+
+    def get_all_permissions(self, role_registry: Dict[str, AnyRole]) -> List[Any]:
+        all_perms = []
+
+        for role in self.roles:
+            if role.name in role_registry:
+                all_perms.extend(role_registry[role.name].get_all_permissions(role_registry))
+
+        return all_perms
+
+    def __str__(self):
+        validity = ""
+        if self.valid_from or self.valid_until:
+            validity = f" (valid: {self.valid_from} - {self.valid_until})"
+        return f"User({self.name}, roles={[role.name for role in self.roles]}{validity})"
+
+
+@dataclass(eq=False, slots=True)
+class ResourceIR:
+    name: str
+    path: str
+    resource_type: ResourceType
+    meta: Dict[str, Any] = field(default_factory=dict)
+    line_number: int = 0
+
+
+@dataclass(eq=False, slots=True)
+class GroupIR:
+    name: str
+    members: List[str] = field(default_factory=list)
+    roles: List[str] = field(default_factory=list)
+    line_number: int = 0
+
+    def __str__(self):
+        return f"Group({self.name}, {len(self.members)} members, roles={self.roles})"
+
+
+class PolicyRows:
+    """
+    Converts IR objects into SQLModel rows for one save. Conversions are
+    memoized by identity, so a role shared by several users (or extended by
+    several roles) becomes a single row; persisted rows are passed through.
+    Each role gets its own permission block rows, as before.
+
+    Analyses run against session-free copies of the persisted roles (see
+    ``RoleCatalog.detached``); ``persisted`` maps their names back to the
+    session's rows, so saving links to those rows instead of inserting copies.
+    """
+
+    def __init__(self, persisted: Optional[Mapping[str, Role]] = None):
+        self._rows: Dict[int, Any] = {}
+        self._persisted = persisted or {}
+
+    def convert(self, item: Any) -> Any:
+        if isinstance(item, (RoleIR, Role)):
+            return self.role(item)
+        if isinstance(item, UserIR):
+            return self.user(item)
+        if isinstance(item, ResourceIR):
+            return self.resource(item)
+        if isinstance(item, GroupIR):
+            return self.group(item)
+        return item
+
+    @staticmethod
+    def permission(permission: PermissionIR) -> PermissionBlock:
+        return PermissionBlock(
+            actions=list(permission.actions),
+            action_mask=permission.action_mask,
+            resources=list(permission.resources),
+            conditions=permission.conditions,
+            condition_program=permission.condition_program
+        )
+
+    def role(self, role: AnyRole) -> Role:
+        if not isinstance(role, RoleIR):
+            return self._persisted.get(role.name, role)
+
+        row = self._rows.get(id(role))
+        if row is None:
+            row = self._rows[id(role)] = Role(
+                name=role.name,
+                permissions=[self.permission(p) for p in role.permissions],
+                parent_role=self.role(role.parent_role) if role.parent_role else None,
+                attributes={},
+                line_number=role.line_number
+            )
+        return row
+
+    def user(self, user: UserIR) -> User:
+        row = self._rows.get(id(user))
+        if row is None:
+            row = self._rows[id(user)] = User(
+                name=user.name,
+                roles=[self.role(r) for r in user.roles],
+                attributes={},
+                valid_from=user.valid_from,
+                valid_until=user.valid_until,
+                line_number=user.line_number
+            )
+        return row
+
+    def resource(self, resource: ResourceIR) -> Resource:
+        row = self._rows.get(id(resource))
+        if row is None:
+            row = self._rows[id(resource)] = Resource(
+                name=resource.name,
+                path=resource.path,
+                resource_type=resource.resource_type,
+                meta=dict(resource.meta),
+                line_number=resource.line_number
+            )
+        return row
+
+    def group(self, group: GroupIR) -> Group:
+        row = self._rows.get(id(group))
+        if row is None:
+            row = self._rows[id(group)] = Group(
+                name=group.name,
+                members=list(group.members),
+                roles=list(group.roles),
+                line_number=group.line_number
+            )
+        return row
@@ -1,62 +1,181 @@
+from dataclasses import dataclass
 from datetime import datetime
 
-from app.api.services.roles_service import RoleService
+from app.analyzer.condition_compiler import compile_condition
+from app.api.services.roles_service import role_catalog as role_catalog_cache
 from app.api.validation.semantic_validation import SemanticValidation
 from parsing.RPLParserVisitor import RPLParserVisitor
 from parsing.RPLParser import RPLParser
-from typing import Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 # models
+from app.analyzer.policy_ir import AnyRole, GroupIR, PermissionIR, ResourceIR, RoleIR, UserIR
+from app.models.enums import Action
 from app.models.role import Role
-from app.models.user import User
-from app.models.group import Group
-from app.models.resource import Resource, ResourceType
-from app.models.permission import PermissionBlock
+from app.models.resource import ResourceType
 
 
-class SemanticAnalyzer(RPLParserVisitor):
+# What a statement declares, read from its own subtree only: names are
+# resolved, duplicates reported and positions taken when it is declared.
+@dataclass(frozen=True, slots=True)
+class _RoleDeclaration:
+    name: str
+    parent: Optional[str]
+    permissions: Tuple[PermissionIR, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class _UserDeclaration:
+    name: str
+    role_names: Optional[Tuple[str, ...]]
+    valid_from: Optional[str]
+    valid_until: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class _ResourceDeclaration:
+    name: str
+    errors: Tuple[str, ...]
+    path: Optional[str]
+    resource_type: Optional[ResourceType]
+    meta: Dict[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class _GroupDeclaration:
+    name: str
+    members: Tuple[str, ...]
+    roles: Tuple[str, ...]
+
+
+_Declaration = Union[_RoleDeclaration, _UserDeclaration, _ResourceDeclaration, _GroupDeclaration]
+
+
+class DeclarationCache:
+    """
+    Statement declarations of one document, kept between analyses.
+
+    A declaration depends only on its statement's subtree, and the incremental
+    parser keeps the context objects of statements an edit did not touch, so
+    only new statements are visited again. Entries are keyed by context
+    identity and hold the context, so an id is never reused while cached;
+    statements that are no longer in the program are dropped.
+    """
 
     def __init__(self):
-        # Symbol tables
-        self.roles: Dict[str, Role] = {}
-        self.users: Dict[str, User] = {}
-        self.resources: Dict[str, Resource] = {}
-        self.groups: Dict[str, Group] = {}
+        self._entries: Dict[int, Tuple[RPLParser.StatementContext, Optional[_Declaration]]] = {}
+        # Statements visited by the last analysis.
+        self.visited = 0
+
+    def resolve(self, statements: Sequence[RPLParser.StatementContext], visit) -> List[Optional[_Declaration]]:
+        entries = {}
+        visited = 0
+        for statement in statements:
+            entry = self._entries.get(id(statement))
+            if entry is None:
+                entry = (statement, visit(statement))
+                visited += 1
+            entries[id(statement)] = entry
+
+        self._entries = entries
+        self.visited = visited
+        return [entries[id(statement)][1] for statement in statements]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticAnalyzer(RPLParserVisitor):
+
+    def __init__(
+            self,
+            role_catalog: Optional[Mapping[str, Role]] = None,
+            declarations: Optional[DeclarationCache] = None
+    ):
+        # Symbol tables (policy IR; persisted roles stay rows)
+        self.roles: Dict[str, AnyRole] = {}
+        self.users: Dict[str, UserIR] = {}
+        self.resources: Dict[str, ResourceIR] = {}
+        self.groups: Dict[str, GroupIR] = {}
+
+        # Persisted roles (read-only); fetched once from the catalog cache when not injected.
+        self.role_catalog = role_catalog
+        self._catalog_merged = False
+
+        # Reused statement declarations (incremental editing); None visits every statement.
+        self.declarations = declarations
 
         self.validator = SemanticValidation()
 
+    def _merge_role_catalog(self) -> None:
+        """Make persisted roles resolvable by name; done once per analysis."""
+        if self._catalog_merged:
+            return
+
+        if self.role_catalog is None:
+            self.role_catalog = role_catalog_cache.get().roles
+        self.roles.update(self.role_catalog)
+        self._catalog_merged = True
+
     def visitProgram(self, ctx: RPLParser.ProgramContext):
         """Visit all statements in the program."""
 
         # First pass: collect all declarations
-        for statement in ctx.statement():
-            self.visit(statement)
+        statements = ctx.statement()
+        if self.declarations is None:
+            declarations = [self.visitChildren(statement) for statement in statements]
+        else:
+            declarations = self.declarations.resolve(statements, self.visitChildren)
+
+        for statement, declaration in zip(statements, declarations):
+            self._declare(statement, declaration)
 
         self.validator.get_values(self.roles, self.users, self.resources, self.groups)
         self.validator.run_all()
 
         return len(self.validator.errors) == 0
 
-    def visitRoleDeclaration(self, ctx: RPLParser.RoleDeclarationContext) -> None:
-        """Process role declaration with optional inheritance."""
-        role_name = ctx.IDENTIFIER(0).getText()
-        line_number = ctx.start.line
+    def visitStatement(self, ctx: RPLParser.StatementContext) -> None:
+        """Process one statement on its own."""
+        self._declare(ctx, self.visitChildren(ctx))
+        return None
+
+    def _declare(self, ctx: RPLParser.StatementContext, declaration: Optional[_Declaration]) -> None:
+        if isinstance(declaration, _RoleDeclaration):
+            self._declare_role(ctx, declaration)
+        elif isinstance(declaration, _UserDeclaration):
+            self._declare_user(ctx, declaration)
+        elif isinstance(declaration, _ResourceDeclaration):
+            self._declare_resource(ctx, declaration)
+        elif isinstance(declaration, _GroupDeclaration):
+            self._declare_group(ctx, declaration)
 
-        role_service = RoleService()
-        db_roles: Sequence[Role] = role_service.get_roles()
-        for r in db_roles:
-            self.roles[r.name] = r
+    def _declare_role(self, ctx: RPLParser.StatementContext, declaration: _RoleDeclaration) -> None:
+        """Register a role; its parent must be declared before it."""
+        role_name = declaration.name
+
+        self._merge_role_catalog()
 
         if role_name in self.roles:
             self.validator.add_error(ctx,
                                      f"Role '{role_name}' already declared at line {self.roles[role_name].line_number}")
-            return None
+            return
 
-        parent: Role | None = None
-        if ctx.EXTENDS():
-            parent_role = ctx.IDENTIFIER(1).getText()
+        parent: AnyRole | None = None
+        if declaration.parent is not None and declaration.parent in self.roles:
+            parent = self.roles[declaration.parent]
 
-            if parent_role in self.roles:
-                parent = self.roles[parent_role]
+        self.roles[role_name] = RoleIR(
+            name=role_name,
+            permissions=list(declaration.permissions),
+            parent_role=parent,
+            line_number=ctx.start.line
+        )
+
+    def visitRoleDeclaration(self, ctx: RPLParser.RoleDeclarationContext) -> _RoleDeclaration:
+        """Extract role declaration with optional inheritance."""
+        parent: Optional[str] = None
+        if ctx.EXTENDS():
+            parent = ctx.IDENTIFIER(1).getText()
 
         permissions = []
         if ctx.roleBody():
@@ -65,16 +184,7 @@ class SemanticAnalyzer(RPLParserVisitor):
                 if perms:
                     permissions.extend(perms)
 
-        role = Role(
-            name=role_name,
-            permissions=permissions,
-            parent_role=parent,
-            attributes={},
-            line_number=line_number
-        )
-
-        self.roles[role_name] = role
-        return None
+        return _RoleDeclaration(ctx.IDENTIFIER(0).getText(), parent, tuple(permissions))
 
     def visitRolePermissions(self, ctx: RPLParser.RolePermissionsContext):
         """Extract role permissions (both new and legacy format)."""
@@ -83,7 +193,7 @@ class SemanticAnalyzer(RPLParserVisitor):
         # New format: permissions: [{actions: [...], resources: [...]}]
         if ctx.PERMISSIONS():
             for perm_block_ctx in ctx.permissionBlock():
-                perm_block: PermissionBlock = self.visit(perm_block_ctx)
+                perm_block: PermissionIR = self.visit(perm_block_ctx)
                 if perm_block:
                     permissions.append(perm_block)
 
@@ -101,7 +211,11 @@ class SemanticAnalyzer(RPLParserVisitor):
             if ctx.resourceList():
                 resources = self.visit(ctx.resourceList())
 
-            permissions.append(PermissionBlock(actions=actions, resources=resources))
+            permissions.append(PermissionIR(
+                actions=tuple(actions),
+                resources=tuple(resources),
+                action_mask=Action.mask(actions)
+            ))
 
         return permissions
 
@@ -110,6 +224,7 @@ class SemanticAnalyzer(RPLParserVisitor):
         actions = []
         resources = []
         conditions = None
+        condition_program = None
 
         # Extract actions
         if ctx.actionList():
@@ -122,8 +237,15 @@ class SemanticAnalyzer(RPLParserVisitor):
         # Extract conditions if present
         if ctx.condition():
             conditions = ctx.condition().getText()
-
-        return PermissionBlock(actions=actions, resources=resources, conditions=conditions)
+            condition_program = compile_condition(ctx.condition())
+
+        return PermissionIR(
+            actions=tuple(actions),
+            resources=tuple(resources),
+            conditions=conditions,
+            condition_program=condition_program,
+            action_mask=Action.mask(actions)
+        )
 
     def visitActionList(self, ctx: RPLParser.ActionListContext):
         """Extract list of actions."""
@@ -158,20 +280,38 @@ class SemanticAnalyzer(RPLParserVisitor):
 
         return '.'.join(parts)
 
-    def visitUserDeclaration(self, ctx: RPLParser.UserDeclarationContext) -> None:
-        """Process user declaration."""
-        user_name: str = ctx.IDENTIFIER().getText()
-        line_number: int = ctx.start.line
+    def _declare_user(self, ctx: RPLParser.StatementContext, declaration: _UserDeclaration) -> None:
+        """Register a user with the roles it names."""
+        user_name = declaration.name
 
         if user_name in self.users:
             self.validator.add_error(
                 ctx,
                 f"User '{user_name}' already declared at line {self.users[user_name].line_number}"
             )
-            return None
+            return
+
+        roles: List[AnyRole] = []
+        if declaration.role_names is not None:
+            self._merge_role_catalog()
+
+            for role_name in declaration.role_names:
+                if role_name not in self.roles:
+                    self.validator.add_error(ctx, f"Role '{role_name}' not declared")
+                else:
+                    roles.append(self.roles[role_name])
 
-        # Extract user data
-        roles: List[Role] = []
+        self.users[user_name] = UserIR(
+            name=user_name,
+            roles=roles,
+            valid_from=declaration.valid_from,
+            valid_until=declaration.valid_until,
+            line_number=ctx.start.line
+        )
+
+    def visitUserDeclaration(self, ctx: RPLParser.UserDeclarationContext) -> _UserDeclaration:
+        """Extract user declaration."""
+        role_names: Optional[Tuple[str, ...]] = None
         valid_from: Optional[datetime] = None
         valid_until: Optional[datetime] = None
 
@@ -180,33 +320,12 @@ class SemanticAnalyzer(RPLParserVisitor):
 
             # Extract roles
             if user_body.userRoles():
-                role_names: List[str] = self.visit(user_body.userRoles())
-
-                role_service = RoleService()
-                db_roles: Sequence[Role] = role_service.get_roles()
-                for r in db_roles:
-                    self.roles[r.name] = r
-
-                for role_name in role_names:
-                    if role_name not in self.roles:
-                        self.validator.add_error(ctx, f"Role '{role_name}' not declared")
-                    else:
-                        roles.append(self.roles[role_name])
+                role_names = tuple(self.visit(user_body.userRoles()))
 
             if user_body.validPeriod():
                 valid_from, valid_until = self.visit(user_body.validPeriod())
 
-        user = User(
-            name=user_name,
-            roles=roles,
-            attributes={},
-            valid_from=valid_from,
-            valid_until=valid_until,
-            line_number=line_number
-        )
-
-        self.users[user_name] = user
-        return None
+        return _UserDeclaration(ctx.IDENTIFIER().getText(), role_names, valid_from, valid_until)
 
     def visitUserRoles(self, ctx: RPLParser.UserRolesContext):
         """Extract user roles."""
@@ -229,17 +348,35 @@ class SemanticAnalyzer(RPLParserVisitor):
         """Extract valid_until date."""
         return ctx.STRING().getText().strip('"\'')
 
-    def visitResourceDeclaration(self, ctx: RPLParser.ResourceDeclarationContext):
-        """Process resource declaration with path, type, and metadata."""
-        resource_name = ctx.IDENTIFIER().getText()
-        line_number = ctx.start.line
+    def _declare_resource(self, ctx: RPLParser.StatementContext, declaration: _ResourceDeclaration) -> None:
+        """Register a resource, or report why it cannot be."""
+        resource_name = declaration.name
 
         if resource_name in self.resources:
             self.validator.add_error(
                 ctx,
                 f"Resource '{resource_name}' already declared at line {self.resources[resource_name].line_number}"
             )
-            return None
+            return
+
+        for message in declaration.errors:
+            self.validator.add_error(ctx, message)
+
+        if declaration.path is None or declaration.resource_type is None:
+            return
+
+        self.resources[resource_name] = ResourceIR(
+            name=resource_name,
+            path=declaration.path,
+            resource_type=declaration.resource_type,
+            meta=dict(declaration.meta),
+            line_number=ctx.start.line
+        )
+
+    def visitResourceDeclaration(self, ctx: RPLParser.ResourceDeclarationContext) -> _ResourceDeclaration:
+        """Extract resource declaration with path, type, and metadata."""
+        resource_name = ctx.IDENTIFIER().getText()
+        errors: List[str] = []
 
         path: Optional[str] = None
         resource_type: Optional[ResourceType] = None
@@ -253,7 +390,7 @@ class SemanticAnalyzer(RPLParserVisitor):
                     if string_token:
                         path = string_token.getText().strip('"\'')
                     else:
-                        self.validator.add_error(ctx, f"PATH property missing value for resource '{resource_name}'")
+                        errors.append(f"PATH property missing value for resource '{resource_name}'")
 
                 elif prop_ctx.TYPE():
                     type_ctx = prop_ctx.resourceType()
@@ -263,10 +400,7 @@ class SemanticAnalyzer(RPLParserVisitor):
                         resource_type = ResourceType(type_text)
                     except ValueError:
                         valid_types = ', '.join([e.value for e in ResourceType])
-                        self.validator.add_error(
-                            ctx,
-                            f"Invalid resource type '{type_text}'. Must be one of: {valid_types}"
-                        )
+                        errors.append(f"Invalid resource type '{type_text}'. Must be one of: {valid_types}")
 
                 elif prop_ctx.METADATA():
                     meta_block_ctx = prop_ctx.metadataBlock()
@@ -275,23 +409,11 @@ class SemanticAnalyzer(RPLParserVisitor):
 
         # Validate required fields
         if path is None:
-            self.validator.add_error(ctx, f"Resource '{resource_name}' missing required 'path' property")
-            return None
-
-        if resource_type is None:
-            self.validator.add_error(ctx, f"Resource '{resource_name}' missing required 'type' property")
-            return None
-
-        resource = Resource(
-            name=resource_name,
-            path=path,
-            resource_type=resource_type,
-            meta=metadata,
-            line_number=line_number
-        )
+            errors.append(f"Resource '{resource_name}' missing required 'path' property")
+        elif resource_type is None:
+            errors.append(f"Resource '{resource_name}' missing required 'type' property")
 
-        self.resources[resource_name] = resource
-        return resource
+        return _ResourceDeclaration(resource_name, tuple(errors), path, resource_type, metadata)
 
     def visitMetadataBlock(self, ctx: RPLParser.MetadataBlockContext):
         """Extract metadata block as key-value pairs."""
@@ -305,16 +427,24 @@ class SemanticAnalyzer(RPLParserVisitor):
 
         return metadata
 
-    def visitGroupDeclaration(self, ctx: RPLParser.GroupDeclarationContext):
-        """Process group declaration."""
-        group_name = ctx.IDENTIFIER().getText()
-        line_number = ctx.start.line
+    def _declare_group(self, ctx: RPLParser.StatementContext, declaration: _GroupDeclaration) -> None:
+        """Register a group; members and roles are checked by the validator."""
+        group_name = declaration.name
 
         if group_name in self.groups:
             self.validator.add_error(ctx,
                                      f"Group '{group_name}' already declared at line {self.groups[group_name].line_number}")
-            return None
+            return
 
+        self.groups[group_name] = GroupIR(
+            name=group_name,
+            members=list(declaration.members),
+            roles=list(declaration.roles),
+            line_number=ctx.start.line
+        )
+
+    def visitGroupDeclaration(self, ctx: RPLParser.GroupDeclarationContext) -> _GroupDeclaration:
+        """Extract group declaration."""
         members = []
         roles = []
 
@@ -327,15 +457,7 @@ class SemanticAnalyzer(RPLParserVisitor):
             if group_body.groupRoles():
                 roles = self.visit(group_body.groupRoles())
 
-        group = Group(
-            name=group_name,
-            members=members,
-            roles=roles,
-            line_number=line_number
-        )
-
-        self.groups[group_name] = group
-        return None
+        return _GroupDeclaration(ctx.IDENTIFIER().getText(), tuple(members), tuple(roles))
 
     def visitGroupMembers(self, ctx: RPLParser.GroupMembersContext):
         """Extract group members."""
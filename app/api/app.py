@@ -1,3 +1,5 @@
+import asyncio
+
 import structlog
 from fastapi import FastAPI
 from starlette import status
@@ -7,7 +9,11 @@ from app.api.routers.client_db_api import client_db_router
 from app.api.routers.mock_api import mock_router
 from app.api.routers.rest_explorer_api import rest_router
 from app.api.routers.rpl_editor_api import rpl_router
+from app.api.services.rpl_editor_service import shutdown_analyzer, warm_up_analyzer
 from app.api.routers.simulation_api import simulation_router
+from app.api.routers.enforcement_api import enforcement_router
+from app.api.services.enforcement_service import enforcement_service
+from app.api.utils.decision_log import decision_log
 from app.api.utils.config import Config
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
@@ -40,6 +46,7 @@ async def lifespan(api: FastAPI):
     """
     # Startup
     logger.info("application_starting")
+    api.state.ready = False
 
     try:
         # Initialize client_db
@@ -54,16 +61,40 @@ async def lifespan(api: FastAPI):
         prometheus_metrics.setup()
         logger.info("metrics_initialized")
 
+        # Build the parser prediction caches before taking traffic
+        warmup = await asyncio.to_thread(warm_up_analyzer)
+        logger.info("parser_warmed_up", **warmup)
+
+        # Sampled access decisions are written by a background thread
+        decision_log.start()
+        logger.info("decision_log_started")
+
+        # Compile the enforcement policy so no decision waits for it
+        snapshot = await asyncio.to_thread(enforcement_service.snapshot)
+        logger.info("policy_loaded", version=snapshot.version, rules=len(snapshot.engine.rules))
+
+        api.state.ready = True
         yield  # Application is running
 
     finally:
         # Shutdown
+        api.state.ready = False
         logger.info("application_shutting_down")
 
         # Close connections
         await close_cache()
         logger.info("cache_closed")
 
+        shutdown_analyzer()
+        logger.info("analyzer_workers_stopped")
+
+        enforcement_service.shutdown()
+        logger.info("enforcement_workers_stopped")
+
+        # Writes what is still buffered
+        decision_log.stop()
+        logger.info("decision_log_stopped")
+
         logger.info("database_closed")
 
         logger.info("application_shutdown_complete")
@@ -79,6 +110,18 @@ app = FastAPI(
 )
 
 
+app.state.ready = False
+
+
+@app.get("/api/ready", include_in_schema=False)
+async def readiness():
+    """Readiness probe: 503 until startup (including parser warm-up) has finished."""
+    if not app.state.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "starting"}
+        )
+    return {"status": "ready"}
 
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
@@ -146,6 +189,7 @@ app.add_middleware(
 
 app.include_router(file_manager_router)
 app.include_router(simulation_router)
+app.include_router(enforcement_router)
 app.include_router(resource_router)
 app.include_router(user_router)
 app.include_router(auth_router)
@@ -1,4 +1,5 @@
-from typing import Any, Generator, Generic, Optional, Sequence, Type, TypeVar, Iterable
+from typing import Any, Generator, Generic, List, Optional, Sequence, Type, TypeVar, Iterable
+from sqlalchemy import Engine, inspect, literal, text
 from sqlmodel import Session, SQLModel, create_engine, select
 from app.api.utils.config import Config
 import structlog
@@ -10,6 +11,51 @@ engine = create_engine(DATABASE_URL, echo=True)
 
 async def init_db():
     SQLModel.metadata.create_all(engine)
+    add_missing_columns(engine)
+
+
+def add_missing_columns(bind: Engine) -> List[str]:
+    """
+    ``create_all`` creates missing tables but never alters existing ones, so a
+    database created before a model gained a column (e.g. ``permission_block``
+    before ``action_mask`` and ``condition_program``) would fail every query on
+    that model. Add such columns, and their indexes, in place.
+
+    A NOT NULL column is added with its model's scalar default for the existing
+    rows, or as nullable when it has none. Returns the ``table.column`` names added.
+    """
+    inspector = inspect(bind)
+    preparer = bind.dialect.identifier_preparer
+    added: List[str] = []
+
+    with bind.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name, schema=table.schema):
+                continue
+
+            existing = {column["name"] for column in inspector.get_columns(table.name, schema=table.schema)}
+            new_columns = [column for column in table.columns if column.name not in existing]
+
+            for column in new_columns:
+                ddl = (
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=bind.dialect)}"
+                )
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if not column.nullable and default is not None:
+                    value = literal(default).compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True})
+                    ddl += f" NOT NULL DEFAULT {value}"
+
+                connection.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+
+            for index in table.indexes:
+                if any(column.name not in existing for column in index.columns):
+                    index.create(connection)
+
+    if added:
+        logger.warning("database_columns_added", columns=added)
+    return added
 
 
 def get_session() -> Generator[Session, Any, None]:
@@ -40,9 +40,19 @@ enforcement_counter = Counter(
     ['policy_id', 'decision']
 )
 
+# Decisions take microseconds to a few milliseconds; the default buckets start at 5 ms.
+ENFORCEMENT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
 enforcement_duration = Histogram(
     'enforcement_duration_seconds',
-    'Enforcement check duration'
+    'Enforcement check duration',
+    buckets=ENFORCEMENT_BUCKETS
+)
+
+enforcement_batch_duration = Histogram(
+    'enforcement_batch_duration_seconds',
+    'Batch enforcement duration, per batch',
+    buckets=ENFORCEMENT_BUCKETS
 )
 
 active_connections = Gauge(
@@ -60,6 +70,52 @@ cache_misses = Counter(
     'Total cache misses'
 )
 
+decision_cache_hits = Counter(
+    'decision_cache_hits_total',
+    'Policy decisions served from the decision cache'
+)
+
+decision_cache_misses = Counter(
+    'decision_cache_misses_total',
+    'Policy decisions evaluated because no cached decision applied'
+)
+
+decision_cache_evictions = Counter(
+    'decision_cache_evictions_total',
+    'Decisions dropped from the decision cache',
+    ['reason']
+)
+
+decision_log_written = Counter(
+    'decision_log_written_total',
+    'Sampled access decisions written to the decision log sink'
+)
+
+decision_log_dropped = Counter(
+    'decision_log_dropped_total',
+    'Sampled access decisions lost because the ring buffer was full or the sink failed'
+)
+
+analysis_queue_depth = Gauge(
+    'analysis_queue_depth',
+    'Analyses admitted and waiting for a worker'
+)
+
+analysis_queue_wait = Histogram(
+    'analysis_queue_wait_seconds',
+    'Time analyses spend waiting for a worker'
+)
+
+analysis_rejected = Counter(
+    'analysis_rejected_total',
+    'Analyses rejected because the admission queue was full'
+)
+
+parser_warmup_duration = Gauge(
+    'parser_warmup_seconds',
+    'Time spent warming the parser prediction caches at startup'
+)
+
 
 class PrometheusMetrics:
     """Prometheus metrics collector."""
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, HTTPException, Response
+from starlette import status
+
+from app.api.services.enforcement_service import (
+    DecisionTimeoutError,
+    PolicyNotLoadedError,
+    enforcement_service,
+)
+from app.api.utils.config import Config
+from app.models.request import AccessRequest, BatchAccessRequest
+from app.models.response.enforcement_response import AccessDecision, BatchAccessResponse
+
+DEFAULT_BATCH_MAX_REQUESTS = 1000
+
+# Which compiled policy decided, so callers can tell decisions from before and after a reload apart.
+POLICY_VERSION_HEADER = "X-Policy-Version"
+
+enforcement_router = APIRouter(
+    prefix="/api",
+    tags=["Enforcement"],
+)
+
+batch_max_requests = int(Config().get("ENFORCE_BATCH_MAX_REQUESTS", DEFAULT_BATCH_MAX_REQUESTS))
+
+
+def policy_loading(error: PolicyNotLoadedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Policy is loading, retry later",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def budget_exceeded(error: DecisionTimeoutError) -> HTTPException:
+    # No decision in time is not a decision: gateways apply their fail-closed policy.
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error)
+    )
+
+
+@enforcement_router.post(
+    path="/enforce",
+    response_model=AccessDecision,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_200_OK,
+    summary="Check one access request",
+    description="Decides a (subject, action, resource) request against the compiled policy "
+                "within the configured latency budget; with explain, also returns the matched rules, "
+                "the subject's role inheritance and a condition evaluation trace",
+)
+async def enforce(request: AccessRequest, response: Response):
+    try:
+        snapshot, decision = await enforcement_service.check_access(
+            request.subject, request.action, request.resource, request.context, request.explain
+        )
+    except PolicyNotLoadedError as e:
+        raise policy_loading(e)
+    except DecisionTimeoutError as e:
+        raise budget_exceeded(e)
+
+    response.headers[POLICY_VERSION_HEADER] = snapshot.version
+    return decision
+
+
+@enforcement_router.post(
+    path="/enforce/batch",
+    response_model=BatchAccessResponse,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_200_OK,
+    summary="Check many access requests at once",
+    description="Decides each (subject, action, resource) request against the compiled policy; "
+                "decisions are returned in request order",
+)
+async def enforce_batch(request: BatchAccessRequest, response: Response):
+    if len(request.requests) > batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {batch_max_requests} requests per batch"
+        )
+
+    try:
+        snapshot, decisions = await enforcement_service.check_access_batch(
+            [item.model_dump() for item in request.requests]
+        )
+    except PolicyNotLoadedError as e:
+        raise policy_loading(e)
+    except DecisionTimeoutError as e:
+        raise budget_exceeded(e)
+
+    response.headers[POLICY_VERSION_HEADER] = snapshot.version
+    return BatchAccessResponse(decisions=decisions)
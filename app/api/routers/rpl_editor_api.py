@@ -4,7 +4,15 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from starlette import status
 from app.api.utils.connection_manager import ConnectionManager
-from app.api.services.rpl_editor_service import analyze_policies, get_all_findings
+from app.api.services.rpl_editor_service import (
+    analyze_document,
+    analyze_policies,
+    analyze_policy_batch,
+    get_all_findings,
+)
+from app.api.utils.admission import AnalysisQueueFullError
+from app.api.utils.guardrails import AnalysisLimitError
+from app.api.utils.incremental_parser import TextEdit
 from app.models.llm_result import Finding
 
 logger = structlog.get_logger(__name__)
@@ -16,12 +24,31 @@ rpl_router = APIRouter(
 manager = ConnectionManager()
 
 
+def overloaded(error: AnalysisQueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Analysis capacity exhausted, retry later",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def limit_exceeded(error: AnalysisLimitError) -> HTTPException:
+    # Too much input is the client's to shrink; running out of parse time is reported as unprocessable.
+    too_large = error.limit in ("max_source_bytes", "max_tokens", "max_batch_files")
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE if too_large else status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=error.as_dict()
+    )
+
+
 class PolicyResponse(BaseModel):
     message: Dict[str, Any]
 
 class PolicyRequest(BaseModel):
     code: str
     use_llm: bool = False
+    # Opt-in debug output: include a size-capped rendering of the parse tree.
+    debug_tree: bool = False
 
 
 
@@ -33,10 +60,16 @@ class PolicyRequest(BaseModel):
     description="Saved the models of the policies to client_db of analyze them with AI"
 )
 async def analyze_code(request: PolicyRequest):
-    result: Dict[str, Any] | None = await analyze_policies(
-        code=request.code,
-        use_llm=request.use_llm
-    )
+    try:
+        result: Dict[str, Any] | None = await analyze_policies(
+            code=request.code,
+            use_llm=request.use_llm,
+            debug_tree=request.debug_tree
+        )
+    except AnalysisQueueFullError as e:
+        raise overloaded(e)
+    except AnalysisLimitError as e:
+        raise limit_exceeded(e)
 
     if result:
         return PolicyResponse(message=result)
@@ -46,6 +79,81 @@ async def analyze_code(request: PolicyRequest):
 
 
 
+class PolicyFile(BaseModel):
+    name: str
+    code: str
+
+
+class BatchPolicyRequest(BaseModel):
+    files: List[PolicyFile]
+
+
+@rpl_router.post(
+    "/analyze/batch",
+    status_code=status.HTTP_200_OK,
+    response_model=PolicyResponse,
+    summary="Compile many policy files in parallel",
+    description="Compiles every file on a process pool and returns merged symbol tables, "
+                "per-file diagnostics and per-file timings; RPL_BATCH_MAX_FILES caps the files per request"
+)
+async def analyze_code_batch(request: BatchPolicyRequest):
+    files = {policy_file.name: policy_file.code for policy_file in request.files}
+    if len(files) != len(request.files):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File names must be unique")
+
+    try:
+        result = await analyze_policy_batch(files)
+    except AnalysisQueueFullError as e:
+        raise overloaded(e)
+    except AnalysisLimitError as e:
+        raise limit_exceeded(e)
+
+    return PolicyResponse(message=result)
+
+
+class DocumentEdit(BaseModel):
+    start: int
+    end: int
+    text: str
+
+
+class IncrementalPolicyRequest(BaseModel):
+    document_id: str
+    # Full text (re)opens the document; otherwise ``edits`` are applied to the open copy.
+    code: str | None = None
+    edits: List[DocumentEdit] = []
+
+
+@rpl_router.post(
+    "/analyze/incremental",
+    status_code=status.HTTP_200_OK,
+    response_model=PolicyResponse,
+    summary="Incrementally analyze an open editor document",
+    description="Re-parses only the statements touched by the edits and returns diagnostics without saving"
+)
+async def analyze_code_incremental(request: IncrementalPolicyRequest):
+    try:
+        result = await analyze_document(
+            document_id=request.document_id,
+            code=request.code,
+            edits=[TextEdit(edit.start, edit.end, edit.text) for edit in request.edits]
+        )
+    except AnalysisQueueFullError as e:
+        raise overloaded(e)
+    except AnalysisLimitError as e:
+        raise limit_exceeded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document '{request.document_id}' is not open; send the full code"
+        )
+
+    return PolicyResponse(message=result)
+
+
 @rpl_router.post(
     "/insight",
     status_code=status.HTTP_201_CREATED,
@@ -0,0 +1,278 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import structlog
+
+from app.analyzer.permission_closure import PermissionClosure
+from app.analyzer.policy_ir import AnyRole
+from sqlmodel import Session
+
+from app.api.database.database import DatabaseHandler, engine as database_engine
+from app.api.middlewares.metrics import enforcement_batch_duration, enforcement_counter, enforcement_duration
+from app.api.services.roles_service import role_catalog
+from app.api.utils.access_matrix import DEFAULT_MAX_CELLS, AccessMatrix, effective_roles
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.config import Config
+from app.api.utils.decision_cache import DecisionCache
+from app.api.utils.policy_store import DEFAULT_PREWARM_KEYS, PolicySnapshot, PolicyStore
+from app.models.group import Group
+from app.models.resource import Resource
+from app.models.role import Role
+from app.models.user import User
+
+logger = structlog.get_logger(__name__)
+
+# A gateway calls /api/enforce on every request: decisions answer within this or not at all.
+DEFAULT_LATENCY_BUDGET_MS = 10.0
+DEFAULT_BATCH_LATENCY_BUDGET_MS = 250.0
+DEFAULT_DECISION_WORKERS = 4
+DEFAULT_RETRY_AFTER_SECONDS = 1
+
+
+class PolicyNotLoadedError(Exception):
+    """No compiled policy yet (it is loading); callers should answer 503 with Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Policy is loading, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class DecisionTimeoutError(Exception):
+    """A decision did not finish within the latency budget; callers should answer 503."""
+
+    def __init__(self, budget_seconds: float):
+        super().__init__(f"Decision exceeded the {budget_seconds * 1000:g} ms latency budget")
+        self.budget_seconds = budget_seconds
+
+
+class PolicyCompileMode(str, Enum):
+    """How the process-wide engine is compiled."""
+    # Indexed rules only.
+    RULES = "rules"
+    # Rules plus a dense users x resources matrix for unconditional decisions.
+    DENSE = "dense"
+
+
+def build_policy_data(
+        roles: Mapping[str, AnyRole],
+        users: Sequence[Any],
+        groups: Iterable[Any] = (),
+        resources: Iterable[Any] = ()
+) -> Dict[str, Any]:
+    """
+    ``PolicyEngine`` input from analyzed or persisted roles, users, groups and
+    resources: one ALLOW rule per permission block and resource, scoped to
+    every role that holds the block directly or through inheritance. Users
+    hold their own roles and those of their groups.
+    """
+    closure = PermissionClosure(roles)
+
+    # id(permission) -> (permission, roles granting it), in first-seen order
+    granted: Dict[int, tuple] = {}
+    for name in roles:
+        for permission in closure.permissions(name):
+            granted.setdefault(id(permission), (permission, []))[1].append(name)
+
+    rules: List[Dict[str, Any]] = []
+    for permission, holders in granted.values():
+        for resource in permission.resources:
+            rules.append({
+                "type": "ALLOW",
+                "actions": list(permission.actions),
+                "action_mask": permission.action_mask,
+                "resource": resource,
+                "condition": permission.conditions,
+                "condition_program": permission.condition_program,
+                "roles": holders,
+            })
+
+    return {
+        "roles": {
+            name: {"parent_role": role.parent_role.name if role.parent_role else None}
+            for name, role in roles.items()
+        },
+        "users": {name: {"roles": held} for name, held in effective_roles(users, groups).items()},
+        "resources": {resource.name: {"path": resource.path} for resource in resources},
+        "policies": rules,
+    }
+
+
+class EnforcementService:
+    """
+    The process-wide policy: compiled from the persisted roles, users, groups
+    and resources into a ``PolicyStore`` snapshot on first use, and swapped
+    atomically by ``reload()``.
+    """
+
+    def __init__(
+            self,
+            mode: PolicyCompileMode = PolicyCompileMode.RULES,
+            matrix_max_cells: int = DEFAULT_MAX_CELLS,
+            store: Optional[PolicyStore] = None,
+            latency_budget_ms: float = DEFAULT_LATENCY_BUDGET_MS,
+            batch_latency_budget_ms: float = DEFAULT_BATCH_LATENCY_BUDGET_MS,
+            workers: int = DEFAULT_DECISION_WORKERS
+    ):
+        self.mode = mode
+        self.matrix_max_cells = matrix_max_cells
+        self.store = store if store is not None else PolicyStore(DecisionCache.from_config())
+        self.latency_budget = latency_budget_ms / 1000
+        self.batch_latency_budget = batch_latency_budget_ms / 1000
+        self._lock = threading.Lock()
+        self._loading: Optional[threading.Thread] = None
+        # Decisions run here, not on the event loop, so the budget can be enforced with a timeout.
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rpl-enforce")
+
+    def snapshot(self) -> PolicySnapshot:
+        snapshot = self.store.current()
+        if snapshot is None:
+            with self._lock:
+                snapshot = self.store.current() or self._publish()
+        return snapshot
+
+    def engine(self) -> PolicyEngine:
+        return self.snapshot().engine
+
+    def load_in_background(self) -> None:
+        """
+        Start compiling the policy on a thread unless it is loaded or already loading.
+        The thread reads through its own session (see ``_publish``), never the request session.
+        """
+        with self._lock:
+            if self.store.current() is not None or (self._loading is not None and self._loading.is_alive()):
+                return
+            self._loading = threading.Thread(target=self._load_logged, name="rpl-policy-load", daemon=True)
+            self._loading.start()
+
+    def _load_logged(self) -> None:
+        try:
+            self.snapshot()
+        except Exception as e:
+            logger.error("policy_load_failed", error=str(e), exc_info=True)
+
+    def _loaded(self) -> PolicySnapshot:
+        """The current snapshot; never compiles on the request path."""
+        snapshot = self.store.current()
+        if snapshot is None:
+            self.load_in_background()
+            raise PolicyNotLoadedError(DEFAULT_RETRY_AFTER_SECONDS)
+        return snapshot
+
+    async def check_access(
+            self,
+            subject: str,
+            action: str,
+            resource: str,
+            context: Optional[Dict[str, Any]] = None,
+            explain: bool = False
+    ) -> Tuple[PolicySnapshot, Dict[str, Any]]:
+        """
+        Decide one request within the latency budget, recording
+        ``enforcement_counter`` and ``enforcement_duration``; with ``explain``,
+        also why. Returns the snapshot that decided it and the decision.
+        """
+        snapshot = self._loaded()
+        started = time.perf_counter()
+
+        decision = await self._within(
+            self.latency_budget, snapshot, started, snapshot.engine.check_access,
+            subject, action, resource, context, explain
+        )
+
+        enforcement_duration.observe(time.perf_counter() - started)
+        enforcement_counter.labels(policy_id=snapshot.version, decision=_outcome(decision)).inc()
+        return snapshot, decision
+
+    async def check_access_batch(
+            self,
+            requests: Sequence[Mapping[str, Any]]
+    ) -> Tuple[PolicySnapshot, List[Dict[str, Any]]]:
+        """Decide a batch on one snapshot, even if a reload swaps it meanwhile, within the batch budget."""
+        snapshot = self._loaded()
+        started = time.perf_counter()
+
+        decisions = await self._within(
+            self.batch_latency_budget, snapshot, started, snapshot.engine.check_access_batch, requests
+        )
+
+        enforcement_batch_duration.observe(time.perf_counter() - started)
+        for decision in decisions:
+            enforcement_counter.labels(policy_id=snapshot.version, decision=_outcome(decision)).inc()
+        return snapshot, decisions
+
+    async def _within(self, budget: float, snapshot: PolicySnapshot, started: float, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, fn, *args), timeout=budget)
+        except asyncio.TimeoutError:
+            # The worker finishes in the background; the caller fails closed now.
+            enforcement_counter.labels(policy_id=snapshot.version, decision="timeout").inc()
+            logger.warning(
+                "enforcement_budget_exceeded",
+                budget_ms=budget * 1000,
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+            )
+            raise DecisionTimeoutError(budget)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def reload(self) -> PolicySnapshot:
+        """
+        Recompile from the database and swap it in; checks already running finish on the old snapshot.
+        Blocking (reads, compile and pre-warm); call it off the event loop. Reloads run one at a
+        time, so an older compile can never be published over a newer one.
+        """
+        with self._lock:
+            role_catalog.invalidate()
+            return self._publish()
+
+    def refresh(self) -> Optional[PolicySnapshot]:
+        """After policy writes: reload if a policy is loaded, otherwise leave it to first use."""
+        if self.store.current() is None:
+            return None
+        return self.reload()
+
+    def _publish(self) -> PolicySnapshot:
+        # Its own session: this runs on worker and loader threads, and the shared request
+        # session (and the role catalog's rows bound to it) must only be used from the loop.
+        # Relationships load lazily while compiling, so everything happens inside the block.
+        with Session(database_engine) as session:
+            roles = {role.name: role for role in DatabaseHandler(session, Role).get_all()}
+            users = DatabaseHandler(session, User).get_all()
+            groups = DatabaseHandler(session, Group).get_all()
+            resources = DatabaseHandler(session, Resource).get_all()
+
+            matrix = None
+            if self.mode == PolicyCompileMode.DENSE:
+                try:
+                    matrix = AccessMatrix.compile(roles, users, resources, groups, max_cells=self.matrix_max_cells)
+                except ValueError as e:
+                    # Too large to materialize: every decision goes through the rules instead.
+                    logger.warning("access_matrix_skipped", error=str(e))
+
+            policy_data = build_policy_data(roles, users, groups, resources)
+
+        return self.store.publish(policy_data, matrix)
+
+
+
+def _outcome(decision: Dict[str, Any]) -> str:
+    return "allow" if decision["allowed"] else "deny"
+
+
+enforcement_service = EnforcementService(
+    PolicyCompileMode(Config().get("POLICY_COMPILE_MODE", PolicyCompileMode.RULES.value)),
+    int(Config().get("POLICY_MATRIX_MAX_CELLS", DEFAULT_MAX_CELLS)),
+    PolicyStore(
+        DecisionCache.from_config(),
+        int(Config().get("POLICY_PREWARM_KEYS", DEFAULT_PREWARM_KEYS))
+    ),
+    float(Config().get("ENFORCE_LATENCY_BUDGET_MS", DEFAULT_LATENCY_BUDGET_MS)),
+    float(Config().get("ENFORCE_BATCH_LATENCY_BUDGET_MS", DEFAULT_BATCH_LATENCY_BUDGET_MS)),
+    int(Config().get("ENFORCE_WORKERS", DEFAULT_DECISION_WORKERS))
+)
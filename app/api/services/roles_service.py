@@ -1,6 +1,20 @@
+import time
+import hashlib
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Sequence, List
+
+from app.analyzer.permission_closure import PermissionClosure
 from app.api.database.database import DatabaseHandler, next_session
+from app.api.utils.config import Config
+from app.models.permission import PermissionBlock
 from app.models.role import Role
-from typing import Sequence, List
+
+
+# Bounds how long a snapshot can miss role writes made by other processes.
+DEFAULT_ROLE_CATALOG_TTL_SECONDS = 30.0
 
 
 class RoleService:
@@ -12,3 +26,104 @@ class RoleService:
         return roles
 
 
+@dataclass(frozen=True)
+class RoleCatalog:
+    """Read-only snapshot of the persisted roles, keyed by name."""
+    version: str
+    roles: Mapping[str, Role]
+
+    @cached_property
+    def closure(self) -> PermissionClosure:
+        """Inherited permissions per role; lives exactly as long as this snapshot."""
+        return PermissionClosure(self.roles)
+
+    @cached_property
+    def detached(self) -> Mapping[str, Role]:
+        """
+        Session-free copies of ``roles`` with their permissions and parents loaded,
+        safe to pickle to worker processes that never open the database.
+        A plain dict, since mapping proxies do not pickle; treat it as read-only.
+        """
+        copies: Dict[str, Role] = {}
+        for role in self.roles.values():
+            _detach(role, copies)
+        return copies
+
+
+def _detach(role: Role, copies: Dict[str, Role]) -> Role:
+    copy = copies.get(role.name)
+    if copy is None:
+        # Registered before the parent is copied, so an inheritance cycle ends here.
+        copy = copies[role.name] = Role(
+            id=role.id,
+            name=role.name,
+            attributes=dict(role.attributes or {}),
+            line_number=role.line_number
+        )
+        copy.permissions = [
+            PermissionBlock(
+                id=permission.id,
+                actions=list(permission.actions),
+                action_mask=permission.action_mask,
+                resources=list(permission.resources),
+                conditions=permission.conditions,
+                condition_program=permission.condition_program
+            )
+            for permission in role.permissions
+        ]
+        if role.parent_role is not None:
+            copy.parent_role = _detach(role.parent_role, copies)
+    return copy
+
+
+class RoleCatalogCache:
+    """
+    Holds one ``RoleCatalog`` for the whole process so analyses resolve persisted
+    roles without a query per declaration. Reloaded after ``invalidate()`` (role
+    writes) or once the TTL expires; the version only changes with the content.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_ROLE_CATALOG_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._catalog: Optional[RoleCatalog] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> RoleCatalog:
+        with self._lock:
+            now = time.monotonic()
+            if self._catalog is None or now - self._loaded_at > self.ttl_seconds:
+                self._catalog = self._load()
+                self._loaded_at = now
+            return self._catalog
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._catalog = None
+
+    @staticmethod
+    def _load() -> RoleCatalog:
+        roles = RoleService().get_roles()
+
+        digest = hashlib.sha256()
+        for role in sorted(roles, key=lambda r: r.name):
+            digest.update(f"{role.id}:{role.name}:{role.parent_role_id}\n".encode("utf-8"))
+            # Permission contents too, in order: compile results and closures depend on them.
+            for permission in role.permissions:
+                digest.update(repr((
+                    permission.id,
+                    permission.actions,
+                    permission.resources,
+                    permission.conditions,
+                    permission.action_mask
+                )).encode("utf-8"))
+
+        return RoleCatalog(
+            version=digest.hexdigest()[:16],
+            roles=MappingProxyType({role.name: role for role in roles})
+        )
+
+
+role_catalog = RoleCatalogCache(
+    float(Config().get("RPL_ROLE_CATALOG_TTL_SECONDS", DEFAULT_ROLE_CATALOG_TTL_SECONDS))
+)
@@ -1,7 +1,14 @@
+import asyncio
 import structlog
 
+from app.analyzer.policy_ir import AnyRole, GroupIR, PolicyRows, ResourceIR, UserIR
+from app.api.services.enforcement_service import enforcement_service
+from app.api.services.roles_service import role_catalog
+from app.api.utils.config import Config
+from app.api.utils.guardrails import AnalysisLimitError
+from app.api.utils.incremental_parser import DEFAULT_MAX_DOCUMENTS, DocumentStore, TextEdit
 from app.api.utils.rpl_analyzer import RPLAnalyzerService
-from typing import Dict, List, Type, TypeVar, Any, Coroutine, Sequence
+from typing import Dict, List, Mapping, Type, TypeVar, Any, Coroutine, Sequence
 
 from app.models.llm_result import Finding
 from app.models.role import Role
@@ -15,13 +22,16 @@ from app.api.database.database import DatabaseHandler, next_session
 
 
 service = RPLAnalyzerService()
+documents = DocumentStore(int(Config().get("RPL_MAX_OPEN_DOCUMENTS", DEFAULT_MAX_DOCUMENTS)))
 
 
 T = TypeVar("T", bound=SQLModel)
 
-async def save_items(model: Type[T], items: Dict[str, T]) -> List[T]:
+async def save_items(model: Type[T], items: Dict[str, Any], rows: PolicyRows | None = None) -> List[T]:
+    """Persist analyzer output; IR objects become ``model`` rows only here."""
+    rows = rows or PolicyRows()
     handler = DatabaseHandler(next_session, model)
-    return handler.create_all(items.values())
+    return handler.create_all(rows.convert(item) for item in items.values())
 
 
 async def save_llm_findings(model: Type[T], items: List[Finding]) -> List[T]:
@@ -36,23 +46,32 @@ async def retrieve_llm_findings(model: Type[T]) -> Sequence[SQLModel | Any]:
 
 
 
-async def analyze_policies(code: str, use_llm: bool = False) -> Dict[str, Any] | None:
+async def analyze_policies(code: str, use_llm: bool = False, debug_tree: bool = False) -> Dict[str, Any] | None:
 
-    result = await service.analyze(code, use_llm)
+    result = await service.analyze(code, use_llm, debug_tree)
+    debug_output = {"parse_tree": result["parse_tree"]} if "parse_tree" in result else {}
 
 
     if result.get("symbol_table"):
         table = result["symbol_table"]
-        roles: Dict[str, Role] = table["roles"]
-        users: Dict[str, User] = table["users"]
-        resources: Dict[str, Resource] = table["resources"]
-        groups: Dict[str, Group] = table["groups"]
-
-        saved_roles = await save_items(Role, roles)
-        saved_users = await save_items(User, users)
-        saved_resources = await save_items(Resource, resources)
-        saved_groups = await save_items(Group, groups)
-
+        roles: Dict[str, AnyRole] = table["roles"]
+        users: Dict[str, UserIR] = table["users"]
+        resources: Dict[str, ResourceIR] = table["resources"]
+        groups: Dict[str, GroupIR] = table["groups"]
+
+        # Shared so users link to the same role rows that were just saved; the analysis
+        # resolved persisted roles to detached copies, which map back to the session's rows.
+        rows = PolicyRows(role_catalog.get().roles)
+        saved_roles = await save_items(Role, roles, rows)
+        saved_users = await save_items(User, users, rows)
+        saved_resources = await save_items(Resource, resources, rows)
+        saved_groups = await save_items(Group, groups, rows)
+
+        # Later analyses resolve roles against the catalog we just changed.
+        role_catalog.invalidate()
+        # Enforcement swaps to the new policy once it is compiled, off the event loop;
+        # checks meanwhile (and those already running) are decided by the old one.
+        await asyncio.to_thread(enforcement_service.refresh)
 
         return {
             "saved": {
@@ -61,6 +80,7 @@ async def analyze_policies(code: str, use_llm: bool = False) -> Dict[str, Any] |
                 "resources": saved_resources,
                 "groups": saved_groups,
             },
+            **debug_output,
         }
 
 
@@ -75,6 +95,7 @@ async def analyze_policies(code: str, use_llm: bool = False) -> Dict[str, Any] |
         return {
                 "findings": findings,
                 "risk_score": llm_analysis.get("risk_score"),
+                **debug_output,
         }
 
 
@@ -83,6 +104,73 @@ async def analyze_policies(code: str, use_llm: bool = False) -> Dict[str, Any] |
 
 
 
+async def analyze_document(
+        document_id: str,
+        code: str | None = None,
+        edits: List[TextEdit] | None = None
+) -> Dict[str, Any] | None:
+    """
+    Editor round-trip: (re)open a document with its full text, or apply edits to the
+    open copy so only the touched statements are re-parsed. Nothing is persisted.
+    Returns None when the document is unknown and no full text was sent.
+    """
+    if code is None and documents.get(document_id) is None:
+        return None
+
+    # Session-free copies: the catalog's rows would reload through the shared session on the worker.
+    catalog = role_catalog.get()
+    return await service.executor.run(_edit_and_analyze, document_id, code, edits or [], catalog.detached)
+
+
+def _edit_and_analyze(
+        document_id: str,
+        code: str | None,
+        edits: List[TextEdit],
+        roles: Mapping[str, Role]
+) -> Dict[str, Any]:
+    """Runs on an analysis worker: parsing and semantic analysis are CPU-bound."""
+    if code is not None:
+        # Same limits as a full compile, checked before the document is parsed or replaced.
+        document = documents.open(document_id, code, service.parse_mode, service.limits)
+    else:
+        document = documents.get(document_id)
+        if document is None:
+            raise ValueError(f"Document '{document_id}' was closed")
+
+    with document.lock:
+        try:
+            # Ranges and the resulting size are checked before any edit is applied.
+            document.apply_edits(edits)
+        except AnalysisLimitError as e:
+            # A token or deadline failure may have stopped part-way through the edits.
+            if e.limit != "max_source_bytes":
+                documents.close(document_id)
+            raise
+
+        # Only the statements the edits replaced are visited again.
+        result = service.analyze_parsed(document.program(), document.errors, roles, document.declarations)
+
+        return {
+            "errors": result.get("errors", []),
+            "warnings": result.get("warnings", []),
+            "statements": document.statement_count,
+            "reparsed_statements": document.last_reparsed,
+        }
+
+
+async def analyze_policy_batch(files: Dict[str, str]) -> Dict[str, Any]:
+    """Compile many policy files at once; results are merged but not persisted."""
+    return await service.analyze_batch(files)
+
+
+def warm_up_analyzer() -> Dict[str, Any]:
+    return service.warm_up()
+
+
+def shutdown_analyzer() -> None:
+    service.shutdown()
+
+
 async def get_all_findings():
     findings = await retrieve_llm_findings(Finding)
     return findings
\ No newline at end of file
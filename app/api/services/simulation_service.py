@@ -1,7 +1,8 @@
 from typing import Optional
 from datetime import datetime, date
 
-from app.api.services.auth_service import get_current_user, user_handler,role_handler
+from app.api.services.auth_service import get_current_user, user_handler
+from app.api.services.roles_service import role_catalog
 from app.models.auth_models import Token
 from app.models.response.simulation_response import PermissionCheck
 from app.models.role import Role
@@ -72,18 +73,16 @@ def check_user_permissions(token: Token):
     if not user_expired:
         return None
 
-    role_db = role_handler(Role)
+    closure = role_catalog.get().closure
 
-    roles: List[Role] = []
+    roles: List[Role] = list(user.roles)
     resource_permission: Dict[str, List[str]] = {}
 
-    for r in user.roles:
-        role = role_db.get(r.id)
-        roles.append(role)
-
-        for permission in role.permissions:
-            resource = permission.resources
-            resource_permission[resource] = permission.actions
+    # Effective permissions, including those inherited through parent roles.
+    for role in roles:
+        for permission in closure.permissions(role.name):
+            for resource in permission.resources:
+                resource_permission[resource] = permission.actions
 
 
     return PermissionCheck(
@@ -0,0 +1,173 @@
+"""
+Dense access matrix: users x resources, one byte of ``Action`` bits per cell.
+
+For permissions without conditions a decision is a pure function of (user,
+action, resource), so it can be computed for every pair up front: role
+inheritance is expanded (``PermissionClosure``), group roles are added to
+their members, and each permission ORs its action mask into every cell whose
+resource its pattern matches. A check is then one index into a bytearray.
+
+Columns are the exact strings a request can name: declared resource names,
+their paths, and the literal (wildcard-free) references in permissions. A
+second matrix holds the action bits of *conditional* permissions; where one
+could apply the matrix gives no answer and the caller evaluates the rules.
+
+With NumPy installed, ``cells`` is also exposed as a ``uint8`` array so rows
+(everything a user may do) and columns (everyone who may touch a resource)
+are vector operations.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+from app.analyzer.permission_closure import PermissionClosure
+from app.analyzer.policy_ir import AnyRole
+from app.api.utils.resource_trie import WILDCARD, ResourceTrie
+from app.models.enums import Action
+
+try:
+    import numpy as np
+except ImportError:  # optional: row/column queries fall back to Python loops
+    np = None
+
+# Bounds the bytes a compiled matrix may take (two bytes per user x resource cell).
+DEFAULT_MAX_CELLS = 32 * 1024 * 1024
+
+# Single-action bits; "*" and unknown names are never answered from the matrix.
+_SINGLE_BITS = frozenset(flag.value for flag in Action if flag is not Action.ALL)
+
+
+def effective_roles(users: Iterable[Any], groups: Iterable[Any] = ()) -> Dict[str, List[str]]:
+    """Each user's directly assigned role names plus the roles of every group listing them."""
+    roles: Dict[str, List[str]] = {user.name: [role.name for role in user.roles] for user in users}
+    for group in groups:
+        for member in group.members:
+            if member in roles:
+                roles[member].extend(name for name in group.roles if name not in roles[member])
+    return roles
+
+
+class AccessMatrix:
+
+    def __init__(self, users: Sequence[str], resources: Sequence[str]):
+        self.users = tuple(users)
+        self.resources = tuple(resources)
+        self.user_index = {name: row for row, name in enumerate(self.users)}
+        self.resource_index = {name: column for column, name in enumerate(self.resources)}
+        size = len(self.users) * len(self.resources)
+        self.cells = bytearray(size)
+        self.conditional = bytearray(size)
+
+    @classmethod
+    def compile(
+            cls,
+            roles: Mapping[str, AnyRole],
+            users: Iterable[Any],
+            resources: Iterable[Any] = (),
+            groups: Iterable[Any] = (),
+            max_cells: int = DEFAULT_MAX_CELLS
+    ) -> "AccessMatrix":
+        """
+        Materialize the matrix from an analyzed (or persisted) symbol table.
+        Raises ``ValueError`` before allocating if it would exceed ``max_cells``.
+        """
+        user_roles = effective_roles(users, groups)
+        closure = PermissionClosure(roles)
+
+        patterns: Set[str] = set()
+        for name in roles:
+            for permission in closure.permissions(name):
+                patterns.update(permission.resources)
+
+        columns = dict.fromkeys(
+            [key for resource in resources for key in (resource.name, resource.path) if key]
+            + sorted(pattern for pattern in patterns if WILDCARD not in pattern)
+        )
+        if len(user_roles) * len(columns) > max_cells:
+            raise ValueError(
+                f"Access matrix of {len(user_roles)} users x {len(columns)} resources exceeds {max_cells} cells"
+            )
+        matrix = cls(list(user_roles), list(columns))
+
+        # pattern -> columns it matches, from one trie lookup per column
+        trie = ResourceTrie((pattern, pattern) for pattern in patterns)
+        covered: Dict[str, List[int]] = {}
+        for column, resource in enumerate(matrix.resources):
+            for pattern in trie.match(resource):
+                covered.setdefault(pattern, []).append(column)
+
+        # One sparse row per role, then users OR their roles' rows together.
+        role_rows: Dict[str, tuple] = {}
+        for name in roles:
+            granted: Dict[int, int] = {}
+            conditional: Dict[int, int] = {}
+            for permission in closure.permissions(name):
+                mask = permission.action_mask or Action.mask(permission.actions)
+                target = conditional if permission.conditions or permission.condition_program else granted
+                for pattern in permission.resources:
+                    for column in covered.get(pattern, ()):
+                        target[column] = target.get(column, 0) | mask
+            role_rows[name] = (granted, conditional)
+
+        width = len(matrix.resources)
+        for row, user in enumerate(matrix.users):
+            offset = row * width
+            for role in user_roles[user]:
+                granted, conditional = role_rows.get(role, ({}, {}))
+                for column, mask in granted.items():
+                    matrix.cells[offset + column] |= mask
+                for column, mask in conditional.items():
+                    matrix.conditional[offset + column] |= mask
+
+        return matrix
+
+    def lookup(self, user: str, action: str, resource: str) -> Optional[bool]:
+        """
+        The decision, or None when the matrix cannot give it: an unknown user
+        or resource, an action outside the single-action vocabulary, or a
+        conditional permission that might apply.
+        """
+        row = self.user_index.get(user)
+        column = self.resource_index.get(resource)
+        requested = Action.parse(action)
+        if row is None or column is None or requested is None or requested.value not in _SINGLE_BITS:
+            return None
+
+        cell = row * len(self.resources) + column
+        if self.cells[cell] & requested:
+            return True
+        if self.conditional[cell] & requested:
+            return None
+        return False
+
+    def array(self):
+        """``cells`` as a users x resources ``uint8`` NumPy array (a view, no copy)."""
+        if np is None:
+            raise RuntimeError("NumPy is required for array access to the matrix")
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(len(self.users), len(self.resources))
+
+    def resources_for(self, user: str, action: str) -> List[str]:
+        """Resources ``user`` may perform ``action`` ("*": every action) on without any condition (one row)."""
+        row, bit = self.user_index.get(user), Action.parse(action)
+        if row is None or not bit:
+            return []
+        if np is not None:
+            columns = np.flatnonzero((self.array()[row] & bit.value) == bit.value)
+        else:
+            width = len(self.resources)
+            cells = self.cells[row * width:(row + 1) * width]
+            columns = [column for column, mask in enumerate(cells) if mask & bit == bit]
+        return [self.resources[column] for column in columns]
+
+    def users_with(self, action: str, resource: str) -> List[str]:
+        """Users who may perform ``action`` ("*": every action) on ``resource`` without any condition (one column)."""
+        column, bit = self.resource_index.get(resource), Action.parse(action)
+        if column is None or not bit:
+            return []
+        if np is not None:
+            rows = np.flatnonzero((self.array()[:, column] & bit.value) == bit.value)
+        else:
+            width = len(self.resources)
+            rows = [row for row in range(len(self.users)) if self.cells[row * width + column] & bit == bit]
+        return [self.users[row] for row in rows]
+
+    def __len__(self) -> int:
+        return len(self.cells)
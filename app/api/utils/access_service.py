@@ -1,6 +1,19 @@
-import re
 import structlog
-from typing import Dict, Any
+from typing import Dict, Any, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+from app.analyzer.condition_compiler import (
+    ConditionError,
+    Predicate,
+    compile_condition_source,
+    attribute_loader,
+    load_predicate,
+    references,
+)
+from app.api.utils.access_matrix import AccessMatrix
+from app.api.utils.decision_cache import DecisionCache, Outcome
+from app.api.utils.decision_log import DecisionLog, decision_log as default_decision_log
+from app.api.utils.rule_index import RuleIndex
+from app.models.enums import Action
 
 logger = structlog.get_logger(__name__)
 
@@ -11,18 +24,65 @@ class PolicyEngine:
     Evaluates policies in real-time to make access control decisions.
     """
 
-    def __init__(self, policy_data: Dict[str, Any]):
+    def __init__(
+            self,
+            policy_data: Dict[str, Any],
+            cache: Optional[DecisionCache] = None,
+            matrix: Optional[AccessMatrix] = None,
+            version: str = "",
+            decision_log: Optional[DecisionLog] = None
+    ):
         """
         Initialize policy engine with compiled policy data.
 
         Args:
-            policy_data: Dictionary containing roles, users, resources, and rules
+            policy_data: Dictionary containing roles, users, resources, and rules.
+                A rule with a "roles" list only applies to subjects holding one of
+                those roles (``users[name]["roles"]``, or the subject itself when it
+                names a role); a rule without one applies to every subject.
+            cache: Decision cache; by default one sized from DECISION_CACHE_MAX_ENTRIES
+                and DECISION_CACHE_TTL_SECONDS
+            matrix: Dense access matrix compiled from the same (ALLOW-only) symbol
+                table as the rules; answers unconditional decisions without
+                evaluating any rule
+            version: Policy version; part of every cache key, so engines for
+                different versions can share one cache
+            decision_log: Sampled decision log; checks only queue into it, its
+                writer thread does the logging. By default the process-wide one
         """
         self.roles = policy_data.get("roles", {})
         self.users = policy_data.get("users", {})
         self.resources = policy_data.get("resources", {})
         self.rules = policy_data.get("policies", [])
-        self.cache = {}
+        self.matrix = matrix
+        self.version = version
+        self.cache = cache if cache is not None else DecisionCache.from_config()
+        self.decision_log = decision_log if decision_log is not None else default_decision_log
+
+        # Action lists become Action bitmasks: per-rule checks are one AND.
+        self.action_masks: List[int] = [
+            rule.get("action_mask") or Action.mask(rule.get("actions", [])) for rule in self.rules
+        ]
+
+        # Rules bucketed by action, then by resource pattern: candidates cost O(depth), not O(rules).
+        self.rule_index = RuleIndex(self.rules, self.action_masks)
+
+        # Role scopes as sets, and each subject's roles, resolved once.
+        self.scopes: List[Optional[FrozenSet[str]]] = [
+            frozenset(rule["roles"]) if rule.get("roles") is not None else None for rule in self.rules
+        ]
+        self.subject_roles: Dict[str, FrozenSet[str]] = {
+            name: frozenset(user.get("roles", [])) for name, user in self.users.items()
+        }
+
+        # Conditions are compiled once here, never re-parsed per request.
+        self.predicates: List[Optional[Predicate]] = []
+        # Attribute paths each condition reads: the part of the context a cached decision depends on.
+        self.references: List[Tuple[str, ...]] = []
+        for rule in self.rules:
+            predicate, paths = self._compile_condition(rule)
+            self.predicates.append(predicate)
+            self.references.append(paths)
 
         logger.info(
             "policy_engine_initialized",
@@ -32,12 +92,66 @@ class PolicyEngine:
             rules=len(self.rules)
         )
 
-    def check_access(
+    def is_allowed(
             self,
             subject: str,
             action: str,
             resource: str,
             context: Dict[str, Any] = None
+    ) -> bool:
+        """Whether subject may perform action on resource; the fast path when only the decision is needed."""
+        return self.decide(subject, action, resource, context).allowed
+
+    def decide(
+            self,
+            subject: str,
+            action: str,
+            resource: str,
+            context: Dict[str, Any] = None,
+            record: bool = True
+    ) -> Outcome:
+        """
+        The decision in compact form. Answered by the matrix or the cache when
+        they can; otherwise the candidate rules are evaluated in declaration
+        order, stopping at the first DENY that applies. ``record=False`` keeps
+        the decision out of the decision log (e.g. cache pre-warming, which
+        replays requests nobody made).
+        """
+        # Unconditional decisions are one index into the compiled matrix
+        if self.matrix is not None:
+            decided = self.matrix.lookup(subject, action, resource)
+            if decided is not None:
+                outcome = Outcome.MATRIX_ALLOW if decided else Outcome.NO_MATCH
+                if record:
+                    self.decision_log.record(subject, action, resource, outcome, self.version)
+                return outcome
+
+        # Conditions see the request itself plus the caller's context.
+        attributes = {"subject": subject, "action": action, "resource": resource, **(context or {})}
+
+        cached = self.cache.get(self.version, subject, action, resource, attributes)
+        if cached is not None:
+            if record:
+                self.decision_log.record(subject, action, resource, cached, self.version, cached=True)
+            return cached
+
+        # Only rules whose action and resource match, in declaration order
+        candidates = self.rule_index.candidates(action, resource, Action.parse(action))
+        outcome = self._evaluate(subject, action, resource, attributes, candidates, self._roles_of(subject))
+
+        # Sampled and written off the hot path; no per-check log event.
+        if record:
+            self.decision_log.record(subject, action, resource, outcome, self.version)
+
+        return outcome
+
+    def check_access(
+            self,
+            subject: str,
+            action: str,
+            resource: str,
+            context: Dict[str, Any] = None,
+            explain: bool = False
     ) -> Dict[str, Any]:
         """
         Check if subject is allowed to perform action on resource.
@@ -47,132 +161,261 @@ class PolicyEngine:
             action: Action to perform (read, write, delete, etc.)
             resource: Resource being accessed
             context: Additional context (time, IP, etc.)
+            explain: Also report why, as ``explain`` does (bypasses the matrix and the cache)
 
         Returns:
             Dictionary with decision details
         """
-        context = context or {}
+        if explain:
+            return self.explain(subject, action, resource, context)
+        return self._result(subject, action, resource, self.decide(subject, action, resource, context))
 
-        logger.debug(
-            "checking_access",
-            subject=subject,
-            action=action,
-            resource=resource
-        )
+    def check_access_batch(self, requests: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Check many requests at once; decisions come back in request order.
 
-        # Check cache
-        cache_key = f"{subject}:{action}:{resource}"
-        if cache_key in self.cache:
-            logger.debug("cache_hit", cache_key=cache_key)
-            return self.cache[cache_key]
+        Requests are dicts with "subject", "action", "resource" and optional
+        "context" and "explain". Those not answered by the cache are grouped
+        by (action, resource), so each group's candidate rules are looked up
+        once and each subject's roles resolved once, and the batch logs one event.
 
-        # Find matching rules
-        matched_rules = []
-        deny_found = False
-        allow_found = False
+        Returns:
+            One decision per request, as ``check_access`` returns it
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        groups: Dict[Tuple[str, str], List[Tuple[int, Dict[str, Any]]]] = {}
 
-        for rule in self.rules:
-            # Check if action matches
-            if action not in rule.get("actions", []) and "*" not in rule.get("actions", []):
+        for position, request in enumerate(requests):
+            subject, action, resource = request["subject"], request["action"], request["resource"]
+            if request.get("explain"):
+                results[position] = self.explain(subject, action, resource, request.get("context"))
                 continue
 
-            # Check if resource matches
-            if not self._resource_matches(resource, rule.get("resource", "")):
-                continue
+            attributes = {"subject": subject, "action": action, "resource": resource, **(request.get("context") or {})}
 
-            # Check condition (if present)
-            if "condition" in rule and rule["condition"]:
-                if not self._evaluate_condition(rule["condition"], subject, context):
+            if self.matrix is not None:
+                decided = self.matrix.lookup(subject, action, resource)
+                if decided is not None:
+                    outcome = Outcome.MATRIX_ALLOW if decided else Outcome.NO_MATCH
+                    results[position] = self._result(subject, action, resource, outcome)
+                    self.decision_log.record(subject, action, resource, outcome, self.version)
                     continue
 
-            # Rule matches
-            matched_rules.append(rule)
+            cached = self.cache.get(self.version, subject, action, resource, attributes)
+            if cached is not None:
+                results[position] = self._result(subject, action, resource, cached)
+                self.decision_log.record(subject, action, resource, cached, self.version, cached=True)
+            else:
+                groups.setdefault((action, resource), []).append((position, attributes))
+
+        roles: Dict[str, Optional[FrozenSet[str]]] = {}
+        for (action, resource), members in groups.items():
+            candidates = self.rule_index.candidates(action, resource, Action.parse(action))
+            for position, attributes in members:
+                subject = requests[position]["subject"]
+                if subject not in roles:
+                    roles[subject] = self._roles_of(subject)
+                outcome = self._evaluate(subject, action, resource, attributes, candidates, roles[subject])
+                results[position] = self._result(subject, action, resource, outcome)
+                self.decision_log.record(subject, action, resource, outcome, self.version)
 
-            if rule["type"] == "DENY":
-                deny_found = True
-            elif rule["type"] == "ALLOW":
-                allow_found = True
+        logger.info(
+            "access_batch_completed",
+            requests=len(requests),
+            evaluated=sum(len(members) for members in groups.values()),
+            groups=len(groups),
+            allowed=sum(1 for result in results if result["allowed"])
+        )
+
+        return results
+
+    def explain(
+            self,
+            subject: str,
+            action: str,
+            resource: str,
+            context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        The decision with everything that led to it, evaluating every
+        candidate rule (no matrix, no cache, no short-circuit).
+
+        Returns:
+            ``check_access``'s dictionary plus "matched_rules" (in declaration
+            order), "roles" (each role the subject holds with its chain of
+            parent roles) and "trace" (one entry per candidate rule: whether
+            its role scope applies, the attributes its condition read and the
+            condition's result)
+        """
+        attributes = {"subject": subject, "action": action, "resource": resource, **(context or {})}
+        subject_roles = self._roles_of(subject)
+
+        matched_rules = []
+        trace = []
+        for index in self.rule_index.candidates(action, resource, Action.parse(action)):
+            rule = self.rules[index]
+            scope = self.scopes[index]
+            step: Dict[str, Any] = {
+                "rule": index,
+                "type": rule["type"],
+                "resource": rule.get("resource"),
+                "granted_by": sorted(scope & subject_roles) if scope is not None else None,
+                "in_scope": scope is None or not scope.isdisjoint(subject_roles),
+            }
+            trace.append(step)
+            if not step["in_scope"]:
+                continue
 
-        # Determine decision (DENY overrides ALLOW)
-        allowed = allow_found and not deny_found
+            predicate = self.predicates[index]
+            if predicate is not None:
+                step.update(self._trace_condition(index, rule, predicate, attributes))
+                if not step["result"]:
+                    continue
 
-        if deny_found:
-            reason = "Access denied by explicit DENY rule"
-        elif allow_found:
-            reason = "Access allowed by ALLOW rule"
+            matched_rules.append(rule)
+
+        if any(rule["type"] == "DENY" for rule in matched_rules):
+            outcome = Outcome.DENY
+        elif any(rule["type"] == "ALLOW" for rule in matched_rules):
+            outcome = Outcome.ALLOW
         else:
-            reason = "No matching rules, default deny"
-            allowed = False
+            outcome = Outcome.NO_MATCH
 
-        result = {
-            "allowed": allowed,
-            "matched_rules": matched_rules,
-            "reason": reason,
+        result = self._result(subject, action, resource, outcome)
+        result["matched_rules"] = matched_rules
+        result["roles"] = {role: self._inheritance(role) for role in sorted(subject_roles)}
+        result["trace"] = trace
+        return result
+
+    @staticmethod
+    def _result(subject: str, action: str, resource: str, outcome: Outcome) -> Dict[str, Any]:
+        """An outcome in ``check_access`` form."""
+        return {
+            "allowed": outcome.allowed,
+            "reason": outcome.reason,
             "subject": subject,
             "action": action,
             "resource": resource
         }
 
-        # Cache result
-        self.cache[cache_key] = result
+    def _roles_of(self, subject: str) -> FrozenSet[str]:
+        """A user's roles, or the subject itself when it names a role."""
+        roles = self.subject_roles.get(subject)
+        if roles is None:
+            roles = frozenset((subject,)) if subject in self.roles else frozenset()
+        return roles
+
+    def _inheritance(self, role: str) -> List[str]:
+        """``role`` followed by its parent, the parent's parent, and so on."""
+        chain = [role]
+        parent = (self.roles.get(role) or {}).get("parent_role")
+        while parent and parent not in chain:
+            chain.append(parent)
+            parent = (self.roles.get(parent) or {}).get("parent_role")
+        return chain
+
+    def _evaluate(
+            self,
+            subject: str,
+            action: str,
+            resource: str,
+            attributes: Dict[str, Any],
+            candidates: List[int],
+            subject_roles: FrozenSet[str]
+    ) -> Outcome:
+        """Decide from the candidate rules (indices into ``self.rules``) and cache the outcome."""
+        outcome = Outcome.NO_MATCH
+
+        for index in candidates:
+            rule = self.rules[index]
+
+            # Rules granted through roles the subject does not hold
+            scope = self.scopes[index]
+            if scope is not None and scope.isdisjoint(subject_roles):
+                continue
+
+            # Check condition (if present)
+            predicate = self.predicates[index]
+            if predicate is not None and not self._evaluate_condition(rule, predicate, attributes):
+                continue
 
-        logger.info(
-            "access_check_completed",
-            subject=subject,
-            action=action,
-            resource=resource,
-            allowed=allowed
-        )
+            # DENY overrides ALLOW: no later rule can change the decision
+            if rule["type"] == "DENY":
+                outcome = Outcome.DENY
+                break
+            if rule["type"] == "ALLOW":
+                outcome = Outcome.ALLOW
 
-        return result
+        # Keyed by every attribute the candidates' conditions read, not just those
+        # evaluated before a DENY stopped the scan, so the key is the same for every request.
+        paths = {path for index in candidates for path in self.references[index]}
+        self.cache.set(self.version, subject, action, resource, tuple(sorted(paths)), attributes, outcome)
 
-    def _resource_matches(self, resource: str, pattern: str) -> bool:
+        return outcome
+
+    @staticmethod
+    def _compile_condition(rule: Dict[str, Any]) -> Tuple[Optional[Predicate], Tuple[str, ...]]:
         """
-        Check if resource matches pattern.
-        Supports wildcards (*).
+        Executable form of a rule's condition: the program compiled by the
+        analyzer (``condition_program``) or, failing that, the condition
+        source; with the attribute paths it reads.
         """
-        if pattern == "*":
-            return True
+        program = rule.get("condition_program")
+        condition = rule.get("condition")
+        if not program and not condition:
+            return None, ()
+
+        try:
+            program = program if program else compile_condition_source(condition)
+            return load_predicate(program), references(program)
+        except ConditionError as e:
+            logger.warning("condition_compile_failed", condition=condition, error=str(e))
+            error = e
 
-        if "*" in pattern:
-            # Convert wildcard pattern to regex
-            regex_pattern = pattern.replace("*", ".*")
-            return bool(re.match(f"^{regex_pattern}$", resource))
+            def invalid(attributes: Dict[str, Any]) -> bool:
+                raise error
 
-        return resource == pattern
+            return invalid, ()
 
+    @staticmethod
     def _evaluate_condition(
-            self,
-            condition: str,
-            context: Dict[str, Any]
+            rule: Dict[str, Any],
+            predicate: Predicate,
+            attributes: Dict[str, Any]
     ) -> bool:
         """
-        Evaluate a condition string.
-        Very simplified - in production, use proper expression parser.
+        Whether the rule's condition holds. Fails closed: a condition that
+        cannot be evaluated never grants access through an ALLOW rule and
+        always applies a DENY rule.
         """
-        # This is a placeholder - implement proper condition evaluation
-        # For now, return True to allow all conditional rules
-
-        # Example: "time.hour > 9 AND time.hour < 17"
-        # Would need to parse and evaluate with actual context
-
-        logger.debug("evaluating_condition", condition=condition)
+        try:
+            return predicate(attributes)
+        except ConditionError as e:
+            logger.warning("condition_evaluation_failed", rule_type=rule.get("type"), error=str(e))
+            return rule.get("type") == "DENY"
 
-        # Simple time-based conditions
-        if "time.hour" in condition:
-            current_hour = context.get("time", {}).get("hour", 12)
-
-            # Very basic parsing
-            if ">" in condition and "<" in condition:
-                # Extract numbers
-                numbers = re.findall(r'\d+', condition)
-                if len(numbers) >= 2:
-                    min_hour = int(numbers[0])
-                    max_hour = int(numbers[1])
-                    return min_hour < current_hour < max_hour
-
-        # Default: allow
-        return True
+    def _trace_condition(
+            self,
+            index: int,
+            rule: Dict[str, Any],
+            predicate: Predicate,
+            attributes: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """How a rule's condition evaluated: its source, the attribute values it read and its (fail-closed) result."""
+        read = {}
+        for path in self.references[index]:
+            try:
+                read[path] = attribute_loader(path)(attributes)
+            except ConditionError:
+                read[path] = None
+
+        step = {"condition": rule.get("condition"), "attributes": read}
+        try:
+            step["result"] = bool(predicate(attributes))
+        except ConditionError as e:
+            step["result"] = rule.get("type") == "DENY"
+            step["error"] = str(e)
+        return step
 
     def clear_cache(self):
         """Clear the decision cache."""
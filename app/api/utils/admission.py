@@ -0,0 +1,83 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+import structlog
+
+from app.api.middlewares.metrics import analysis_queue_depth, analysis_queue_wait, analysis_rejected
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_RETRY_AFTER_SECONDS = 5
+
+
+class AnalysisQueueFullError(Exception):
+    """Raised when the admission queue is full; callers should answer 503 with Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analysis queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AnalysisExecutor:
+    """
+    Runs CPU-bound analysis jobs on a worker pool so the event loop stays responsive.
+
+    At most ``max_concurrency`` jobs run at once; up to ``max_queue`` more wait
+    for a worker. Anything beyond that is rejected immediately rather than
+    queued without bound.
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+            max_queue: int = DEFAULT_MAX_QUEUE,
+            retry_after: int = DEFAULT_RETRY_AFTER_SECONDS
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="rpl-analysis"
+        )
+
+    @property
+    def pending(self) -> int:
+        """Jobs admitted and not yet finished (running + queued)."""
+        return self._pending
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.max_concurrency + self.max_queue:
+            analysis_rejected.inc()
+            logger.warning("analysis_rejected", pending=self._pending, max_queue=self.max_queue)
+            raise AnalysisQueueFullError(self.retry_after)
+
+        self._pending += 1
+        analysis_queue_depth.inc()
+        enqueued_at = time.perf_counter()
+        started = False
+
+        def job() -> T:
+            nonlocal started
+            started = True
+            analysis_queue_depth.dec()
+            analysis_queue_wait.observe(time.perf_counter() - enqueued_at)
+            return fn(*args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self._pending -= 1
+            if not started:
+                # Cancelled while still queued.
+                analysis_queue_depth.dec()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,213 @@
+"""
+Bounded LRU/TTL cache of ``PolicyEngine`` decisions.
+
+A decision depends on the policy version, the subject, action and resource
+and on whatever the conditions of the candidate rules read from the request
+attributes. The key is exactly that: ``(version, subject, action, resource,
+values)``, where ``values`` are the attributes those conditions reference
+(e.g. ``time.hour``). A request whose context differs only in attributes no
+condition reads reuses the cached decision; one that differs in a referenced
+attribute does not. Engines for successive policy versions can share one
+cache: entries of a replaced version are never hit again and age out.
+
+Which attributes matter is only known once the candidate rules have been
+found, so the paths are remembered per ``(version, action, resource)`` and
+the first request for a pair is always evaluated.
+
+Both maps are capped at ``max_entries`` (least recently used out first) and
+every decision expires ``ttl_seconds`` after it was stored. Entries are the
+compact ``Outcome`` of a decision, not the result dicts built from it.
+"""
+import threading
+import time
+from collections import OrderedDict
+from enum import IntEnum
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+from app.analyzer.condition_compiler import ConditionError, attribute_loader, freeze
+from app.api.middlewares.metrics import decision_cache_evictions, decision_cache_hits, decision_cache_misses
+from app.api.utils.config import Config
+
+DEFAULT_DECISION_CACHE_SIZE = 10_000
+DEFAULT_DECISION_CACHE_TTL_SECONDS = 60.0
+
+_MISSING = object()
+
+
+class Outcome(IntEnum):
+    """A decision in compact form: whether access is allowed, and why."""
+    NO_MATCH = 0
+    ALLOW = 1
+    DENY = 2
+    MATRIX_ALLOW = 3
+
+    @property
+    def allowed(self) -> bool:
+        return self is Outcome.ALLOW or self is Outcome.MATRIX_ALLOW
+
+    @property
+    def reason(self) -> str:
+        return _REASONS[self]
+
+
+_REASONS = {
+    Outcome.NO_MATCH: "No matching rules, default deny",
+    Outcome.ALLOW: "Access allowed by ALLOW rule",
+    Outcome.DENY: "Access denied by explicit DENY rule",
+    Outcome.MATRIX_ALLOW: "Access allowed by compiled access matrix",
+}
+
+
+def attribute_values(paths: Sequence[str], attributes: Mapping[str, Any]) -> Optional[Tuple[Hashable, ...]]:
+    """
+    The value of each path as a condition would read it (missing ones as a
+    marker), or None when one of them cannot be part of a key.
+    """
+    values = []
+    for path in paths:
+        try:
+            value = freeze(attribute_loader(path)(attributes))
+        except ConditionError:
+            value = _MISSING
+        try:
+            hash(value)
+        except TypeError:
+            return None
+        values.append(value)
+    return tuple(values)
+
+
+class DecisionCache:
+
+    def __init__(
+            self,
+            max_entries: int = DEFAULT_DECISION_CACHE_SIZE,
+            ttl_seconds: float = DEFAULT_DECISION_CACHE_TTL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._decisions: OrderedDict[Tuple, Tuple[float, Outcome]] = OrderedDict()
+        self._paths: OrderedDict[Tuple[str, str, str], Tuple[str, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls) -> "DecisionCache":
+        """Sized from DECISION_CACHE_MAX_ENTRIES and DECISION_CACHE_TTL_SECONDS."""
+        return cls(
+            int(Config().get("DECISION_CACHE_MAX_ENTRIES", DEFAULT_DECISION_CACHE_SIZE)),
+            float(Config().get("DECISION_CACHE_TTL_SECONDS", DEFAULT_DECISION_CACHE_TTL_SECONDS))
+        )
+
+    def get(
+            self,
+            version: str,
+            subject: str,
+            action: str,
+            resource: str,
+            attributes: Mapping[str, Any]
+    ) -> Optional[Outcome]:
+        with self._lock:
+            key = self._key(version, subject, action, resource, attributes)
+            entry = self._decisions.get(key) if key is not None else None
+
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._decisions[key]
+                self._evicted("expired")
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                decision_cache_misses.inc()
+                return None
+
+            self._decisions.move_to_end(key)
+            self.hits += 1
+            decision_cache_hits.inc()
+            return entry[1]
+
+    def set(
+            self,
+            version: str,
+            subject: str,
+            action: str,
+            resource: str,
+            paths: Tuple[str, ...],
+            attributes: Mapping[str, Any],
+            decision: Outcome
+    ) -> None:
+        """Store ``decision``; ``paths`` are the attributes the candidate rules' conditions read."""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._paths[(version, action, resource)] = paths
+            self._paths.move_to_end((version, action, resource))
+            while len(self._paths) > self.max_entries:
+                self._paths.popitem(last=False)
+
+            key = self._key(version, subject, action, resource, attributes)
+            if key is None:
+                return
+
+            self._decisions[key] = (time.monotonic() + self.ttl_seconds, decision)
+            self._decisions.move_to_end(key)
+            while len(self._decisions) > self.max_entries:
+                self._decisions.popitem(last=False)
+                self._evicted("capacity")
+
+    def _key(
+            self,
+            version: str,
+            subject: str,
+            action: str,
+            resource: str,
+            attributes: Mapping[str, Any]
+    ) -> Optional[Tuple]:
+        paths = self._paths.get((version, action, resource))
+        if paths is None:
+            return None
+        self._paths.move_to_end((version, action, resource))
+        values = attribute_values(paths, attributes)
+        if values is None:
+            return None
+        return version, subject, action, resource, values
+
+    def hottest(self, version: str, limit: int) -> List[Tuple[str, str, str]]:
+        """
+        Up to ``limit`` (subject, action, resource) of ``version``'s most
+        recently used decisions that read no context, so they can be replayed
+        against another version without the original request.
+        """
+        hot: List[Tuple[str, str, str]] = []
+        with self._lock:
+            for key in reversed(self._decisions):
+                if len(hot) >= limit:
+                    break
+                if key[0] == version and key[4] == ():
+                    hot.append(key[1:4])
+        return hot
+
+    def _evicted(self, reason: str) -> None:
+        self.evictions += 1
+        decision_cache_evictions.labels(reason=reason).inc()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._decisions),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._decisions.clear()
+            self._paths.clear()
+
+    def __len__(self) -> int:
+        return len(self._decisions)
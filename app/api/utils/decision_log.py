@@ -0,0 +1,187 @@
+"""
+Sampled decision log, written off the hot path.
+
+``PolicyEngine`` used to emit two structlog events per check; formatting and
+writing them cost more than the decision. Now a check only calls
+``DecisionLog.record``: one ``random()`` for the sampling decision and, if
+sampled, a tuple appended to a bounded ring buffer (``deque(maxlen=...)``,
+whose appends are atomic). A daemon writer thread drains the buffer every
+``flush_seconds`` (or as soon as ``batch_size`` events are waiting) and hands
+each batch to a sink:
+
+    log     one ``access_decisions`` structlog event per batch
+    audit   rows in the ``decision_audit`` table
+
+Denies can be logged regardless of the sample rate. When the writer falls
+behind, the oldest unwritten events are overwritten and counted in
+``decision_log_dropped_total``; checks never wait for the log.
+"""
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+from sqlmodel import Session
+
+from app.api.middlewares.metrics import decision_log_dropped, decision_log_written
+from app.api.utils.config import Config
+from app.api.utils.decision_cache import Outcome
+from app.models.decision_audit import DecisionAudit
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_CAPACITY = 10_000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_SECONDS = 1.0
+
+Event = Dict[str, Any]
+Sink = Callable[[List[Event]], None]
+
+
+class DecisionLogSink(str, Enum):
+    LOG = "log"
+    AUDIT = "audit"
+
+
+def log_sink(events: List[Event]) -> None:
+    decisions = [{**event, "decided_at": event["decided_at"].isoformat()} for event in events]
+    logger.info("access_decisions", count=len(decisions), decisions=decisions)
+
+
+def audit_table_sink(events: List[Event]) -> None:
+    # Imported here: the database engine needs DATABASE_URL, which tests and tools may not set.
+    from app.api.database.database import engine
+
+    # Its own session: the shared request session is not safe to use from the writer thread.
+    with Session(engine) as session:
+        session.add_all(DecisionAudit(**event) for event in events)
+        session.commit()
+
+
+SINKS: Dict[DecisionLogSink, Sink] = {
+    DecisionLogSink.LOG: log_sink,
+    DecisionLogSink.AUDIT: audit_table_sink,
+}
+
+
+class DecisionLog:
+
+    def __init__(
+            self,
+            sink: Sink = log_sink,
+            sample_rate: float = DEFAULT_SAMPLE_RATE,
+            log_denies: bool = True,
+            capacity: int = DEFAULT_CAPACITY,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            flush_seconds: float = DEFAULT_FLUSH_SECONDS
+    ):
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.log_denies = log_denies
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._buffer: deque = deque(maxlen=capacity)
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        # Serializes draining between the writer and flush().
+        self._drain_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "DecisionLog":
+        return cls(
+            SINKS[DecisionLogSink(Config().get("DECISION_LOG_SINK", DecisionLogSink.LOG.value))],
+            float(Config().get("DECISION_LOG_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)),
+            str(Config().get("DECISION_LOG_DENIES", "true")).lower() in ("1", "true", "yes"),
+            int(Config().get("DECISION_LOG_CAPACITY", DEFAULT_CAPACITY)),
+            int(Config().get("DECISION_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            float(Config().get("DECISION_LOG_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS))
+        )
+
+    def record(
+            self,
+            subject: str,
+            action: str,
+            resource: str,
+            outcome: Outcome,
+            version: str = "",
+            cached: bool = False
+    ) -> None:
+        """Queue the decision if it is sampled; never blocks and never formats anything."""
+        if not (self.log_denies and not outcome.allowed) and random.random() >= self.sample_rate:
+            return
+
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            decision_log_dropped.inc()
+        buffer.append((time.time(), subject, action, resource, outcome, version, cached))
+
+        if len(buffer) >= self.batch_size:
+            self._wake.set()
+
+    def start(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        self._stopping.clear()
+        self._writer = threading.Thread(target=self._run, name="rpl-decision-log", daemon=True)
+        self._writer.start()
+
+    def stop(self) -> None:
+        """Stop the writer and write whatever is still buffered."""
+        self._stopping.set()
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Write every buffered event now, in batches; returns how many were written."""
+        written = 0
+        with self._drain_lock:
+            while self._buffer:
+                batch = self._take()
+                try:
+                    self.sink(batch)
+                except Exception as e:
+                    # The log is best effort; losing a batch must not take the writer down.
+                    logger.error("decision_log_write_failed", events=len(batch), error=str(e))
+                    decision_log_dropped.inc(len(batch))
+                    continue
+                decision_log_written.inc(len(batch))
+                written += len(batch)
+        return written
+
+    def _take(self) -> List[Event]:
+        batch: List[Event] = []
+        buffer = self._buffer
+        while buffer and len(batch) < self.batch_size:
+            at, subject, action, resource, outcome, version, cached = buffer.popleft()
+            batch.append({
+                "decided_at": datetime.fromtimestamp(at, tz=timezone.utc),
+                "subject": subject,
+                "action": action,
+                "resource": resource,
+                "allowed": outcome.allowed,
+                "reason": outcome.reason,
+                "policy_version": version,
+                "cached": cached,
+            })
+        return batch
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+
+decision_log = DecisionLog.from_config()
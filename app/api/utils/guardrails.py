@@ -0,0 +1,129 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.api.utils.config import Config
+from app.models.error_response import ErrorResponse, MarkerSeverity
+
+DEFAULT_MAX_SOURCE_BYTES = 1_000_000
+DEFAULT_MAX_TOKENS = 250_000
+DEFAULT_PARSE_DEADLINE_SECONDS = 10.0
+DEFAULT_MAX_DIAGNOSTICS = 100
+
+
+class AnalysisLimitError(Exception):
+    """A request exceeded one of the per-analysis limits; carries which one and by how much."""
+
+    def __init__(self, limit: str, maximum: Any, actual: Any = None):
+        detail = f"{actual} > {maximum}" if actual is not None else f"limit {maximum}"
+        super().__init__(f"Analysis limit exceeded: {limit} ({detail})")
+        self.limit = limit
+        self.maximum = maximum
+        self.actual = actual
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "error": "analysis_limit_exceeded",
+            "limit": self.limit,
+            "maximum": self.maximum,
+            "actual": self.actual,
+            "message": str(self),
+        }
+
+
+@dataclass(frozen=True)
+class AnalysisLimits:
+    """Bounds on the work and memory one analysis may use; ``None`` disables a limit."""
+    max_source_bytes: Optional[int] = DEFAULT_MAX_SOURCE_BYTES
+    max_tokens: Optional[int] = DEFAULT_MAX_TOKENS
+    parse_deadline_seconds: Optional[float] = DEFAULT_PARSE_DEADLINE_SECONDS
+    max_diagnostics: Optional[int] = DEFAULT_MAX_DIAGNOSTICS
+
+    @classmethod
+    def from_config(cls) -> "AnalysisLimits":
+        def setting(key: str, default, cast):
+            value = cast(Config().get(key, default))
+            return value if value > 0 else None
+
+        return cls(
+            max_source_bytes=setting("RPL_MAX_SOURCE_BYTES", DEFAULT_MAX_SOURCE_BYTES, int),
+            max_tokens=setting("RPL_MAX_TOKENS", DEFAULT_MAX_TOKENS, int),
+            parse_deadline_seconds=setting("RPL_PARSE_DEADLINE_SECONDS", DEFAULT_PARSE_DEADLINE_SECONDS, float),
+            max_diagnostics=setting("RPL_MAX_DIAGNOSTICS", DEFAULT_MAX_DIAGNOSTICS, int),
+        )
+
+    def check_source(self, rpl_code: str) -> None:
+        if self.max_source_bytes is None or len(rpl_code) * 4 <= self.max_source_bytes:
+            return
+        size = len(rpl_code.encode("utf-8"))
+        if size > self.max_source_bytes:
+            raise AnalysisLimitError("max_source_bytes", self.max_source_bytes, size)
+
+    def check_tokens(self, token_count: int) -> None:
+        if self.max_tokens is not None and token_count > self.max_tokens:
+            raise AnalysisLimitError("max_tokens", self.max_tokens, token_count)
+
+
+UNLIMITED = AnalysisLimits(None, None, None, None)
+
+
+class ParseDeadline:
+    """
+    Wall-clock budget checked from inside the parse loop (see ``tick``); the
+    clock is only read every few calls to keep the hot path cheap.
+    """
+    CHECK_INTERVAL = 32
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+        self._ticks = 0
+
+    def tick(self) -> None:
+        self._ticks += 1
+        if self._ticks % self.CHECK_INTERVAL == 0 and time.monotonic() > self.expires:
+            raise AnalysisLimitError("parse_deadline_seconds", self.seconds)
+
+
+@dataclass
+class DiagnosticsSummary(ErrorResponse):
+    """Stands in for ``hidden`` diagnostics that were cut by ``cap_diagnostics``."""
+    hidden: int = 0
+
+
+def cap_diagnostics(
+        diagnostics: List[Any],
+        maximum: Optional[int],
+        dropped: int = 0,
+        kind: str = "error"
+) -> List[Any]:
+    """
+    Keep at most ``maximum`` diagnostics; the rest, plus ``dropped`` ones a
+    collector already discarded and any earlier summaries, are folded into a
+    single "N more errors" entry. Safe to apply again to merged lists.
+    """
+    if maximum is None:
+        return diagnostics
+
+    hidden = dropped
+    entries = []
+    for diagnostic in diagnostics:
+        if isinstance(diagnostic, DiagnosticsSummary):
+            hidden += diagnostic.hidden
+        else:
+            entries.append(diagnostic)
+
+    hidden += max(len(entries) - maximum, 0)
+    if not hidden:
+        return entries
+
+    kept = entries[:maximum]
+    last = kept[-1] if kept else None
+    kept.append(DiagnosticsSummary(
+        message=f"{hidden} more {kind}{'s' if hidden != 1 else ''}",
+        line_number=getattr(last, "line_number", 0),
+        column_number=getattr(last, "column_number", 0),
+        error_code=MarkerSeverity.Warning if kind == "warning" else MarkerSeverity.Error,
+        hidden=hidden,
+    ))
+    return kept
@@ -0,0 +1,444 @@
+import bisect
+import itertools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import structlog
+from antlr4 import CommonTokenStream
+from antlr4.Token import CommonToken, Token
+
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.semantic_analyzer import DeclarationCache
+from app.api.utils.guardrails import UNLIMITED, AnalysisLimits
+from app.api.utils.rpl_analyzer import ParseMode, parse_token_stream
+from app.models.error_response import ErrorResponse
+from parsing.RPLLexer import RPLLexer
+from parsing.RPLParser import RPLParser
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_MAX_DOCUMENTS = 64
+
+
+@dataclass
+class TextEdit:
+    """Replace ``text[start:end]`` (character offsets in the current document) with ``text``."""
+    start: int
+    end: int
+    text: str
+
+
+class _Anchor:
+    """The first line of a chunk; its tokens store their lines relative to it."""
+    __slots__ = ("line",)
+
+    def __init__(self, line: int):
+        self.line = line
+
+
+class _AnchoredToken(CommonToken):
+    """
+    A lexed token whose line is an offset from its chunk's anchor, so moving a
+    chunk to another line is one assignment instead of a rewrite of every token.
+    """
+
+    @classmethod
+    def anchor_all(cls, tokens: List[Token], anchor: _Anchor) -> None:
+        for token in tokens:
+            line = token.line
+            if token.__class__ is not cls:
+                token.__class__ = cls
+            token.anchor = anchor
+            token.line_offset = line - anchor.line
+
+    @property
+    def line(self) -> int:
+        return self.anchor.line + self.line_offset
+
+    @line.setter
+    def line(self, value: int) -> None:
+        self.line_offset = value - self.anchor.line
+
+
+@dataclass
+class _Chunk:
+    """
+    A slice of the document parsed as a unit.
+
+    Chunks tile the whole document: each clean chunk holds exactly one
+    top-level statement plus the whitespace/comments that follow it. A chunk
+    whose region failed to parse keeps its syntax errors and no statements;
+    it is re-parsed together with the next edit that touches or borders it.
+
+    Only sizes are stored for good: ``length`` and ``newlines``. ``start``,
+    ``anchor.line`` and ``statement_index`` are derived from the chunks
+    before it and are current only once the document has resolved them.
+    """
+    length: int
+    newlines: int
+    column: int
+    anchor: _Anchor
+    start: int = 0
+    statement_index: int = 0
+    statements: List[RPLParser.StatementContext] = field(default_factory=list)
+    tokens: List[Token] = field(default_factory=list)
+    # Tokens in ``tokens`` other than EOF; their sum is the document's token count.
+    token_count: int = 0
+    errors: List[ErrorResponse] = field(default_factory=list)
+    # The line ``errors`` were reported against.
+    errors_line: int = 0
+
+    @property
+    def broken(self) -> bool:
+        return bool(self.errors)
+
+    @property
+    def line(self) -> int:
+        return self.anchor.line
+
+    @property
+    def end(self) -> int:
+        return self.start + self.length
+
+    def move_to(self, start: int, line: int, statement_index: int) -> None:
+        self.start = start
+        self.anchor.line = line
+        self.statement_index = statement_index
+        if self.errors and self.errors_line != line:
+            for error in self.errors:
+                error.line_number += line - self.errors_line
+            self.errors_line = line
+
+
+def _chunk_start(chunk: _Chunk) -> int:
+    return chunk.start
+
+
+def _opens_block_comment(tokens: List[Token]) -> bool:
+    """
+    Whether the lexed text holds a ``/*`` that is not closed within it. Both
+    lexers fall back to DIV STAR for an unterminated opener, and never produce
+    that adjacent pair otherwise: a closed comment is skipped and a ``/*``
+    inside a string literal is part of the STRING token.
+    """
+    for previous, token in itertools.pairwise(tokens):
+        if previous.type == RPLLexer.DIV and token.type == RPLLexer.STAR and token.start == previous.stop + 1:
+            return True
+    return False
+
+
+class IncrementalDocument:
+    """
+    Keeps the token stream and per-statement subtrees of one policy document.
+
+    ``apply_edit`` re-lexes and re-parses only the top-level statements an
+    edit touches and splices them, and their subtrees, back in. The chunks
+    after the edit are not touched at all: their positions are re-derived
+    lazily, as far as a later edit or ``program()`` needs them.
+
+    ``limits`` apply as in a full compile: the document size and token count
+    are checked before anything is parsed, lexing keeps at most
+    ``max_diagnostics`` errors, and each re-parse gets the parse deadline.
+    Breaking a limit raises ``AnalysisLimitError``; the size check happens
+    before a batch of edits is applied, but a token or deadline failure can
+    leave the document half-edited, so callers should discard it.
+    """
+
+    def __init__(self, text: str, mode: ParseMode = ParseMode.TWO_STAGE, limits: AnalysisLimits = UNLIMITED):
+        limits.check_source(text)
+        self.text = text
+        self.mode = mode
+        self.limits = limits
+        self.last_reparsed = 0
+        self.token_count = 0
+        # Edits and reads of one document are serialized across analysis workers.
+        self.lock = threading.Lock()
+        self.chunks: List[_Chunk] = self._parse_region(0, len(text), 1, 0)
+        self.token_count = sum(chunk.token_count for chunk in self.chunks)
+        # Leading chunks whose start, line and statement index are current.
+        self._resolved = 0
+        self._resolve(len(self.chunks) - 1)
+
+        # One program context for the document; edits splice its children.
+        self._program = RPLParser.ProgramContext(None)
+        self._program.children = []
+        self._splice_statements(0, 0, [statement for chunk in self.chunks for statement in chunk.statements])
+
+        # Semantic declarations of the statements, reused by the next analysis.
+        self.declarations = DeclarationCache()
+
+    # -------------------------------
+    # PARSING
+    # -------------------------------
+
+    def _lex_region(self, start: int, end: int, line: int, column: int) -> Tuple[CommonTokenStream, List[ErrorResponse]]:
+        return tokenize(self.text[start:end], line, column, self.limits.max_diagnostics)
+
+    def _parse_region(
+            self,
+            start: int,
+            end: int,
+            line: int,
+            column: int,
+            other_tokens: int = 0,
+            lexed: Optional[Tuple[CommonTokenStream, List[ErrorResponse]]] = None
+    ) -> List[_Chunk]:
+        """
+        Lex (unless ``lexed`` already holds the result) and parse ``self.text[start:end]``,
+        positioned at ``line:column``. ``other_tokens`` is the token count of the rest of
+        the document, for the token limit.
+        """
+        token_stream, lex_errors = lexed or self._lex_region(start, end, line, column)
+        # Every token but EOF; checked before the (much dearer) parse.
+        region_tokens = len(token_stream.tokens) - 1
+        self.limits.check_tokens(other_tokens + region_tokens)
+        tree, parse_errors = parse_token_stream(token_stream, self.mode, self.limits)
+
+        errors = lex_errors + parse_errors
+        statements = tree.statement()
+        self.last_reparsed += len(statements)
+
+        if errors or not statements:
+            anchor = _Anchor(line)
+            _AnchoredToken.anchor_all(token_stream.tokens, anchor)
+            return [_Chunk(
+                end - start,
+                self.text.count("\n", start, end),
+                column,
+                anchor,
+                start=start,
+                tokens=list(token_stream.tokens),
+                token_count=region_tokens,
+                errors=errors,
+                errors_line=line,
+            )]
+
+        chunks = []
+        for index, statement in enumerate(statements):
+            if index + 1 < len(statements):
+                next_start = statements[index + 1].start
+                chunk_end = start + next_start.start
+                last_token = next_start.tokenIndex
+            else:
+                chunk_end = end
+                # The last chunk also holds the region's EOF.
+                last_token = len(token_stream.tokens)
+
+            if index == 0:
+                chunk_start, chunk_line, chunk_column, first_token = start, line, column, 0
+            else:
+                chunk_start = start + statement.start.start
+                chunk_line, chunk_column = statement.start.line, statement.start.column
+                first_token = statement.start.tokenIndex
+
+            anchor = _Anchor(chunk_line)
+            tokens = token_stream.tokens[first_token:last_token]
+            _AnchoredToken.anchor_all(tokens, anchor)
+
+            chunks.append(_Chunk(
+                chunk_end - chunk_start,
+                self.text.count("\n", chunk_start, chunk_end),
+                chunk_column,
+                anchor,
+                start=chunk_start,
+                statements=[statement],
+                tokens=tokens,
+                token_count=len(tokens) - (1 if index + 1 == len(statements) else 0),
+            ))
+
+        return chunks
+
+    # -------------------------------
+    # POSITIONS
+    # -------------------------------
+
+    def _resolve(self, index: int) -> None:
+        """Make the positions of chunks ``0..index`` current."""
+        while self._resolved <= index:
+            chunk = self.chunks[self._resolved]
+            if self._resolved == 0:
+                chunk.move_to(0, 1, 0)
+            else:
+                previous = self.chunks[self._resolved - 1]
+                chunk.move_to(
+                    previous.end,
+                    previous.line + previous.newlines,
+                    previous.statement_index + len(previous.statements)
+                )
+            self._resolved += 1
+
+    def _chunk_at(self, offset: int) -> int:
+        """Index of the chunk containing ``offset`` (the last chunk for end-of-document)."""
+        # Resolve only as far as the offset; resolved chunks are found by bisection.
+        while self._resolved < len(self.chunks) and (
+                self._resolved == 0 or self.chunks[self._resolved - 1].end <= offset):
+            self._resolve(self._resolved)
+        index = bisect.bisect_right(self.chunks, offset, 0, self._resolved, key=_chunk_start) - 1
+        return max(0, min(index, len(self.chunks) - 1))
+
+    # -------------------------------
+    # EDITING
+    # -------------------------------
+
+    def apply_edits(self, edits: Sequence[TextEdit]) -> None:
+        """
+        Apply edits in order, each against the text the previous ones produced.
+        All ranges, and the size of the resulting text, are checked first, so a
+        bad edit or an oversized result leaves the document unchanged.
+        """
+        text = self.text
+        for edit in edits:
+            self._check_range(edit, len(text))
+            text = text[:edit.start] + edit.text + text[edit.end:]
+        self.limits.check_source(text)
+
+        for edit in edits:
+            self.apply_edit(edit)
+
+    @staticmethod
+    def _check_range(edit: TextEdit, length: int) -> None:
+        if not 0 <= edit.start <= edit.end <= length:
+            raise ValueError(f"Edit range {edit.start}-{edit.end} outside document of length {length}")
+
+    def apply_edit(self, edit: TextEdit) -> None:
+        """Apply a single text edit, re-parsing only the affected statements."""
+        self._check_range(edit, len(self.text))
+
+        first = self._chunk_at(edit.start)
+        last = self._chunk_at(edit.end)
+
+        # An insertion at a chunk boundary may extend the preceding statement.
+        if first > 0 and edit.start == self.chunks[first].start:
+            first -= 1
+
+        # Broken neighbours are re-parsed together with the edit.
+        if first > 0 and self.chunks[first - 1].broken:
+            first -= 1
+        if last + 1 < len(self.chunks) and self.chunks[last + 1].broken:
+            last += 1
+
+        # Later chunks keep their columns when they move, so they must start on a fresh line.
+        while last + 1 < len(self.chunks) and self.chunks[last + 1].column != 0:
+            last += 1
+
+        offset_delta = len(edit.text) - (edit.end - edit.start)
+        self.text = self.text[:edit.start] + edit.text + self.text[edit.end:]
+
+        self._resolve(last)
+        region_start = self.chunks[first].start
+        lexed = self._lex_region(
+            region_start, self.chunks[last].end + offset_delta, self.chunks[first].line, self.chunks[first].column
+        )
+        # An unterminated block comment can swallow every statement after it.
+        if last + 1 < len(self.chunks) and _opens_block_comment(lexed[0].tokens):
+            last = len(self.chunks) - 1
+            self._resolve(last)
+            lexed = None
+        old_region_end = self.chunks[last].end
+
+        self.last_reparsed = 0
+        old_tokens = sum(chunk.token_count for chunk in self.chunks[first:last + 1])
+        new_chunks = self._parse_region(
+            region_start,
+            old_region_end + offset_delta,
+            self.chunks[first].line,
+            self.chunks[first].column,
+            self.token_count - old_tokens,
+            lexed
+        )
+        self.token_count += sum(chunk.token_count for chunk in new_chunks) - old_tokens
+
+        old_statements = sum(len(chunk.statements) for chunk in self.chunks[first:last + 1])
+        statement_index = self.chunks[first].statement_index
+        for chunk in new_chunks:
+            chunk.statement_index = statement_index
+            statement_index += len(chunk.statements)
+
+        self._splice_statements(
+            self.chunks[first].statement_index,
+            old_statements,
+            [statement for chunk in new_chunks for statement in chunk.statements]
+        )
+        self.chunks[first:last + 1] = new_chunks
+        # The new chunks were parsed in place; everything after them has moved.
+        self._resolved = first + len(new_chunks)
+
+        logger.debug(
+            "incremental_reparse",
+            region_start=region_start,
+            region_length=old_region_end + offset_delta - region_start,
+            reparsed_statements=self.last_reparsed,
+            statements=len(self.chunks)
+        )
+
+    def _splice_statements(self, index: int, count: int, statements: List[RPLParser.StatementContext]) -> None:
+        program = self._program
+        for statement in statements:
+            statement.parentCtx = program
+        program.children[index:index + count] = statements
+        if program.children:
+            program.start = program.children[0].start
+            program.stop = program.children[-1].stop
+        else:
+            program.start = program.stop = None
+
+    # -------------------------------
+    # RESULTS
+    # -------------------------------
+
+    @property
+    def errors(self) -> List[ErrorResponse]:
+        self._resolve(len(self.chunks) - 1)
+        return [error for chunk in self.chunks for error in chunk.errors]
+
+    @property
+    def statement_count(self) -> int:
+        return len(self._program.children)
+
+    def program(self) -> RPLParser.ProgramContext:
+        """The ``program`` context holding every cached statement subtree, with current positions."""
+        self._resolve(len(self.chunks) - 1)
+        return self._program
+
+
+class DocumentStore:
+    """Bounded LRU of open incremental documents, keyed by client document id."""
+
+    def __init__(self, max_documents: int = DEFAULT_MAX_DOCUMENTS):
+        self.max_documents = max_documents
+        self._documents: OrderedDict[str, IncrementalDocument] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(
+            self,
+            document_id: str,
+            text: str,
+            mode: ParseMode = ParseMode.TWO_STAGE,
+            limits: AnalysisLimits = UNLIMITED
+    ) -> IncrementalDocument:
+        document = IncrementalDocument(text, mode, limits)
+
+        with self._lock:
+            self._documents[document_id] = document
+            self._documents.move_to_end(document_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+        return document
+
+    def get(self, document_id: str) -> Optional[IncrementalDocument]:
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is not None:
+                self._documents.move_to_end(document_id)
+            return document
+
+    def close(self, document_id: str) -> None:
+        with self._lock:
+            self._documents.pop(document_id, None)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
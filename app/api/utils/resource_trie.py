@@ -0,0 +1,137 @@
+"""
+Segment trie over resource patterns.
+
+Resource references are dotted (``api.users.*``) or path-style
+(``/files/123/*``). Patterns are split into segments with the separators
+kept, so ``a.b`` and ``a/b`` stay distinct, and a lookup walks the resource's
+segments once instead of testing every pattern:
+
+    exact            api.users.list      only that resource
+    single segment   api.*.list          ``*`` as a whole inner segment matches one segment
+    trailing         api.users.*         ``*`` as the last segment matches everything below
+    everything       *
+
+Patterns with ``*`` inside a segment (``db.t*``, ``/docs/report-*``) cannot be
+walked and fall back to a regex, compiled once when the pattern is added. The
+regex is filed under the literal segments before it and the segment's text
+before the ``*`` (``db`` ``.`` then ``t``), so a lookup only tries the regexes
+whose literal prefix the resource actually has.
+"""
+import re
+from typing import Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+WILDCARD = "*"
+
+_SEPARATORS = re.compile(r"([./])")
+_SEPARATOR_SEGMENTS = frozenset((".", "/"))
+
+
+def split_segments(resource: str) -> List[str]:
+    """``"/a/b.c"`` -> ``["", "/", "a", "/", "b", ".", "c"]``; separators are segments too."""
+    return _SEPARATORS.split(resource)
+
+
+def wildcard_regex(pattern: str) -> "re.Pattern[str]":
+    """``*`` matches any run of characters; everything else is literal."""
+    return re.compile(".*".join(re.escape(part) for part in pattern.split(WILDCARD)) + r"\Z", re.DOTALL)
+
+
+class _Node:
+    __slots__ = ("children", "star", "exact", "below", "partial")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.star: Optional["_Node"] = None
+        self.exact: List = []
+        self.below: List = []
+        self.partial: Dict[str, List] = {}
+
+
+class ResourceTrie(Generic[V]):
+    """Maps resource patterns to values (e.g. rule indices) and finds every value whose pattern matches."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, V]] = ()):
+        self._root = _Node()
+        self._fallback: List[Tuple["re.Pattern[str]", V]] = []
+        self._size = 0
+
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pattern: str, value: V) -> None:
+        self._size += 1
+        segments = split_segments(pattern)
+
+        partial = next((i for i, segment in enumerate(segments) if WILDCARD in segment and segment != WILDCARD), None)
+        if partial is not None:
+            entry = (wildcard_regex(pattern), value)
+            if WILDCARD in segments[:partial]:
+                # An earlier whole-segment '*' spans separators in the regex: no literal prefix to file it under.
+                self._fallback.append(entry)
+                return
+            node = self._root
+            for segment in segments[:partial]:
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = _Node()
+                node = child
+            node.partial.setdefault(segments[partial].split(WILDCARD, 1)[0], []).append(entry)
+            return
+
+        node = self._root
+        last = len(segments) - 1
+        for position, segment in enumerate(segments):
+            if segment == WILDCARD:
+                if position == last:
+                    node.below.append(value)
+                    return
+                if node.star is None:
+                    node.star = _Node()
+                node = node.star
+            else:
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = _Node()
+                node = child
+        node.exact.append(value)
+
+    def match(self, resource: str) -> List[V]:
+        """Values of every pattern matching ``resource``, in no particular order."""
+        segments = split_segments(resource)
+        found: List[V] = []
+        depth = len(segments)
+
+        # Depth-first over (node, next segment); only single-segment wildcards branch.
+        pending = [(self._root, 0)]
+        while pending:
+            node, position = pending.pop()
+            if position == depth:
+                found.extend(node.exact)
+                continue
+
+            # A trailing wildcard covers at least one more segment.
+            found.extend(node.below)
+
+            if node.partial:
+                segment = segments[position]
+                for end in range(len(segment) + 1):
+                    for regex, value in node.partial.get(segment[:end], ()):
+                        if regex.match(resource):
+                            found.append(value)
+
+            child = node.children.get(segments[position])
+            if child is not None:
+                pending.append((child, position + 1))
+            if node.star is not None and segments[position] not in _SEPARATOR_SEGMENTS:
+                pending.append((node.star, position + 1))
+
+        for regex, value in self._fallback:
+            if regex.match(resource):
+                found.append(value)
+
+        return found
@@ -1,67 +1,630 @@
+import os
+import re
+import time
 import asyncio
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 import structlog
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Mapping, Optional
+from enum import Enum
 from antlr4 import InputStream, CommonTokenStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from antlr4.tree.Trees import Trees
+from app.analyzer.fast_lexer import tokenize
 from app.analyzer.llm_analyzer import LLMAnalyzer
-from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.analyzer.policy_ir import RoleIR
+from app.analyzer.semantic_analyzer import DeclarationCache, SemanticAnalyzer
+from app.api.services.roles_service import RoleCatalog, role_catalog
+from app.api.middlewares.metrics import cache_hits, cache_misses, parser_warmup_duration
+from app.api.utils.admission import (
+    AnalysisExecutor,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_QUEUE,
+    DEFAULT_RETRY_AFTER_SECONDS,
+)
+from app.api.utils.config import Config
+from app.api.utils.guardrails import (
+    UNLIMITED,
+    AnalysisLimitError,
+    AnalysisLimits,
+    ParseDeadline,
+    cap_diagnostics,
+)
 from app.errors.error_handler import RPLErrorListener
+from app.models.error_response import ErrorResponse
 from app.models.llm_result import Finding
+from app.models.role import Role
+from parsing import RPLLexer as lexer_module, RPLParser as parser_module
 from parsing.RPLLexer import RPLLexer
 from parsing.RPLParser import RPLParser
 
 logger = structlog.get_logger(__name__)
 
+# Bump whenever the analyzer changes in a way that alters results for the same source.
+ANALYZER_VERSION = "2"
+
+# Fingerprint of the generated lexer/parser, so regenerating the grammar invalidates cached results.
+GRAMMAR_VERSION = hashlib.sha256(
+    repr((lexer_module.serializedATN(), parser_module.serializedATN())).encode("utf-8")
+).hexdigest()[:16]
+
+DEFAULT_COMPILE_CACHE_SIZE = 256
+DEFAULT_DEBUG_TREE_MAX_CHARS = 64_000
+DEFAULT_BATCH_MAX_FILES = 64
+
+TRUNCATION_MARKER = " ...[truncated]"
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# Between them these files exercise every parser rule and token type.
+DEFAULT_WARMUP_CORPUS = (
+    PROJECT_ROOT / "parser" / "main_test.rpl",
+    PROJECT_ROOT / "parser" / "warmup.rpl",
+)
+
+
+def _tree_pieces(tree) -> Iterator[str]:
+    """
+    Yield the LISP-style rendering of a parse tree piece by piece, in the same
+    format as ``Trees.toStringTree``. Iterative, so deep trees cannot overflow the stack.
+    """
+    stack: List[Any] = [tree]
+
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            yield node
+            continue
+
+        text = Trees.getNodeText(node, RPLParser.ruleNames)
+        text = text.replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+        if node.getChildCount() == 0:
+            yield text
+            continue
+
+        yield "(" + text + " "
+        stack.append(")")
+        for index in range(node.getChildCount() - 1, -1, -1):
+            stack.append(node.getChild(index))
+            if index > 0:
+                stack.append(" ")
+
+
+def render_parse_tree(tree, max_chars: int = DEFAULT_DEBUG_TREE_MAX_CHARS) -> str:
+    """Render a parse tree for debugging, stopping as soon as ``max_chars`` is reached."""
+    pieces: List[str] = []
+    length = 0
+
+    for piece in _tree_pieces(tree):
+        if length + len(piece) > max_chars:
+            pieces.append(piece[:max_chars - length])
+            pieces.append(TRUNCATION_MARKER)
+            break
+
+        pieces.append(piece)
+        length += len(piece)
+
+    return "".join(pieces)
+
+
+class ParseMode(str, Enum):
+    """ANTLR prediction strategy used by the syntax analysis stage."""
+    # SLL prediction with a bail-out error strategy, falling back to full LL on failure.
+    TWO_STAGE = "two_stage"
+    # Full LL prediction only (the ANTLR default).
+    LL = "ll"
+
+
+_TRAILING_WHITESPACE = re.compile(r"[ \t]+(?=\n|$)")
+
+
+def normalize_source(rpl_code: str) -> str:
+    """
+    Normalize source text for cache keying.
+    Only line endings and trailing whitespace are touched, so line/column
+    positions of every token are unchanged.
+    """
+    normalized = rpl_code.replace("\r\n", "\n")
+    return _TRAILING_WHITESPACE.sub("", normalized).rstrip("\n")
+
+
+def compile_cache_key(rpl_code: str, catalog_version: str = "") -> str:
+    """
+    Content address of a source text for the current grammar/analyzer version
+    and persisted role catalog (declarations resolve against it).
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{GRAMMAR_VERSION}:{ANALYZER_VERSION}:{catalog_version}:".encode("utf-8"))
+    digest.update(normalize_source(rpl_code).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DeadlineParser(RPLParser):
+    """``RPLParser`` that spends its deadline budget on every rule entry."""
+
+    def __init__(self, token_stream: CommonTokenStream, deadline: ParseDeadline):
+        super().__init__(token_stream)
+        self.deadline = deadline
+
+    def enterRule(self, localctx, state: int, ruleIndex: int):
+        self.deadline.tick()
+        super().enterRule(localctx, state, ruleIndex)
+
+
+def parse_token_stream(
+        token_stream: CommonTokenStream,
+        mode: ParseMode = ParseMode.TWO_STAGE,
+        limits: AnalysisLimits = UNLIMITED
+) -> tuple:
+    """
+    Parse a token stream into a ``program`` tree, returning ``(tree, errors)``.
+    Raises ``AnalysisLimitError`` when the parse outlives ``limits.parse_deadline_seconds``.
+    """
+    if limits.parse_deadline_seconds is not None:
+        # One budget for both stages.
+        parser = DeadlineParser(token_stream, ParseDeadline(limits.parse_deadline_seconds))
+    else:
+        parser = RPLParser(token_stream)
+    error_listener = RPLErrorListener(limits.max_diagnostics)
+    parser.removeErrorListeners()
+
+    tree = None
+    if mode == ParseMode.TWO_STAGE:
+        # Stage 1: SLL prediction, bail out on the first syntax error.
+        parser._interp.predictionMode = PredictionMode.SLL
+        parser._errHandler = BailErrorStrategy()
+
+        try:
+            tree = parser.program()
+        except ParseCancellationException:
+            # Stage 2: either real syntax errors or an SLL conflict; re-parse with full LL.
+            logger.debug("sll_parse_failed_retrying_ll")
+            token_stream.seek(0)
+            parser.reset()
+            tree = None
+
+    if tree is None:
+        parser.addErrorListener(error_listener)
+        parser._errHandler = DefaultErrorStrategy()
+        parser._interp.predictionMode = PredictionMode.LL
+
+        tree = parser.program()
+
+    return tree, cap_diagnostics(error_listener.errors, limits.max_diagnostics, error_listener.dropped)
+
+
+def warm_up_parser(corpus: Optional[List[Path]] = None) -> Dict[str, Any]:
+    """
+    Lex and parse a bundled corpus in every parse mode, so the lexer and parser
+    DFA caches (shared class-level state) are built before the first request.
+    No semantic pass: warm-up must not touch the database.
+    """
+    started = time.perf_counter()
+    files = statements = 0
+
+    for path in corpus or DEFAULT_WARMUP_CORPUS:
+        try:
+            source = Path(path).read_text(encoding="utf-8")
+        except OSError as e:
+            logger.warning("parser_warmup_file_unreadable", path=str(path), error=str(e))
+            continue
+
+        for mode in ParseMode:
+            lexer = RPLLexer(InputStream(source))
+            lexer.removeErrorListeners()
+            token_stream = CommonTokenStream(lexer)
+            token_stream.fill()
+
+            tree, errors = parse_token_stream(token_stream, mode)
+            if errors:
+                logger.warning("parser_warmup_file_invalid", path=str(path), errors=len(errors))
+
+        files += 1
+        statements += len(tree.statement())
+
+    elapsed = time.perf_counter() - started
+    parser_warmup_duration.set(elapsed)
+
+    logger.info("parser_warmup_completed", files=files, statements=statements, elapsed_seconds=round(elapsed, 6))
+    return {"files": files, "statements": statements, "elapsed_seconds": round(elapsed, 6)}
+
+
+class CompileCache:
+    """
+    Bounded LRU cache of lex/parse/semantic results keyed by source content.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_COMPILE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                cache_misses.inc()
+                return None
+
+            self._entries.move_to_end(key)
+            cache_hits.inc()
+            return result
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        logger.info("compile_cache_cleared")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+SYMBOL_KINDS = ("roles", "users", "resources", "groups")
+
+
+def summarize_symbol_table(symbol_table: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Plain-data view of a symbol table, safe to pickle across processes.
+    Roles that are already persisted (loaded from the database) are left out.
+    """
+    summary: Dict[str, Dict[str, Any]] = {kind: {} for kind in SYMBOL_KINDS}
+
+    for name, role in symbol_table.get("roles", {}).items():
+        if not isinstance(role, RoleIR):
+            continue
+        summary["roles"][name] = {
+            "parent_role": role.parent_role.name if role.parent_role else None,
+            "permissions": [
+                {"actions": list(p.actions), "resources": list(p.resources), "conditions": p.conditions}
+                for p in role.permissions
+            ],
+            "line_number": role.line_number,
+        }
+
+    for name, user in symbol_table.get("users", {}).items():
+        summary["users"][name] = {
+            "roles": [role.name for role in user.roles],
+            "valid_from": user.valid_from,
+            "valid_until": user.valid_until,
+            "line_number": user.line_number,
+        }
+
+    for name, resource in symbol_table.get("resources", {}).items():
+        summary["resources"][name] = {
+            "path": resource.path,
+            "resource_type": resource.resource_type.value,
+            "meta": resource.meta,
+            "line_number": resource.line_number,
+        }
+
+    for name, group in symbol_table.get("groups", {}).items():
+        summary["groups"][name] = {
+            "members": group.members,
+            "roles": group.roles,
+            "line_number": group.line_number,
+        }
+
+    return summary
+
+
+def _init_batch_worker() -> None:
+    """Worker start-up: register every table model so SQLAlchemy can configure the mappers."""
+    import app.models.auth_models  # noqa: F401  (User.details -> UserDetails)
+
+
+def compile_file(
+        name: str,
+        rpl_code: str,
+        mode: ParseMode = ParseMode.TWO_STAGE,
+        limits: AnalysisLimits = UNLIMITED,
+        role_catalog: Optional[Mapping[str, Role]] = None
+) -> Dict[str, Any]:
+    """
+    Process-pool entry point: compile one file and return a picklable report.
+    Pass the parent's (detached) ``role_catalog`` so every file sees the same roles.
+    """
+    started = time.perf_counter()
+    try:
+        result = RPLAnalyzerService.compile_source(rpl_code, mode, limits=limits, role_catalog=role_catalog)
+    except AnalysisLimitError as e:
+        result = {"errors": [ErrorResponse(message=str(e), line_number=0, column_number=0)]}
+
+    return {
+        "file": name,
+        "symbol_table": summarize_symbol_table(result.get("symbol_table", {})),
+        "errors": result.get("errors", []),
+        "warnings": result.get("warnings", []),
+        "elapsed_seconds": round(time.perf_counter() - started, 6),
+    }
+
+
+def merge_batch_results(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-file reports in file-name order, whatever order the workers finished in.
+    A symbol declared in several files keeps its first declaration; the others are errors.
+    """
+    merged: Dict[str, Dict[str, Any]] = {kind: {} for kind in SYMBOL_KINDS}
+    declared_in: Dict[str, Dict[str, str]] = {kind: {} for kind in SYMBOL_KINDS}
+    files = []
+
+    for report in sorted(reports, key=lambda r: r["file"]):
+        errors = list(report["errors"])
+
+        for kind in SYMBOL_KINDS:
+            for name, symbol in report["symbol_table"].get(kind, {}).items():
+                if name in merged[kind]:
+                    first_file = declared_in[kind][name]
+                    errors.append(ErrorResponse(
+                        message=f"{kind[:-1].capitalize()} '{name}' already declared in '{first_file}' "
+                                f"at line {merged[kind][name]['line_number']}",
+                        line_number=symbol["line_number"],
+                        column_number=0
+                    ))
+                    continue
+
+                merged[kind][name] = symbol
+                declared_in[kind][name] = report["file"]
+
+        files.append({
+            "file": report["file"],
+            "errors": errors,
+            "warnings": report["warnings"],
+            "elapsed_seconds": report["elapsed_seconds"],
+        })
+
+    return {
+        "success": not any(f["errors"] for f in files),
+        "symbol_table": merged,
+        "files": files,
+    }
+
+
 class RPLAnalyzerService:
 
 
     def __init__(self):
         self.llm_analyzer = LLMAnalyzer()
+        self.compile_cache = CompileCache(
+            int(Config().get("RPL_COMPILE_CACHE_SIZE", DEFAULT_COMPILE_CACHE_SIZE))
+        )
+        self.parse_mode = ParseMode(Config().get("RPL_PARSE_MODE", ParseMode.TWO_STAGE.value))
+        self.debug_tree_max_chars = int(
+            Config().get("RPL_DEBUG_TREE_MAX_CHARS", DEFAULT_DEBUG_TREE_MAX_CHARS)
+        )
+        corpus = Config().get("RPL_WARMUP_CORPUS")
+        self.warmup_corpus = (
+            [Path(p.strip()) for p in corpus.split(",") if p.strip()] if corpus else list(DEFAULT_WARMUP_CORPUS)
+        )
+        self.limits = AnalysisLimits.from_config()
+        self.batch_workers = int(Config().get("RPL_BATCH_WORKERS", os.cpu_count() or 1))
+        self.batch_max_files = int(Config().get("RPL_BATCH_MAX_FILES", DEFAULT_BATCH_MAX_FILES))
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self.executor = AnalysisExecutor(
+            max_concurrency=int(Config().get("RPL_ANALYSIS_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+            max_queue=int(Config().get("RPL_ANALYSIS_QUEUE_SIZE", DEFAULT_MAX_QUEUE)),
+            retry_after=int(Config().get("RPL_ANALYSIS_RETRY_AFTER", DEFAULT_RETRY_AFTER_SECONDS))
+        )
+
+    async def analyze(self, rpl_code: str, use_llm: bool = False, debug_tree: bool = False) -> Dict[Any,Any]:
+
+        # Before anything reads the whole source on the event loop (the cache key normalizes and hashes it).
+        self.limits.check_source(rpl_code)
+
+        # Loaded here, on the event loop thread; workers get its session-free copies
+        # (``catalog.detached``), so they never query the shared session.
+        catalog = role_catalog.get()
+
+        if debug_tree:
+            # Debug output is per request; neither served from nor stored in the cache.
+            semantic_result = await self._compile(rpl_code, catalog, debug_tree=True)
+        else:
+            cache_key = compile_cache_key(rpl_code, catalog.version)
+            semantic_result = self.compile_cache.get(cache_key)
+
+            if semantic_result is None:
+                semantic_result = await self._compile(rpl_code, catalog)
+                self.compile_cache.set(cache_key, semantic_result)
+            else:
+                logger.debug("compile_cache_hit", key=cache_key)
+
+        if semantic_result.get("errors"):
+            return semantic_result
 
-    async def analyze(self, rpl_code: str, use_llm: bool = False) -> Dict[Any,Any]:
+        if use_llm:
+            llm_result = await self._llm_analysis(rpl_code)
+            result = {
+                "semantic_analysis": semantic_result["symbol_table"],
+                "llm_analysis": llm_result
+            }
+            if "parse_tree" in semantic_result:
+                result["parse_tree"] = semantic_result["parse_tree"]
+            return result
 
-        tokens, lex_errors = await self._lexical_analysis(rpl_code)
+        return semantic_result
+
+    def analyze_parsed(
+            self,
+            parse_tree,
+            syntax_errors: List[Any],
+            role_catalog: Optional[Mapping[str, Role]] = None,
+            declarations: Optional[DeclarationCache] = None
+    ) -> Dict[str, Any]:
+        """
+        Semantic analysis of a program that was lexed and parsed elsewhere (e.g. incrementally).
+        With ``declarations``, statements analyzed before are not visited again.
+        """
+        if syntax_errors:
+            return {"errors": cap_diagnostics(syntax_errors, self.limits.max_diagnostics)}
+
+        semantic_result = self._semantic_analysis(parse_tree, role_catalog, declarations)
+        return self._cap_semantic_result(semantic_result, self.limits)
+
+    async def analyze_batch(self, files: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Compile many files in parallel on a process pool (lexing and parsing are
+        CPU-bound pure Python) and merge the per-file results deterministically.
+
+        A batch is admitted as one analysis job, so it queues behind (and is
+        rejected with) single analyses; raises ``AnalysisLimitError`` past
+        ``batch_max_files`` files.
+        """
+        if len(files) > self.batch_max_files:
+            raise AnalysisLimitError("max_batch_files", self.batch_max_files, len(files))
+
+        started = time.perf_counter()
+        # Loaded here, on the event loop thread; workers get session-free copies of the same snapshot.
+        catalog = role_catalog.get()
+        reports = await self.executor.run(
+            self._compile_batch, self._get_process_pool(), files, catalog.detached
+        )
+
+        result = merge_batch_results(reports)
+        result["elapsed_seconds"] = round(time.perf_counter() - started, 6)
+
+        logger.info(
+            "batch_analysis_completed",
+            files=len(files),
+            success=result["success"],
+            elapsed_seconds=result["elapsed_seconds"]
+        )
+        return result
+
+    def _compile_batch(
+            self,
+            pool: ProcessPoolExecutor,
+            files: Dict[str, str],
+            roles: Mapping[str, Role]
+    ) -> List[Dict[str, Any]]:
+        """Runs on an admission worker thread: fan the files out to the process pool and wait."""
+        futures = [
+            pool.submit(compile_file, name, code, self.parse_mode, self.limits, roles)
+            for name, code in files.items()
+        ]
+        try:
+            return [future.result() for future in futures]
+        finally:
+            # After a failure, do not leave the rest of the batch occupying the pool.
+            for future in futures:
+                future.cancel()
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            # Spawn, so workers never inherit the parent's database connections.
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.batch_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_batch_worker
+            )
+        return self._process_pool
+
+    def shutdown(self) -> None:
+        """Release worker threads and processes."""
+        self.executor.shutdown()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Build the parser's prediction caches from the warm-up corpus (blocking)."""
+        return warm_up_parser(self.warmup_corpus)
+
+    def invalidate_cache(self) -> None:
+        """Drop every cached compile result."""
+        self.compile_cache.clear()
+
+    async def _compile(self, rpl_code: str, catalog: RoleCatalog, debug_tree: bool = False) -> Dict[str, Any]:
+        """
+        Run lexing, parsing and semantic analysis on a source text against a role catalog snapshot
+        (its detached copies: the session's rows expire on any commit and would reload on the worker).
+        With ``debug_tree`` the result also carries a size-capped rendering of the parse tree.
+        """
+        return await self.executor.run(
+            self.compile_source,
+            rpl_code,
+            self.parse_mode,
+            self.debug_tree_max_chars if debug_tree else None,
+            self.limits,
+            catalog.detached
+        )
+
+    @classmethod
+    def compile_source(
+            cls,
+            rpl_code: str,
+            mode: ParseMode = ParseMode.TWO_STAGE,
+            debug_tree_max_chars: Optional[int] = None,
+            limits: AnalysisLimits = UNLIMITED,
+            role_catalog: Optional[Mapping[str, Role]] = None
+    ) -> Dict[str, Any]:
+        """
+        Synchronous lex/parse/semantic pipeline; CPU-bound, safe to run off the event loop.
+        Raises ``AnalysisLimitError`` when the source breaks one of ``limits``.
+        Without ``role_catalog`` persisted roles come from the process-wide catalog cache.
+        """
+        limits.check_source(rpl_code)
+
+        tokens, lex_errors = cls._lexical_analysis(rpl_code, limits.max_diagnostics)
         if not tokens:
             return {"errors": lex_errors}
 
+        # Every token but EOF.
+        limits.check_tokens(len(tokens.tokens) - 1)
 
-        parse_tree, _, parse_errors = await self._syntax_analysis(tokens)
+        parse_tree, parse_errors = cls._syntax_analysis(tokens, mode, limits)
 
         if not parse_tree:
-            return {"errors": parse_errors}
+            return {"errors": cap_diagnostics(lex_errors + parse_errors, limits.max_diagnostics)}
 
+        debug_output = {}
+        if debug_tree_max_chars is not None:
+            debug_output["parse_tree"] = render_parse_tree(parse_tree, debug_tree_max_chars)
 
-        semantic_result = await self._semantic_analysis(parse_tree)
+        # A tree recovered from syntax errors is not worth a semantic pass.
+        syntax_errors = lex_errors + parse_errors
+        if syntax_errors:
+            return {"errors": cap_diagnostics(syntax_errors, limits.max_diagnostics), **debug_output}
+
+        semantic_result = cls._cap_semantic_result(cls._semantic_analysis(parse_tree, role_catalog), limits)
 
         errors = semantic_result.get("errors")
         if errors:
-            return {"errors": semantic_result["errors"]}
-
+            return {"errors": semantic_result["errors"], **debug_output}
 
-        if use_llm:
-            llm_result = await self._llm_analysis(rpl_code)
-            return {
-                "semantic_analysis": semantic_result["symbol_table"],
-                "llm_analysis": llm_result
-            }
+        semantic_result.update(debug_output)
+        return semantic_result
 
+    @staticmethod
+    def _cap_semantic_result(semantic_result: Dict[str, Any], limits: AnalysisLimits) -> Dict[str, Any]:
+        for key, kind in (("errors", "error"), ("warnings", "warning")):
+            if semantic_result.get(key):
+                semantic_result[key] = cap_diagnostics(semantic_result[key], limits.max_diagnostics, kind=kind)
         return semantic_result
 
     @staticmethod
-    async def _lexical_analysis(rpl_code: str) -> tuple:
+    def _lexical_analysis(rpl_code: str, max_errors: Optional[int] = None) -> tuple:
         logger.info("lexical_analysis_started")
 
         try:
-            input_stream = InputStream(rpl_code)
-            lexer = RPLLexer(input_stream)
-
-            lexer.removeErrorListeners()
-            error_listener = RPLErrorListener()
-            lexer.addErrorListener(error_listener)
-
-            token_stream = CommonTokenStream(lexer)
-            token_stream.fill()
-            return token_stream, error_listener.errors
+            return tokenize(rpl_code, max_errors=max_errors)
 
         except Exception as e:
             logger.error("Lexical_analysis_failed", error=str(e))
@@ -69,33 +632,31 @@ class RPLAnalyzerService:
 
 
     @staticmethod
-    async def _syntax_analysis(token_stream: CommonTokenStream) -> tuple:
+    def _syntax_analysis(
+            token_stream: CommonTokenStream,
+            mode: ParseMode = ParseMode.TWO_STAGE,
+            limits: AnalysisLimits = UNLIMITED
+    ) -> tuple:
         logger.debug("syntax_analysis_started")
 
         try:
-            parser = RPLParser(token_stream)
-            error_listener = RPLErrorListener()
-            parser.removeErrorListeners()
-            parser.addErrorListener(error_listener)
-
-
-            tree = parser.program()
-
-
-            from antlr4.tree.Trees import Trees
-            tree_string = Trees.toStringTree(tree, recog=parser) #type: ignore
-
-            return tree,tree_string, error_listener.errors
+            return parse_token_stream(token_stream, mode, limits)
 
+        except AnalysisLimitError:
+            raise
         except Exception as e:
             logger.error("syntax_analysis_failed", error=str(e))
-            return None, "", [f"Syntax analysis failed: {str(e)}"]
+            return None, [f"Syntax analysis failed: {str(e)}"]
 
 
     @staticmethod
-    async def _semantic_analysis(parse_tree) -> Dict[str, Any]:
+    def _semantic_analysis(
+            parse_tree,
+            role_catalog: Optional[Mapping[str, Role]] = None,
+            declarations: Optional[DeclarationCache] = None
+    ) -> Dict[str, Any]:
         logger.debug("semantic_analysis_started")
-        analyzer = SemanticAnalyzer()
+        analyzer = SemanticAnalyzer(role_catalog, declarations)
 
         try:
             analyzer.visit(parse_tree)
@@ -0,0 +1,62 @@
+"""
+Candidate-rule index for ``PolicyEngine``.
+
+Rules are bucketed by action and, inside each bucket, by resource pattern
+(``ResourceTrie``), so the rules that can possibly apply to a request are
+found without looking at the others:
+
+    one bucket per ``Action`` bit     rules whose mask has that bit ("*" rules land in all of them)
+    one bucket per other action name  rules listing a name outside the vocabulary
+    the "*" bucket                    rules listing "*", for names outside the vocabulary
+
+Candidates come back in declaration order. The index only narrows the
+search; conditions and the DENY-overrides decision stay with the engine.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.api.utils.resource_trie import ResourceTrie
+from app.models.enums import Action
+
+ANY_ACTION = "*"
+
+
+class RuleIndex:
+
+    def __init__(self, rules: Sequence[Dict[str, Any]], action_masks: Sequence[int]):
+        self._masks = action_masks
+        self._by_bit: Dict[int, ResourceTrie[int]] = {flag.value: ResourceTrie() for flag in Action}
+        self._by_name: Dict[str, ResourceTrie[int]] = {}
+        self._any_action: ResourceTrie[int] = ResourceTrie()
+
+        for index, (rule, mask) in enumerate(zip(rules, action_masks)):
+            pattern = rule.get("resource", "")
+
+            for flag in Action:
+                if mask & flag:
+                    self._by_bit[flag.value].add(pattern, index)
+
+            for name in set(rule.get("actions", [])):
+                if name == ANY_ACTION:
+                    self._any_action.add(pattern, index)
+                elif Action.parse(name) is None:
+                    self._by_name.setdefault(name, ResourceTrie()).add(pattern, index)
+
+    def candidates(self, action: str, resource: str, requested: Optional[Action] = None) -> List[int]:
+        """
+        Indices of the rules that grant or deny ``action`` on ``resource``,
+        in declaration order. ``requested`` is ``Action.parse(action)``.
+        """
+        if requested is None:
+            named = self._by_name.get(action)
+            found = self._any_action.match(resource)
+            if named is not None:
+                found = set(found).union(named.match(resource))
+            return sorted(found)
+
+        # A multi-bit request ("*") needs every bit: search one bucket, then filter.
+        lowest = requested & -requested
+        found = self._by_bit[lowest].match(resource)
+        if requested != lowest:
+            masks = self._masks
+            found = [index for index in found if masks[index] & requested == requested]
+        return sorted(found)
@@ -1,34 +1,34 @@
-from typing import Dict, List
-from app.models.permission import PermissionBlock
-from app.models.role import Role
-from app.models.user import User
-from app.models.group import Group
-from app.models.resource import Resource
+from typing import Any, Dict, List, Optional
+from app.analyzer.permission_closure import PermissionClosure
+from app.analyzer.policy_ir import AnyRole, GroupIR, ResourceIR, UserIR
 from app.models.error_response import WarningResponse, ErrorResponse
 
 
 class SemanticValidation:
 
     def __init__(self):
-        self.roles: Dict[str, Role] = {}
-        self.users: Dict[str, User] = {}
-        self.resources: Dict[str, Resource] = {}
-        self.groups: Dict[str, Group] = {}
+        self.roles: Dict[str, AnyRole] = {}
+        self.users: Dict[str, UserIR] = {}
+        self.resources: Dict[str, ResourceIR] = {}
+        self.groups: Dict[str, GroupIR] = {}
 
         self.errors: List[ErrorResponse] = []
         self.warnings: List[WarningResponse] = []
 
+        self._closure: Optional[PermissionClosure] = None
+
     def get_values(
         self,
-        roles: Dict[str, Role],
-        users: Dict[str, User],
-        resources: Dict[str, Resource],
-        groups: Dict[str, Group]
+        roles: Dict[str, AnyRole],
+        users: Dict[str, UserIR],
+        resources: Dict[str, ResourceIR],
+        groups: Dict[str, GroupIR]
     ):
         self.roles = roles
         self.users = users
         self.resources = resources
         self.groups = groups
+        self._closure = None
 
     # -------------------------------
     # ROLE VALIDATIONS
@@ -44,38 +44,73 @@ class SemanticValidation:
                     f"extends undefined role '{role.parent_role.name}'"
                 )
 
-    def detect_circular_inheritance(self):
-        """Detect cycles in role inheritance."""
-        visited = set()
-        stack = set()
-        path = []
-
-        def dfs(role_name: str):
-            visited.add(role_name)
-            stack.add(role_name)
-            path.append(role_name)
-
-            role = self.roles[role_name]
-            parent = role.parent_role
-
-            if parent:
-                parent_name = parent.name
+    def _parent_name(self, role_name: str) -> Optional[str]:
+        """Parent of a role, if it is one of the known roles (undefined parents are reported elsewhere)."""
+        parent = self.roles[role_name].parent_role
+        if parent is not None and parent.name in self.roles:
+            return parent.name
+        return None
 
-                if parent_name not in visited:
-                    dfs(parent_name)
-
-                elif parent_name in stack:
-                    cycle_start = path.index(parent_name)
-                    cycle = path[cycle_start:] + [parent_name]
-                    self.add_error(None, f"Circular inheritance detected: {' → '.join(cycle)}")
-
-            path.pop()
-            stack.remove(role_name)
-
-        for role_name in self.roles:
-            if role_name not in visited:
-                path.clear()
-                dfs(role_name)
+    def detect_circular_inheritance(self):
+        """
+        Detect cycles in role inheritance, reporting each cycle once.
+
+        Iterative Tarjan SCC over role -> parent edges, so deep hierarchies
+        cannot hit the recursion limit and every role is visited once. A role
+        has at most one parent, so every non-trivial component is one simple
+        cycle; it is reported starting from the role where the search entered it.
+        """
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack = set()
+
+        for root in self.roles:
+            if root in index:
+                continue
+
+            frames = [root]
+            while frames:
+                role_name = frames[-1]
+                parent_name = self._parent_name(role_name)
+
+                if role_name not in index:
+                    index[role_name] = lowlink[role_name] = len(index)
+                    stack.append(role_name)
+                    on_stack.add(role_name)
+
+                    if parent_name is not None and parent_name not in index:
+                        frames.append(parent_name)
+                        continue
+
+                # The parent is finished (or was never pending): fold in its lowlink.
+                frames.pop()
+                if parent_name is not None and parent_name in on_stack:
+                    lowlink[role_name] = min(lowlink[role_name], lowlink[parent_name])
+
+                if lowlink[role_name] != index[role_name]:
+                    continue
+
+                component = 0
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component += 1
+                    if member == role_name:
+                        break
+
+                if component > 1 or parent_name == role_name:
+                    self._report_cycle(role_name)
+
+    def _report_cycle(self, start: str):
+        cycle = [start]
+        current = self._parent_name(start)
+        while current != start:
+            cycle.append(current)
+            current = self._parent_name(current)
+        cycle.append(start)
+
+        self.add_error(None, f"Circular inheritance detected: {' → '.join(cycle)}")
 
     # -------------------------------
     # USER VALIDATIONS
@@ -120,13 +155,20 @@ class SemanticValidation:
     # PERMISSIONS
     # -------------------------------
 
-    def get_user_permissions(self, user_name: str) -> List[PermissionBlock]:
+    @property
+    def permission_closure(self) -> PermissionClosure:
+        """Built on first use; dropped whenever ``get_values`` swaps the roles."""
+        if self._closure is None:
+            self._closure = PermissionClosure(self.roles)
+        return self._closure
+
+    def get_user_permissions(self, user_name: str) -> List[Any]:
         """Resolve all permissions for a user."""
         if user_name not in self.users:
             return []
 
         user = self.users[user_name]
-        return user.get_all_permissions(self.roles)
+        return self.permission_closure.user_permissions(user)
 
     def get_role_hierarchy(self, role_name: str) -> List[str]:
         """Return inheritance chain for role."""
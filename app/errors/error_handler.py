@@ -6,9 +6,18 @@ class RPLErrorListener(ErrorListener):
     Custom error listener that collects errors instead of printing them.
     """
 
-    def __init__(self):
+    def __init__(self, max_errors: int | None = None):
         super().__init__()
         self.errors: list[ErrorResponse] = []
+        # Beyond ``max_errors`` errors are only counted, so memory stays bounded.
+        self.max_errors = max_errors
+        self.dropped = 0
+
+    def _collect(self, error: ErrorResponse):
+        if self.max_errors is not None and len(self.errors) >= self.max_errors:
+            self.dropped += 1
+            return
+        self.errors.append(error)
 
     def syntaxError(self, recognizer, offender_symbol, line, column, msg, e):
         """Called when a syntax error occurs."""
@@ -17,7 +26,7 @@ class RPLErrorListener(ErrorListener):
             line_number = line,
             message = msg
         )
-        self.errors.append(error)
+        self._collect(error)
 
     def reportAmbiguity(self, recognizer, dfa, start_index, stop_index,
                         exact, ambiguity_alts, configs):
@@ -35,7 +44,7 @@ class RPLErrorListener(ErrorListener):
             message=f"ambiguity: {msg}"
         )
 
-        self.errors.append(error)
+        self._collect(error)
         print(f"⚠️  {msg}")
 
     def reportAttemptingFullContext(self, recognizer, dfa, start_index,
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class DecisionAudit(SQLModel, table=True):
+    __tablename__ = "decision_audit"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    decided_at: datetime = Field(nullable=False, index=True)
+    subject: str = Field(nullable=False, index=True)
+    action: str = Field(nullable=False)
+    resource: str = Field(nullable=False)
+    allowed: bool = Field(nullable=False, index=True)
+    reason: str = Field(nullable=False)
+    policy_version: str = Field(default="", max_length=64)
+    cached: bool = Field(default=False)
@@ -1,4 +1,5 @@
-from enum import Enum
+from enum import Enum, IntFlag
+from typing import Iterable, List, Optional
 
 class PolicyEffect(Enum):
     ALLOW = "allow"
@@ -16,3 +17,39 @@ class Permission(Enum):
     EXECUTE = "execute"
     ALL = "*"
 
+
+
+class Action(IntFlag):
+    """One bit per action in the grammar's fixed vocabulary; ``ALL`` is ``*``."""
+    READ = 1
+    WRITE = 2
+    MODIFY = 4
+    START = 8
+    STOP = 16
+    DEPLOY = 32
+    DELETE = 64
+    EXECUTE = 128
+    ALL = 255
+
+    @classmethod
+    def parse(cls, name: str) -> Optional["Action"]:
+        """The flag for an action name (case-insensitive) or ``*``; None if outside the vocabulary."""
+        return _ACTION_NAMES.get(name.lower())
+
+    @classmethod
+    def mask(cls, actions: Iterable[str]) -> int:
+        """Bitmask of ``actions``; names outside the vocabulary contribute nothing."""
+        mask = 0
+        for name in actions:
+            mask |= _ACTION_NAMES.get(name.lower(), 0)
+        return mask
+
+    @classmethod
+    def names(cls, mask: int) -> List[str]:
+        """Action names set in ``mask``, ``["*"]`` when every action is."""
+        if mask & cls.ALL == cls.ALL:
+            return [Permission.ALL.value]
+        return [flag.name.lower() for flag in cls if mask & flag]
+
+
+_ACTION_NAMES = {permission.value: Action[permission.name] for permission in Permission}
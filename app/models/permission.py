@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Any, Optional, List
 from sqlmodel import SQLModel, Field, Column, JSON, Relationship
 from app.models.permission_role_link import PermissionRoleLink
 
@@ -7,8 +7,12 @@ class PermissionBlock(SQLModel, table=True):
     __tablename__ = "permission_block"
     id: Optional[int] = Field(default=None, primary_key=True)
     actions: List[str] = Field(sa_column=Column(JSON))
+    # Same actions as an app.models.enums.Action bitmask, for indexed and single-operation checks.
+    action_mask: int = Field(default=0, index=True)
     resources: List[str] = Field(sa_column=Column(JSON))
     conditions: Optional[str] = None
+    # Postfix program compiled from ``conditions`` (app.analyzer.condition_compiler).
+    condition_program: Optional[List[Any]] = Field(default=None, sa_column=Column(JSON))
 
     roles: List["Role"] = Relationship(
         back_populates="permissions",
@@ -1,3 +1,4 @@
+from typing import Any, Dict, List
 from pydantic import BaseModel, EmailStr
 
 
@@ -20,4 +21,16 @@ class UserOut(BaseModel):
 class LoginResponse(BaseModel):
     access_token: str
     token_type: str
-    user: UserOut
\ No newline at end of file
+    user: UserOut
+
+class AccessRequest(BaseModel):
+    subject: str
+    action: str
+    resource: str
+    context: Dict[str, Any] = {}
+    # Report matched rules, role inheritance and condition traces (slower; bypasses the decision cache)
+    explain: bool = False
+
+
+class BatchAccessRequest(BaseModel):
+    requests: List[AccessRequest]
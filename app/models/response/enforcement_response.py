@@ -0,0 +1,17 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+class AccessDecision(BaseModel):
+    allowed: bool
+    reason: str
+    subject: str
+    action: str
+    resource: str
+    # Only for explain requests
+    matched_rules: Optional[List[Dict[str, Any]]] = None
+    roles: Optional[Dict[str, List[str]]] = None
+    trace: Optional[List[Dict[str, Any]]] = None
+
+
+class BatchAccessResponse(BaseModel):
+    decisions: List[AccessDecision]
@@ -0,0 +1,21 @@
+# tests/conftest.py
+
+import os
+import tempfile
+
+# The app reads its settings from the environment at import time; give the
+# tests a throwaway database (a file, so worker processes share it) and dummy credentials.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/rpl-test.db")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlmodel import SQLModel  # noqa: E402
+from app.api.database.database import engine  # noqa: E402
+import app.models.auth_models  # noqa: E402,F401
+import app.models.llm_result  # noqa: E402,F401
+import app.models.user  # noqa: E402,F401
+import app.models.group  # noqa: E402,F401
+import app.models.resource  # noqa: E402,F401
+import app.models.permission  # noqa: E402,F401
+import app.models.decision_audit  # noqa: E402,F401
+
+SQLModel.metadata.create_all(engine)
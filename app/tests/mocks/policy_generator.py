@@ -0,0 +1,171 @@
+"""
+Seeded generator of synthetic, valid RPL policies for tests and benchmarks.
+
+The same ``PolicyShape`` and seed always produce the same source text, so
+benchmark results from different releases are comparable.
+"""
+import random
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+
+ACTIONS = ["read", "write", "modify", "start", "stop", "deploy", "delete", "execute"]
+RESOURCE_TYPES = ["api", "folder", "database"]
+REGIONS = ["eu", "us", "apac", "latam"]
+
+
+@dataclass
+class PolicyShape:
+    """How many declarations of each kind to generate, and how they are wired."""
+    roles: int = 100
+    users: int = 100
+    groups: int = 20
+    resources: int = 50
+    inheritance_depth: int = 4
+    blocks_per_role: int = 2
+    roles_per_user: int = 2
+    members_per_group: int = 5
+    condition_ratio: float = 0.5
+
+    @classmethod
+    def scaled(cls, statements: int) -> "PolicyShape":
+        """A default-proportioned shape with roughly ``statements`` declarations in total."""
+        statements = max(statements, 4)
+        return cls(
+            roles=statements * 2 // 5,
+            users=statements * 2 // 5,
+            groups=statements // 10,
+            resources=statements - (statements * 2 // 5) * 2 - statements // 10,
+        )
+
+    @property
+    def statements(self) -> int:
+        return self.roles + self.users + self.groups + self.resources
+
+    def as_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+class PolicyGenerator:
+    """Builds one policy document; parents are always declared before their children."""
+
+    def __init__(self, shape: PolicyShape, seed: int = 0):
+        self.shape = shape
+        self.rng = random.Random(seed)
+
+    # -------------------------------
+    # NAMES
+    # -------------------------------
+
+    @staticmethod
+    def role_name(i: int) -> str:
+        return f"Role{i}"
+
+    @staticmethod
+    def user_name(i: int) -> str:
+        return f"Person{i}"
+
+    @staticmethod
+    def resource_name(i: int) -> str:
+        return f"Res{i}"
+
+    @staticmethod
+    def group_name(i: int) -> str:
+        return f"Team{i}"
+
+    # -------------------------------
+    # DECLARATIONS
+    # -------------------------------
+
+    def resource_ref(self) -> str:
+        rng = self.rng
+        kind = rng.randrange(4)
+        if kind == 0:
+            return f'"/files/{rng.randrange(1000)}/*"'
+        if kind == 1:
+            return f"svc.r{rng.randrange(1000)}.*"
+        if self.shape.resources and kind == 2:
+            return self.resource_name(rng.randrange(self.shape.resources))
+        return f"db.t{rng.randrange(1000)}"
+
+    def condition(self) -> str:
+        rng = self.rng
+        regions = ", ".join(f'"{region}"' for region in rng.sample(REGIONS, 2))
+        comparisons = [
+            f"person.level >= {rng.randrange(10)}",
+            f"region IN [ {regions} ]",
+            f'device.trusted == {rng.choice(["true", "false"])}',
+            "tags CONTAINS 'x'",
+            f"request.size / 1024 < {rng.randrange(1, 100)}.5",
+        ]
+        picked = rng.sample(comparisons, rng.randint(1, 3))
+        joiner = rng.choice([" AND ", " OR "])
+        condition = joiner.join(picked)
+        return f"NOT ({condition})" if rng.random() < 0.1 else f"({condition})"
+
+    def permission_block(self) -> str:
+        rng = self.rng
+        actions = ", ".join(rng.sample(ACTIONS, rng.randint(1, 3)))
+        resources = ", ".join(self.resource_ref() for _ in range(rng.randint(1, 3)))
+        block = f"{{ actions: [ {actions} ], resources: [ {resources} ]"
+        if rng.random() < self.shape.condition_ratio:
+            block += f", conditions: {self.condition()}"
+        return block + " }"
+
+    def role(self, i: int) -> str:
+        depth = max(self.shape.inheritance_depth, 1)
+        extends = f" extends {self.role_name(i - 1)}" if i % depth else ""
+
+        if self.rng.random() < 0.2:
+            actions = ", ".join(self.rng.sample(ACTIONS, 2))
+            body = f"can: [ {actions} ] resources: [ {self.resource_ref()} ]"
+        else:
+            blocks = ",\n        ".join(
+                self.permission_block() for _ in range(max(self.shape.blocks_per_role, 1))
+            )
+            body = f"permissions: [\n        {blocks}\n    ]"
+
+        return f"role {self.role_name(i)}{extends} {{\n    {body}\n}}"
+
+    def user(self, i: int) -> str:
+        parts = []
+        if self.shape.roles:
+            count = min(self.shape.roles_per_user, self.shape.roles)
+            roles = ", ".join(self.role_name(r) for r in self.rng.sample(range(self.shape.roles), count))
+            parts.append(f"role: [ {roles} ]")
+        if self.rng.random() < 0.5:
+            year = 2024 + self.rng.randrange(3)
+            parts.append(f'valid_from: "{year}-01-01", valid_until: "{year + 1}-12-31"')
+        return f"user {self.user_name(i)} {{ {', '.join(parts)} }}"
+
+    def resource(self, i: int) -> str:
+        rng = self.rng
+        return (
+            f"resource {self.resource_name(i)} {{ "
+            f'path: "/{rng.choice(RESOURCE_TYPES)}/{i}", type: {rng.choice(RESOURCE_TYPES)}, '
+            f'metadata: {{ owner: "team{rng.randrange(50)}", replicas: {rng.randint(1, 5)} }} }}'
+        )
+
+    def group(self, i: int) -> str:
+        parts = []
+        if self.shape.users:
+            count = min(self.shape.members_per_group, self.shape.users)
+            members = ", ".join(self.user_name(u) for u in self.rng.sample(range(self.shape.users), count))
+            parts.append(f"members: [ {members} ]")
+        if self.shape.roles:
+            parts.append(f"role: [ {self.role_name(self.rng.randrange(self.shape.roles))} ]")
+        return f"group {self.group_name(i)} {{ {', '.join(parts)} }}"
+
+    def statements(self) -> List[str]:
+        shape = self.shape
+        return (
+            [self.resource(i) for i in range(shape.resources)]
+            + [self.role(i) for i in range(shape.roles)]
+            + [self.user(i) for i in range(shape.users)]
+            + [self.group(i) for i in range(shape.groups)]
+        )
+
+
+def generate_policy(shape: PolicyShape, seed: int = 0) -> str:
+    """Render a complete policy document for ``shape``."""
+    return "\n\n".join(PolicyGenerator(shape, seed).statements()) + "\n"
@@ -0,0 +1,102 @@
+# tests/test_access_matrix.py
+
+import random
+import pytest
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.services.enforcement_service import build_policy_data
+from app.api.utils import access_matrix
+from app.api.utils.access_matrix import AccessMatrix
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.decision_cache import DecisionCache
+from app.api.utils.rpl_analyzer import parse_token_stream
+from app.tests.mocks.policy_generator import ACTIONS, PolicyShape, generate_policy
+
+SOURCE = """
+RESOURCE Reports { path: "/api/reports", type: api }
+ROLE Viewer { can: [ read ] resources: [ Reports, docs.* ] }
+ROLE Editor extends Viewer { can: [ write ] resources: [ docs.manual ] }
+ROLE Night {
+    permissions: [ { actions: [ delete ], resources: [ docs.manual ], conditions: (hour >= 22) } ]
+}
+USER alice { ROLE: [ Editor ] }
+ROLE Guest { can: [ execute ] resources: [ kiosk ] }
+USER bob { ROLE: [ Guest ] }
+GROUP Ops { members: [ bob ], ROLE: [ Viewer, Night ] }
+"""
+
+
+def analyze(source):
+    token_stream, _ = tokenize(source)
+    tree, errors = parse_token_stream(token_stream)
+    assert errors == []
+    analyzer = SemanticAnalyzer({})
+    analyzer.visit(tree)
+    return analyzer
+
+
+def compiled(analyzer, **kwargs):
+    return AccessMatrix.compile(
+        analyzer.roles, analyzer.users.values(), analyzer.resources.values(), analyzer.groups.values(), **kwargs
+    )
+
+
+def test_inheritance_groups_and_conditions():
+    """Inherited and group roles are expanded; conditional grants leave the decision to the rules."""
+    matrix = compiled(analyze(SOURCE))
+
+    assert matrix.lookup("alice", "write", "docs.manual") is True
+    assert matrix.lookup("alice", "read", "docs.manual") is True
+    assert matrix.lookup("bob", "read", "Reports") is True
+    assert matrix.lookup("bob", "read", "/api/reports") is False
+    assert matrix.lookup("bob", "write", "docs.manual") is False
+    assert matrix.lookup("bob", "delete", "docs.manual") is None
+    assert matrix.lookup("alice", "*", "docs.manual") is None
+    assert matrix.lookup("alice", "read", "docs.unlisted") is None
+    assert matrix.lookup("carol", "read", "Reports") is None
+
+    assert matrix.resources_for("alice", "write") == ["docs.manual"]
+    assert sorted(matrix.users_with("read", "docs.manual")) == ["alice", "bob"]
+    assert matrix.users_with("*", "docs.manual") == []
+
+
+def test_engine_decisions_unchanged_with_matrix():
+    """With the matrix attached, every decision equals the rule evaluator's."""
+    shape = PolicyShape(roles=40, users=30, groups=8, resources=15, condition_ratio=0.3)
+    analyzer = analyze(generate_policy(shape, seed=4))
+    policy = build_policy_data(analyzer.roles, list(analyzer.users.values()), analyzer.groups.values())
+    matrix = compiled(analyzer)
+
+    rules_only = PolicyEngine(policy, cache=DecisionCache(max_entries=0))
+    dense = PolicyEngine(policy, cache=DecisionCache(max_entries=0), matrix=matrix)
+
+    rng = random.Random(1)
+    context = {"person": {"level": 5}, "region": "eu", "device": {"trusted": True}, "tags": ["x"],
+               "request": {"size": 2048}}
+    answered = 0
+    for _ in range(3000):
+        subject = rng.choice(matrix.users + ("Role1", "nobody"))
+        action = rng.choice(ACTIONS + ["*"])
+        resource = rng.choice(matrix.resources + ("svc.r1.x", "missing"))
+        answered += matrix.lookup(subject, action, resource) is not None
+        expected = rules_only.check_access(subject, action, resource, context)["allowed"]
+        assert dense.check_access(subject, action, resource, context)["allowed"] == expected, (subject, action, resource)
+    assert answered > 1000
+
+
+def test_size_is_bounded():
+    """Compilation refuses to allocate past max_cells."""
+    with pytest.raises(ValueError):
+        compiled(analyze(SOURCE), max_cells=4)
+
+
+def test_numpy_queries_match_python(monkeypatch):
+    """Row and column queries give the same answers with and without NumPy."""
+    pytest.importorskip("numpy")
+    matrix = compiled(analyze(generate_policy(PolicyShape(roles=20, users=20, groups=4, resources=10), seed=2)))
+    with_numpy = [(matrix.resources_for(u, a), matrix.users_with(a, r))
+                  for u in matrix.users for a in ACTIONS for r in matrix.resources[:3]]
+    monkeypatch.setattr(access_matrix, "np", None)
+    without = [(matrix.resources_for(u, a), matrix.users_with(a, r))
+               for u in matrix.users for a in ACTIONS for r in matrix.resources[:3]]
+    assert with_numpy == without
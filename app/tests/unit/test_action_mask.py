@@ -0,0 +1,82 @@
+# tests/test_action_mask.py
+
+from sqlalchemy import inspect, text
+from sqlmodel import Session, create_engine, select
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.permission_closure import PermissionClosure
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.database.database import add_missing_columns
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.rpl_analyzer import parse_token_stream
+from app.models.enums import Action
+from app.models.permission import PermissionBlock
+
+
+def test_mask_round_trip():
+    """Names map to single bits, case-insensitively; '*' is every bit."""
+    assert Action.mask(["read", "WRITE"]) == Action.READ | Action.WRITE
+    assert Action.mask(["*"]) == Action.ALL
+    assert Action.mask(["list"]) == 0
+    assert Action.names(Action.DEPLOY | Action.READ) == ["read", "deploy"]
+    assert Action.names(Action.mask(["*", "read"])) == ["*"]
+    assert Action.parse("Execute") is Action.EXECUTE and Action.parse("list") is None
+
+
+def test_analyzer_encodes_masks_and_closure_unions_them():
+    """Compiled permissions carry their mask; a role's mask is the union along its inheritance chain."""
+    source = """
+    ROLE Viewer { can: [ read ] resources: [ Data.* ] }
+    ROLE Operator extends Viewer {
+        permissions: [ { actions: [ start, stop ], resources: [ svc.* ] } ]
+    }
+    ROLE Admin { can: [ * ] resources: [ "/" ] }
+    """
+    token_stream, _ = tokenize(source)
+    tree, errors = parse_token_stream(token_stream)
+    assert errors == []
+    analyzer = SemanticAnalyzer({})
+    assert analyzer.visit(tree)
+
+    assert analyzer.roles["Operator"].permissions[0].action_mask == Action.START | Action.STOP
+
+    closure = PermissionClosure(analyzer.roles)
+    assert closure.action_mask("Operator") == Action.READ | Action.START | Action.STOP
+    assert closure.action_mask("Admin") == Action.ALL
+    assert closure.action_mask("Operator") & closure.action_mask("Viewer") == Action.READ
+
+
+def test_engine_matches_actions_by_mask():
+    """Known actions match by bitmask; names outside the vocabulary still match by name."""
+    engine = PolicyEngine({"policies": [
+        {"type": "ALLOW", "actions": ["read", "write"], "resource": "docs/*"},
+        {"type": "ALLOW", "actions": ["*"], "resource": "admin/*"},
+        {"type": "ALLOW", "actions": ["list"], "resource": "dirs/*"},
+        {"type": "DENY", "action_mask": int(Action.DELETE), "actions": [], "resource": "*"},
+    ]})
+
+    assert engine.check_access("ana", "READ", "docs/a")["allowed"]
+    assert not engine.check_access("ana", "deploy", "docs/a")["allowed"]
+    assert engine.check_access("ana", "deploy", "admin/x")["allowed"]
+    assert engine.check_access("ana", "list", "dirs/x")["allowed"]
+    assert not engine.check_access("ana", "delete", "admin/x")["allowed"]
+
+
+def test_existing_permission_table_gains_the_new_columns(tmp_path):
+    """A database created before the mask and program columns is upgraded in place on startup."""
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE permission_block (id INTEGER PRIMARY KEY, actions JSON, resources JSON, conditions VARCHAR)"
+        ))
+        connection.execute(text(
+            """INSERT INTO permission_block (actions, resources) VALUES ('["read"]', '["Data.*"]')"""
+        ))
+
+    added = add_missing_columns(old)
+
+    assert {"permission_block.action_mask", "permission_block.condition_program"} <= set(added)
+    assert "ix_permission_block_action_mask" in {index["name"] for index in inspect(old).get_indexes("permission_block")}
+    with Session(old) as session:
+        permission = session.exec(select(PermissionBlock)).one()
+    assert (permission.action_mask, permission.condition_program) == (0, None)
+    assert add_missing_columns(old) == []
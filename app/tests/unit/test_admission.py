@@ -0,0 +1,94 @@
+# tests/test_admission.py
+
+import asyncio
+import threading
+import pytest
+from app.api.utils.admission import AnalysisExecutor, AnalysisQueueFullError
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_off_the_event_loop():
+    """Jobs execute on a worker thread, not the event loop thread."""
+    executor = AnalysisExecutor(max_concurrency=1, max_queue=1)
+    loop_thread = threading.get_ident()
+
+    worker_thread = await executor.run(threading.get_ident)
+
+    assert worker_thread != loop_thread
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_retry_after():
+    """Beyond concurrency + queue size, new jobs are rejected immediately."""
+    executor = AnalysisExecutor(max_concurrency=1, max_queue=1, retry_after=7)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait))
+    queued = asyncio.ensure_future(executor.run(release.wait))
+    await asyncio.sleep(0)
+
+    assert executor.pending == 2
+    with pytest.raises(AnalysisQueueFullError) as error:
+        await executor.run(release.wait)
+    assert error.value.retry_after == 7
+
+    release.set()
+    assert await running and await queued
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_persisted_roles_are_loaded_on_the_event_loop(monkeypatch):
+    """Workers get the role snapshot; only the loop thread touches the shared session."""
+    from app.api.services.roles_service import RoleService, role_catalog
+    from app.api.utils.rpl_analyzer import RPLAnalyzerService
+
+    threads = []
+    monkeypatch.setattr(RoleService, "get_roles", lambda self: threads.append(threading.get_ident()) or [])
+    role_catalog.invalidate()
+    service = RPLAnalyzerService()
+
+    result = await service.analyze(
+        "ROLE Reader {\n    CAN: [ READ ] RESOURCES: [ Data.* ]\n}\nUSER Alice { ROLE: [ Reader ] }"
+    )
+
+    assert not result.get("errors")
+    assert threads == [threading.get_ident()]
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_workers_never_query_after_the_session_expires_the_catalog():
+    """Workers analyze against detached role copies, so expired catalog rows never reload off the loop."""
+    from sqlalchemy import event
+    from app.api.database.database import engine, next_session
+    from app.api.services.roles_service import role_catalog
+    from app.api.utils.rpl_analyzer import RPLAnalyzerService
+    from app.models.permission import PermissionBlock
+    from app.models.role import Role
+
+    next_session.add(Role(
+        name="SessionBound",
+        permissions=[PermissionBlock(actions=["read"], resources=["Data.*"])],
+        attributes={}
+    ))
+    next_session.commit()
+    role_catalog.invalidate()
+    service = RPLAnalyzerService()
+    # Builds the catalog (and its copies) on the loop, then expires every row it holds.
+    await service.analyze("USER Warm { ROLE: [ SessionBound ] }")
+    next_session.commit()
+
+    threads = []
+    record = lambda *args: threads.append(threading.get_ident())
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = await service.analyze("ROLE Local extends SessionBound { CAN: [ WRITE ] RESOURCES: [ x ] }")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        service.shutdown()
+
+    assert not result.get("errors")
+    assert set(threads) <= {threading.get_ident()}
@@ -0,0 +1,65 @@
+# tests/test_batch_access.py
+
+import random
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.services.enforcement_service import build_policy_data
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.decision_cache import DecisionCache
+from app.api.utils.rpl_analyzer import parse_token_stream
+
+SOURCE = """
+ROLE Viewer { can: [ read ] resources: [ docs.* ] }
+ROLE Editor extends Viewer { can: [ write ] resources: [ docs.* ] }
+ROLE Auditor {
+    permissions: [ { actions: [ read ], resources: [ logs.* ], conditions: (hour >= 9) } ]
+}
+USER alice { ROLE: [ Editor ] }
+USER bob { ROLE: [ Viewer, Auditor ] }
+"""
+
+
+def analyzed_engine():
+    token_stream, _ = tokenize(SOURCE)
+    tree, errors = parse_token_stream(token_stream)
+    assert errors == []
+    analyzer = SemanticAnalyzer({})
+    assert analyzer.visit(tree)
+    return PolicyEngine(build_policy_data(analyzer.roles, list(analyzer.users.values())))
+
+
+def test_rules_are_scoped_to_the_subjects_roles():
+    """Permissions apply to users holding the role directly or through inheritance, and to the role itself."""
+    engine = analyzed_engine()
+
+    assert engine.check_access("alice", "write", "docs.a")["allowed"]
+    assert engine.check_access("alice", "read", "docs.a")["allowed"]
+    assert not engine.check_access("bob", "write", "docs.a")["allowed"]
+    assert engine.check_access("bob", "read", "logs.x", {"hour": 10})["allowed"]
+    assert not engine.check_access("bob", "read", "logs.x", {"hour": 8})["allowed"]
+    assert not engine.check_access("alice", "read", "logs.x", {"hour": 10})["allowed"]
+    assert engine.check_access("Editor", "read", "docs.a")["allowed"]
+    assert not engine.check_access("mallory", "read", "docs.a")["allowed"]
+
+
+def test_batch_matches_single_checks_in_order():
+    """A batch decides exactly what one check_access per request does, in request order."""
+    rng = random.Random(2)
+    requests = [
+        {
+            "subject": rng.choice(["alice", "bob", "Viewer", "mallory"]),
+            "action": rng.choice(["read", "write", "delete", "*"]),
+            "resource": rng.choice(["docs.a", "docs.b", "logs.x", "other"]),
+            "context": {"hour": rng.choice([8, 12])},
+        }
+        for _ in range(300)
+    ]
+
+    batch = analyzed_engine().check_access_batch(requests)
+    reference = analyzed_engine()
+    reference.cache = DecisionCache(max_entries=0)
+
+    assert len(batch) == len(requests)
+    for request, decision in zip(requests, batch):
+        expected = reference.check_access(request["subject"], request["action"], request["resource"], request["context"])
+        assert decision == expected
@@ -0,0 +1,120 @@
+# tests/test_batch_compile.py
+
+import asyncio
+import threading
+import pytest
+from types import MappingProxyType
+from app.api.services.roles_service import RoleCatalog
+from app.api.utils.admission import AnalysisExecutor, AnalysisQueueFullError
+from app.api.utils.guardrails import AnalysisLimitError
+from app.api.utils.rpl_analyzer import RPLAnalyzerService, compile_file, merge_batch_results
+from app.models.permission import PermissionBlock
+from app.models.role import Role
+
+
+FILE_A = """
+ROLE Reader { CAN: [ READ ] RESOURCES: [ Data.* ] }
+RESOURCE Reports { path: "/reports", type: folder }
+"""
+
+FILE_B = """
+ROLE Writer { CAN: [ WRITE ] RESOURCES: [ Data.docs ] }
+ROLE Reader { CAN: [ READ ] RESOURCES: [ Other ] }
+"""
+
+
+def test_compile_file_reports_plain_symbols():
+    """A worker report holds plain data and a timing."""
+    report = compile_file("a.rpl", FILE_A)
+
+    assert report["errors"] == []
+    assert report["symbol_table"]["roles"]["Reader"]["permissions"] == [
+        {"actions": ["read"], "resources": ["Data.*"], "conditions": None}
+    ]
+    assert report["symbol_table"]["resources"]["Reports"]["resource_type"] == "folder"
+    assert report["elapsed_seconds"] >= 0
+
+
+def test_merge_is_deterministic_and_flags_duplicates():
+    """Merging ignores completion order; later files lose duplicate declarations."""
+    reports = [compile_file("b.rpl", FILE_B), compile_file("a.rpl", FILE_A)]
+
+    merged = merge_batch_results(reports)
+    reversed_merged = merge_batch_results(list(reversed(reports)))
+
+    assert merged == reversed_merged
+    assert [f["file"] for f in merged["files"]] == ["a.rpl", "b.rpl"]
+    assert merged["symbol_table"]["roles"]["Reader"]["permissions"][0]["resources"] == ["Data.*"]
+    assert not merged["success"]
+    assert "already declared in 'a.rpl'" in merged["files"][1]["errors"][0].message
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_on_process_pool():
+    """The service fans files out to worker processes and merges the reports."""
+    service = RPLAnalyzerService()
+    service.batch_workers = 2
+
+    try:
+        result = await service.analyze_batch({"b.rpl": FILE_B, "a.rpl": FILE_A})
+    finally:
+        service.shutdown()
+
+    assert sorted(result["symbol_table"]["roles"]) == ["Reader", "Writer"]
+    assert len(result["files"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_resolve_roles_from_the_parent_catalog(monkeypatch):
+    """Workers get the parent's catalog snapshot instead of loading (or missing) their own."""
+    persisted = Role(
+        name="Persisted",
+        permissions=[PermissionBlock(actions=["read"], resources=["Data.*"])],
+        attributes={}
+    )
+
+    class FixedCatalog:
+        def get(self):
+            return RoleCatalog(version="v1", roles=MappingProxyType({"Persisted": persisted}))
+
+    monkeypatch.setattr("app.api.utils.rpl_analyzer.role_catalog", FixedCatalog())
+    service = RPLAnalyzerService()
+    service.batch_workers = 1
+
+    try:
+        result = await service.analyze_batch({
+            "local.rpl": "ROLE Local extends Persisted { CAN: [ WRITE ] RESOURCES: [ Data.docs ] }\n"
+                         "USER Alice { ROLE: [ Persisted, Local ] }"
+        })
+    finally:
+        service.shutdown()
+
+    assert result["success"], result["files"]
+    assert result["symbol_table"]["roles"]["Local"]["parent_role"] == "Persisted"
+    assert "Persisted" not in result["symbol_table"]["roles"]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_capped_and_admitted_as_one_job():
+    """Too many files are refused up front; a full admission queue rejects the batch."""
+    service = RPLAnalyzerService()
+    service.batch_max_files = 1
+    service.executor = AnalysisExecutor(max_concurrency=1, max_queue=0, retry_after=3)
+    release = threading.Event()
+
+    try:
+        with pytest.raises(AnalysisLimitError) as error:
+            await service.analyze_batch({"a.rpl": FILE_A, "b.rpl": FILE_B})
+        assert (error.value.limit, error.value.actual) == ("max_batch_files", 2)
+
+        running = asyncio.ensure_future(service.executor.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(AnalysisQueueFullError) as error:
+            await service.analyze_batch({"a.rpl": FILE_A})
+        assert error.value.retry_after == 3
+
+        release.set()
+        await running
+    finally:
+        release.set()
+        service.shutdown()
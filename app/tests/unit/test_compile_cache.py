@@ -0,0 +1,114 @@
+# tests/test_compile_cache.py
+
+import pytest
+from app.api.services import roles_service
+from app.api.services.roles_service import RoleCatalogCache
+from app.api.utils.rpl_analyzer import (
+    CompileCache,
+    RPLAnalyzerService,
+    compile_cache_key,
+    normalize_source,
+)
+from app.models.permission import PermissionBlock
+from app.models.role import Role
+
+
+def test_normalization_keeps_positions():
+    """Only line endings and trailing whitespace are normalized."""
+    source = "ROLE Admin {  \r\n    CAN: [ READ ] RESOURCES: [ Data ]\t\r\n}\n\n"
+    assert normalize_source(source) == "ROLE Admin {\n    CAN: [ READ ] RESOURCES: [ Data ]\n}"
+
+
+def test_equivalent_sources_share_a_key():
+    """Whitespace-only differences at line ends map to the same key."""
+    assert compile_cache_key("ROLE A {}\r\n") == compile_cache_key("ROLE A {}   \n")
+    assert compile_cache_key("ROLE A {}") != compile_cache_key("ROLE B {}")
+    assert compile_cache_key("ROLE A {}", "v1") != compile_cache_key("ROLE A {}", "v2")
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted first."""
+    cache = CompileCache(max_size=2)
+    cache.set("a", {"errors": []})
+    cache.set("b", {"errors": []})
+    cache.get("a")
+    cache.set("c", {"errors": []})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_repeat_submission_skips_compilation(monkeypatch):
+    """A repeated submission is served from the cache."""
+    service = RPLAnalyzerService()
+    calls = []
+
+    async def fake_compile(rpl_code, catalog):
+        calls.append(rpl_code)
+        return {"errors": ["boom"]}
+
+    monkeypatch.setattr(service, "_compile", fake_compile)
+
+    first = await service.analyze("ROLE A {}")
+    second = await service.analyze("ROLE A {}  \n")
+
+    assert first == second
+    assert len(calls) == 1
+
+    service.invalidate_cache()
+    await service.analyze("ROLE A {}")
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_debug_tree_bypasses_cache(monkeypatch):
+    """Debug requests compile fresh and never populate the cache."""
+    service = RPLAnalyzerService()
+    calls = []
+
+    async def fake_compile(rpl_code, catalog, debug_tree=False):
+        calls.append(debug_tree)
+        result = {"errors": ["boom"]}
+        if debug_tree:
+            result["parse_tree"] = "(program)"
+        return result
+
+    monkeypatch.setattr(service, "_compile", fake_compile)
+
+    debug = await service.analyze("ROLE A {}", debug_tree=True)
+    plain = await service.analyze("ROLE A {}")
+
+    assert debug["parse_tree"] == "(program)"
+    assert "parse_tree" not in plain
+    assert calls == [True, False]
+
+
+@pytest.mark.asyncio
+async def test_permission_change_misses_the_cache(monkeypatch):
+    """Editing a persisted role's permission changes the catalog version, so the source is recompiled."""
+    permission = PermissionBlock(id=1, actions=["read"], resources=["Data.*"], action_mask=1)
+    rows = [Role(id=1, name="Persisted", permissions=[permission], attributes={})]
+    monkeypatch.setattr(roles_service.RoleService, "get_roles", lambda self: list(rows))
+    catalog_cache = RoleCatalogCache()
+    monkeypatch.setattr("app.api.utils.rpl_analyzer.role_catalog", catalog_cache)
+
+    service = RPLAnalyzerService()
+    calls = []
+
+    async def fake_compile(rpl_code, catalog):
+        calls.append(catalog.version)
+        return {"errors": ["boom"]}
+
+    monkeypatch.setattr(service, "_compile", fake_compile)
+
+    await service.analyze("USER A { ROLE: [ Persisted ] }")
+    permission.actions = ["read", "write"]
+    permission.action_mask = 3
+    catalog_cache.invalidate()
+    await service.analyze("USER A { ROLE: [ Persisted ] }")
+
+    assert len(calls) == 2
+    assert calls[0] != calls[1]
@@ -0,0 +1,81 @@
+# tests/test_condition_compiler.py
+
+import json
+import pytest
+from app.analyzer.condition_compiler import ConditionError, compile_condition_source, load_predicate
+from app.api.utils.access_service import PolicyEngine
+
+
+def predicate(source):
+    # Through JSON, as programs are stored on PermissionBlock.
+    return load_predicate(json.loads(json.dumps(compile_condition_source(source))))
+
+
+@pytest.mark.parametrize("source, context, expected", [
+    ("level >= 3", {"level": 3}, True),
+    ("person.level > 3", {"person": {"level": 3}}, False),
+    ("person.level > 3", {"person.level": 4}, True),
+    ('region IN [ "eu", "us" ]', {"region": "us"}, True),
+    ("region IN [ eu, us ]", {"region": "apac"}, False),
+    ("tags CONTAINS 'x'", {"tags": ["x", "y"]}, True),
+    ('name CONTAINS "adm"', {"name": "sysadmin"}, True),
+    ("request.size / 1024 < 10.5", {"request": {"size": 4096}}, True),
+    ("-a + 2 * 3 == 5", {"a": 1}, True),
+    ("NOT (trusted == true) OR level >= 9", {"trusted": True, "level": 1}, False),
+    ("a == 1 AND b == 2 AND c == 3", {"a": 1, "b": 2, "c": 3}, True),
+])
+def test_compiled_conditions_evaluate(source, context, expected):
+    """Compiled programs round-trip through JSON and evaluate against nested or flat context."""
+    assert predicate(source)(context) is expected
+
+
+def test_programs_are_cached():
+    """Loading the same program twice yields the same compiled predicate."""
+    program = compile_condition_source("level >= 3")
+    assert load_predicate(program) is load_predicate(list(map(list, program)))
+
+
+@pytest.mark.parametrize("source, context", [
+    ("NOT (level >= 3)", {}),
+    ("level / 0 > 1", {"level": 1}),
+    ('level > "x"', {"level": 1}),
+])
+def test_evaluation_errors_are_not_negated(source, context):
+    """Missing attributes and type or arithmetic errors raise through NOT instead of flipping it."""
+    with pytest.raises(ConditionError):
+        predicate(source)(context)
+
+
+def test_invalid_source_rejected():
+    """Partial or malformed conditions are compile errors."""
+    for source in ["level >=", "a == 1 b", "regionIN[eu]"]:
+        with pytest.raises(ConditionError):
+            compile_condition_source(source)
+
+
+def test_engine_fails_closed():
+    """Unevaluable conditions never allow, and always let a DENY apply."""
+    engine = PolicyEngine({"policies": [
+        {"type": "ALLOW", "actions": ["read"], "resource": "docs/*", "condition": "level >= 3"},
+        {"type": "DENY", "actions": ["read"], "resource": "docs/secret", "condition": 'network != "internal"'},
+        {"type": "ALLOW", "actions": ["write"], "resource": "*", "condition": "broken ==="},
+    ]})
+
+    assert engine.check_access("ana", "read", "docs/a", {"level": 5})["allowed"]
+    assert not engine.check_access("ana", "read", "docs/a", {"level": 1})["allowed"]
+    assert not engine.check_access("ana", "read", "docs/a")["allowed"]
+    assert engine.check_access("ana", "read", "docs/secret", {"level": 5, "network": "internal"})["allowed"]
+    assert not engine.check_access("ana", "read", "docs/secret", {"level": 5})["allowed"]
+    assert not engine.check_access("ana", "write", "docs/a")["allowed"]
+
+
+def test_engine_prefers_compiled_program():
+    """A rule carrying the analyzer's program is executed without parsing its condition text."""
+    program = compile_condition_source("subject == \"ana\"")
+    engine = PolicyEngine({"policies": [
+        {"type": "ALLOW", "actions": ["*"], "resource": "*", "condition": "subject==\"ana\"",
+         "condition_program": json.loads(json.dumps(program))},
+    ]})
+
+    assert engine.check_access("ana", "read", "x")["allowed"]
+    assert not engine.check_access("bo", "read", "x")["allowed"]
@@ -0,0 +1,58 @@
+# tests/test_decision_cache.py
+
+import time
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.decision_cache import DecisionCache
+
+RULES = [
+    {"type": "ALLOW", "actions": ["read"], "resource": "docs.*"},
+    {"type": "ALLOW", "actions": ["write"], "resource": "docs.*", "condition": "time.hour >= 9 AND time.hour < 17"},
+    {"type": "DENY", "actions": ["write"], "resource": "docs.secret", "condition": "ip IN [\"10.0.0.1\"]"},
+]
+
+
+def test_context_only_matters_when_a_condition_reads_it():
+    """Unreferenced context is ignored; a referenced attribute is part of the key."""
+    engine = PolicyEngine({"policies": RULES}, cache=DecisionCache(max_entries=100))
+
+    engine.check_access("ana", "read", "docs.a", {"request_id": 1})
+    engine.check_access("ana", "read", "docs.a", {"request_id": 2})
+    assert engine.cache.hits == 1
+
+    assert engine.check_access("ana", "write", "docs.a", {"time": {"hour": 10}})["allowed"]
+    assert not engine.check_access("ana", "write", "docs.a", {"time": {"hour": 20}})["allowed"]
+    assert engine.check_access("ana", "write", "docs.a", {"time": {"hour": 10}, "ip": "1.2.3.4"})["allowed"]
+    assert engine.cache.hits == 2
+
+    # docs.secret also reads ip
+    assert not engine.check_access("ana", "write", "docs.secret", {"time": {"hour": 10}, "ip": "10.0.0.1"})["allowed"]
+    assert engine.check_access("ana", "write", "docs.secret", {"time": {"hour": 10}, "ip": "1.1.1.1"})["allowed"]
+
+
+def test_cache_is_bounded_and_expires():
+    """Least recently used decisions are evicted at the cap; stale ones expire."""
+    engine = PolicyEngine({"policies": RULES}, cache=DecisionCache(max_entries=2, ttl_seconds=60))
+    for name in ("a", "b", "c", "a"):
+        engine.check_access("ana", "read", f"docs.{name}")
+    assert len(engine.cache) == 2
+    assert engine.cache.stats()["evictions"] == 2
+
+    expiring = PolicyEngine({"policies": RULES}, cache=DecisionCache(max_entries=10, ttl_seconds=0.01))
+    expiring.check_access("ana", "read", "docs.a")
+    time.sleep(0.02)
+    expiring.check_access("ana", "read", "docs.a")
+    assert expiring.cache.hits == 0 and expiring.cache.evictions == 1
+
+
+def test_uncacheable_context_and_disabled_cache():
+    """Unhashable referenced values and a zero-sized cache both fall through to evaluation."""
+    rules = [{"type": "ALLOW", "actions": ["read"], "resource": "*", "condition": "tags CONTAINS \"a\""}]
+    engine = PolicyEngine({"policies": rules}, cache=DecisionCache(max_entries=10))
+    engine.check_access("ana", "read", "x", {"tags": {"a": 1}})
+    assert engine.check_access("ana", "read", "x", {"tags": {"a": 1}})["allowed"]
+    assert len(engine.cache) == 0
+
+    disabled = PolicyEngine({"policies": RULES}, cache=DecisionCache(max_entries=0))
+    disabled.check_access("ana", "read", "docs.a")
+    disabled.check_access("ana", "read", "docs.a")
+    assert disabled.cache.hits == 0
@@ -0,0 +1,126 @@
+# tests/test_decision_log.py
+
+import time
+from app.api.middlewares.metrics import decision_log_dropped
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.decision_cache import DecisionCache, Outcome
+from app.api.utils.decision_log import DecisionLog, audit_table_sink
+from app.api.utils.policy_store import PolicyStore
+from app.models.decision_audit import DecisionAudit
+from sqlmodel import Session, select
+
+RULES = [
+    {"type": "ALLOW", "actions": ["read"], "resource": "docs.*"},
+    {"type": "DENY", "actions": ["read"], "resource": "docs.secret"},
+]
+
+
+def collecting_log(**options):
+    batches = []
+    return DecisionLog(sink=batches.append, **options), batches
+
+
+def test_denies_are_always_logged_and_allows_sampled():
+    """At a zero sample rate only denies reach the buffer; at one every decision does."""
+    log, batches = collecting_log(sample_rate=0.0, log_denies=True)
+    engine = PolicyEngine({"policies": RULES}, cache=DecisionCache(max_entries=10), decision_log=log, version="v1")
+
+    engine.check_access("ana", "read", "docs.a")
+    engine.check_access("ana", "read", "docs.secret")
+    engine.check_access("ana", "read", "docs.secret")
+    assert log.flush() == 2
+    assert [event["allowed"] for event in batches[0]] == [False, False]
+    assert [event["cached"] for event in batches[0]] == [False, True]
+    assert batches[0][0]["policy_version"] == "v1"
+
+    everything, batches = collecting_log(sample_rate=1.0, log_denies=False)
+    engine = PolicyEngine({"policies": RULES}, decision_log=everything)
+    engine.check_access_batch([
+        {"subject": "ana", "action": "read", "resource": "docs.a"},
+        {"subject": "ana", "action": "read", "resource": "docs.b"},
+    ])
+    assert everything.flush() == 2
+
+
+def test_prewarm_replays_are_not_logged(monkeypatch):
+    """Decisions replayed to pre-warm a new snapshot fill the cache but never reach the log."""
+    log, batches = collecting_log(sample_rate=1.0)
+    monkeypatch.setattr("app.api.utils.access_service.default_decision_log", log)
+    cache = DecisionCache(max_entries=100)
+    store = PolicyStore(cache, prewarm_keys=10)
+
+    old = store.publish({"policies": RULES})
+    old.engine.check_access("ana", "read", "docs.secret")
+    assert log.flush() == 1
+
+    new = store.publish({"policies": RULES, "resources": {"extra": {}}})
+    assert len(log) == 0
+
+    hits = cache.hits
+    new.engine.check_access("ana", "read", "docs.secret")
+    assert cache.hits == hits + 1
+    assert log.flush() == 1
+    assert batches[-1][0]["policy_version"] == new.version
+
+
+def test_full_buffer_overwrites_oldest_and_counts_drops():
+    """The ring buffer never grows past its capacity; checks never block on it."""
+    log, batches = collecting_log(sample_rate=1.0, capacity=3, batch_size=2)
+    dropped = decision_log_dropped._value.get()
+
+    for subject in ("a", "b", "c", "d", "e"):
+        log.record(subject, "read", "r", Outcome.ALLOW)
+    assert len(log) == 3
+    assert decision_log_dropped._value.get() - dropped == 2
+
+    assert log.flush() == 3
+    assert [[event["subject"] for event in batch] for batch in batches] == [["c", "d"], ["e"]]
+
+
+def test_writer_thread_flushes_in_background_and_on_stop():
+    """Queued events are written by the writer thread, and whatever is left on stop()."""
+    log, batches = collecting_log(sample_rate=1.0, flush_seconds=0.01)
+    log.start()
+    try:
+        log.record("ana", "read", "r", Outcome.ALLOW)
+        deadline = time.time() + 2
+        while not batches and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(batches) == 1
+    finally:
+        log.stop()
+
+    log.record("bob", "read", "r", Outcome.NO_MATCH)
+    log.stop()
+    assert batches[-1][0]["subject"] == "bob"
+
+
+def test_failing_sink_loses_the_batch_not_the_writer():
+    """A sink error drops its batch and later batches are still written."""
+    written = []
+
+    def flaky(events):
+        if not written:
+            written.append(None)
+            raise RuntimeError("sink down")
+        written.extend(events)
+
+    log = DecisionLog(sink=flaky, sample_rate=1.0)
+    log.record("a", "read", "r", Outcome.ALLOW)
+    assert log.flush() == 0
+    log.record("b", "read", "r", Outcome.ALLOW)
+    assert log.flush() == 1
+    assert written[-1]["subject"] == "b"
+
+
+def test_audit_sink_writes_rows():
+    """The audit sink stores each event as a decision_audit row."""
+    from app.api.database.database import engine
+
+    log = DecisionLog(sink=audit_table_sink, sample_rate=0.0, log_denies=True)
+    log.record("audited", "delete", "r", Outcome.DENY, "v9")
+    assert log.flush() == 1
+
+    with Session(engine) as session:
+        row = session.exec(select(DecisionAudit).where(DecisionAudit.subject == "audited")).one()
+    assert (row.action, row.allowed, row.reason, row.policy_version) == ("delete", False, Outcome.DENY.reason, "v9")
@@ -0,0 +1,178 @@
+# tests/test_enforcement.py
+
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.api.routers import enforcement_api
+from app.api.services.enforcement_service import (
+    DecisionTimeoutError,
+    EnforcementService,
+    PolicyNotLoadedError,
+)
+from app.api.utils.decision_cache import DecisionCache
+from app.api.utils.policy_store import PolicyStore
+
+POLICY = {
+    "users": {"ana": {"roles": ["Viewer"]}},
+    "policies": [{"type": "ALLOW", "actions": ["read"], "resource": "docs.*", "roles": ["Viewer"]}],
+}
+
+
+def loaded_service(**kwargs):
+    service = EnforcementService(store=PolicyStore(DecisionCache(max_entries=100)), **kwargs)
+    service.store.publish(POLICY)
+    return service
+
+
+def counted(version, decision):
+    return REGISTRY.get_sample_value("enforcements_total", {"policy_id": version, "decision": decision}) or 0
+
+
+@pytest.mark.asyncio
+async def test_decisions_are_recorded_per_policy_version():
+    """Each decision increments the counter for its outcome and observes its latency."""
+    service = loaded_service()
+    version = service.store.current().version
+    before = REGISTRY.get_sample_value("enforcement_duration_seconds_count") or 0
+    allowed, denied = counted(version, "allow"), counted(version, "deny")
+
+    snapshot, decision = await service.check_access("ana", "read", "docs.a")
+    assert decision["allowed"] and snapshot.version == version
+    await service.check_access("ana", "write", "docs.a")
+
+    assert counted(version, "allow") == allowed + 1 and counted(version, "deny") == denied + 1
+    assert REGISTRY.get_sample_value("enforcement_duration_seconds_count") == before + 2
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_budget_overrun_fails_without_a_decision(monkeypatch):
+    """A decision slower than the budget raises instead of answering late."""
+    service = loaded_service(latency_budget_ms=5)
+    engine = service.store.current().engine
+    monkeypatch.setattr(engine, "check_access", lambda *args: time.sleep(0.05))
+    timeouts = counted(service.store.current().version, "timeout")
+
+    with pytest.raises(DecisionTimeoutError):
+        await service.check_access("ana", "read", "docs.a")
+    assert counted(service.store.current().version, "timeout") == timeouts + 1
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_unloaded_policy_is_never_compiled_on_the_request_path(monkeypatch):
+    """Without a snapshot the request is refused at once and loading starts in the background."""
+    service = EnforcementService(store=PolicyStore(DecisionCache(max_entries=100)))
+    monkeypatch.setattr(service, "_publish", lambda: service.store.publish(POLICY))
+
+    with pytest.raises(PolicyNotLoadedError):
+        await service.check_access("ana", "read", "docs.a")
+    service._loading.join()
+    assert (await service.check_access("ana", "read", "docs.a"))[1]["allowed"]
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_policy_save_recompiles_off_the_event_loop(monkeypatch):
+    """Saving analyzed policies reloads enforcement on a worker thread, not the loop thread."""
+    from app.api.services import rpl_editor_service
+
+    threads = []
+
+    async def analyzed(code, use_llm, debug_tree):
+        return {"symbol_table": {"roles": {}, "users": {}, "resources": {}, "groups": {}}}
+
+    monkeypatch.setattr(rpl_editor_service.service, "analyze", analyzed)
+    monkeypatch.setattr(rpl_editor_service.enforcement_service, "refresh", lambda: threads.append(threading.get_ident()))
+
+    result = await rpl_editor_service.analyze_policies("")
+
+    assert result["saved"]["roles"] == []
+    assert len(threads) == 1 and threads[0] != threading.get_ident()
+
+
+def test_reload_compiles_from_its_own_session():
+    """Reloads read through a session of their own, never the shared request session."""
+    from sqlalchemy import event
+    from app.api.database.database import next_session
+    from app.models.permission import PermissionBlock
+    from app.models.role import Role
+    from app.models.user import User
+
+    reader = Role(name="OwnSessionReader", permissions=[PermissionBlock(actions=["read"], resources=["docs.*"])],
+                  attributes={})
+    next_session.add(User(name="own-session-ana", roles=[reader], attributes={}))
+    next_session.commit()
+
+    shared = []
+    record = lambda *args: shared.append(threading.get_ident())
+    event.listen(next_session, "do_orm_execute", record)
+    service = loaded_service()
+    try:
+        reload = threading.Thread(target=service.reload)
+        reload.start()
+        reload.join()
+    finally:
+        event.remove(next_session, "do_orm_execute", record)
+
+    assert shared == []
+    assert service.engine().is_allowed("own-session-ana", "read", "docs.a")
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_background_load_stays_off_the_request_session():
+    """The first-use loader thread compiles through its own session while requests use the shared one."""
+    from sqlalchemy import event
+    from app.api.database.database import next_session
+
+    shared = []
+    record = lambda *args: shared.append(threading.get_ident())
+    event.listen(next_session, "do_orm_execute", record)
+    service = EnforcementService(store=PolicyStore(DecisionCache(max_entries=100)))
+    try:
+        with pytest.raises(PolicyNotLoadedError):
+            await service.check_access("ana", "read", "docs.a")
+        service._loading.join()
+    finally:
+        event.remove(next_session, "do_orm_execute", record)
+
+    assert shared == []
+    assert service.store.current() is not None
+    service.shutdown()
+
+
+def test_http_endpoints(monkeypatch):
+    """/api/enforce and /api/enforce/batch answer with the deciding policy version, explaining on request."""
+    service = loaded_service()
+    monkeypatch.setattr(enforcement_api, "enforcement_service", service)
+    app = FastAPI()
+    app.include_router(enforcement_api.enforcement_router)
+    client = TestClient(app)
+
+    response = client.post("/api/enforce", json={"subject": "ana", "action": "read", "resource": "docs.a"})
+    assert response.status_code == 200 and response.json()["allowed"]
+    assert response.headers["X-Policy-Version"] == service.store.current().version
+    assert "matched_rules" not in response.json()
+
+    response = client.post("/api/enforce", json={
+        "subject": "ana", "action": "read", "resource": "docs.a", "explain": True
+    })
+    assert response.json()["matched_rules"][0]["resource"] == "docs.*"
+    assert response.json()["roles"] == {"Viewer": ["Viewer"]}
+
+    response = client.post("/api/enforce/batch", json={"requests": [
+        {"subject": "ana", "action": "read", "resource": "docs.a"},
+        {"subject": "ana", "action": "delete", "resource": "docs.a"},
+    ]})
+    assert [d["allowed"] for d in response.json()["decisions"]] == [True, False]
+
+    unloaded = EnforcementService(store=PolicyStore(DecisionCache(max_entries=100)))
+    monkeypatch.setattr(unloaded, "load_in_background", lambda: None)
+    monkeypatch.setattr(enforcement_api, "enforcement_service", unloaded)
+    response = client.post("/api/enforce", json={"subject": "ana", "action": "read", "resource": "docs.a"})
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    service.shutdown()
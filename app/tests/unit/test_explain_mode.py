@@ -0,0 +1,86 @@
+# tests/test_explain_mode.py
+
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.decision_cache import DecisionCache, Outcome
+
+POLICY = {
+    "roles": {"Admin": {"parent_role": "Editor"}, "Editor": {"parent_role": "Viewer"}, "Viewer": {"parent_role": None}},
+    "users": {"ana": {"roles": ["Admin"]}, "bob": {"roles": ["Viewer"]}},
+    "policies": [
+        {"type": "ALLOW", "actions": ["read"], "resource": "docs.*", "roles": ["Viewer", "Editor", "Admin"]},
+        {"type": "DENY", "actions": ["read"], "resource": "docs.*", "condition": "ip IN [\"10.0.0.1\"]"},
+        {"type": "ALLOW", "actions": ["write"], "resource": "docs.*", "roles": ["Editor", "Admin"],
+         "condition": "time.hour >= 9"},
+        {"type": "ALLOW", "actions": ["read"], "resource": "docs.*", "condition": "time.hour >= 9"},
+    ],
+}
+
+
+def test_fast_path_stops_at_the_first_deny():
+    """Rules after an applying DENY are never evaluated, and the cache keeps the compact outcome."""
+    engine = PolicyEngine(POLICY, cache=DecisionCache(max_entries=100))
+    calls = []
+    predicate = engine.predicates[3]
+    engine.predicates[3] = lambda attributes: calls.append(attributes) or predicate(attributes)
+
+    assert engine.is_allowed("bob", "read", "docs.a", {"ip": "10.0.0.1", "time": {"hour": 10}}) is False
+    assert calls == []
+    assert engine.cache.get(
+        engine.version, "bob", "read", "docs.a", {"subject": "bob", "ip": "10.0.0.1", "time": {"hour": 10}}
+    ) is Outcome.DENY
+
+    decision = engine.check_access("bob", "read", "docs.a", {"ip": "1.1.1.1", "time": {"hour": 10}})
+    assert decision == {
+        "allowed": True, "reason": Outcome.ALLOW.reason, "subject": "bob", "action": "read", "resource": "docs.a"
+    }
+
+
+def test_short_circuit_does_not_narrow_the_cache_key():
+    """A DENY cached after a short scan is keyed on every attribute the candidates read."""
+    engine = PolicyEngine(POLICY, cache=DecisionCache(max_entries=100))
+    assert not engine.is_allowed("eve", "read", "docs.a", {"ip": "10.0.0.1", "time": {"hour": 3}})
+    assert not engine.is_allowed("eve", "read", "docs.a", {"ip": "1.1.1.1", "time": {"hour": 3}})
+    assert engine.is_allowed("eve", "read", "docs.a", {"ip": "1.1.1.1", "time": {"hour": 10}})
+    assert not engine.is_allowed("eve", "read", "docs.a", {"ip": "10.0.0.1", "time": {"hour": 10}})
+
+
+def test_explain_reports_rules_inheritance_and_traces():
+    """Explain mode evaluates every candidate and says which rule, role and condition decided."""
+    engine = PolicyEngine(POLICY, cache=DecisionCache(max_entries=100))
+    decision = engine.explain("ana", "read", "docs.a", {"ip": "10.0.0.1", "time": {"hour": 10}})
+
+    assert not decision["allowed"] and decision["reason"] == Outcome.DENY.reason
+    assert [rule["type"] for rule in decision["matched_rules"]] == ["ALLOW", "DENY", "ALLOW"]
+    assert decision["roles"] == {"Admin": ["Admin", "Editor", "Viewer"]}
+
+    granted, denied, conditional = decision["trace"]
+    assert granted["granted_by"] == ["Admin"] and granted["in_scope"]
+    assert denied["attributes"] == {"ip": "10.0.0.1"} and denied["result"] is True
+    assert conditional["attributes"] == {"time.hour": 10} and conditional["result"] is True
+    assert len(engine.cache) == 0
+
+
+def test_explain_traces_out_of_scope_and_failing_conditions():
+    """Rules for roles the subject lacks are traced as out of scope; unreadable attributes fail closed."""
+    engine = PolicyEngine(POLICY)
+    decision = engine.check_access("bob", "write", "docs.a", explain=True)
+
+    assert not decision["allowed"] and decision["matched_rules"] == []
+    assert decision["trace"] == [{
+        "rule": 2, "type": "ALLOW", "resource": "docs.*", "granted_by": [], "in_scope": False
+    }]
+
+    decision = engine.check_access("ana", "write", "docs.a", explain=True)
+    step = decision["trace"][0]
+    assert step["result"] is False and "time" in step["error"] and step["attributes"] == {"time.hour": None}
+
+
+def test_batch_explains_only_the_requests_that_ask():
+    """Batch entries are compact unless they set explain."""
+    engine = PolicyEngine(POLICY)
+    compact, explained = engine.check_access_batch([
+        {"subject": "bob", "action": "read", "resource": "docs.a"},
+        {"subject": "bob", "action": "read", "resource": "docs.a", "explain": True},
+    ])
+    assert compact["allowed"] == explained["allowed"] and "matched_rules" not in compact
+    assert explained["roles"] == {"Viewer": ["Viewer"]}
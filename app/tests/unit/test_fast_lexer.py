@@ -0,0 +1,87 @@
+# tests/test_fast_lexer.py
+
+import random
+import pytest
+from antlr4 import InputStream, CommonTokenStream
+from app.analyzer.fast_lexer import FastLexerError, fast_tokens, tokenize
+from app.api.utils.rpl_analyzer import DEFAULT_WARMUP_CORPUS
+from app.errors.error_handler import RPLErrorListener
+from parsing.RPLLexer import RPLLexer
+
+
+FRAGMENTS = [
+    "role", "ROLE", "Role", "user", "roles", "true", "True", "false", "in", "contains",
+    "valid_from", "_x", "a1", "x", '"', '"', "'", "\\", "\\", "\n", "\r", "\t", " ", " ",
+    "/*", "*/", "//", "/", "*", ".", "1", "23", ".5", "==", "!=", "<", "<=", ">", ">=",
+    "[", "]", "{", "}", ":", ",", "-", "+", "(", ")", "=", "!", "@", "é",
+]
+
+
+def describe(tokens):
+    return [(t.type, t.text, t.line, t.column, t.start, t.stop, t.tokenIndex) for t in tokens]
+
+
+def antlr_tokens(text, line=1, column=0):
+    lexer = RPLLexer(InputStream(text))
+    lexer.line = line
+    lexer.column = column
+    listener = RPLErrorListener()
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(listener)
+    stream = CommonTokenStream(lexer)
+    stream.fill()
+    return describe(stream.tokens), listener.errors
+
+
+def assert_equivalent(text, line=1, column=0):
+    expected, errors = antlr_tokens(text, line, column)
+    try:
+        actual = describe(fast_tokens(text, line, column))
+    except FastLexerError:
+        assert errors, f"fast path rejected valid input {text!r}"
+        return False
+
+    assert not errors, f"fast path accepted invalid input {text!r}"
+    assert actual == expected, text
+    return True
+
+
+def test_matches_antlr_on_fuzzed_corpus():
+    """Token-for-token equivalence on random fragment soup; invalid input must fall back."""
+    accepted = 0
+    for seed in range(3000):
+        rng = random.Random(seed)
+        text = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 30)))
+        accepted += assert_equivalent(text, line=rng.randint(1, 5), column=rng.randint(0, 3))
+
+    assert accepted > 500
+
+
+@pytest.mark.parametrize("text", [
+    '"\\\\"x"',          # a backslash may be plain, so the literal extends to the last quote
+    '"a\\"\n',           # escaped quote closes the literal when the line ends
+    "'\\''", "'\\'",     # CHARACTER: escaped quote vs plain backslash
+    "1. .5 1.5 1..2 a.5",
+    "/* open", "//x\n/", "true trueish TRUE",
+    "Valid_From VALID_UNTIL",
+])
+def test_matches_antlr_on_edge_cases(text):
+    """Longest-match corners of the grammar agree with the generated lexer."""
+    assert_equivalent(text)
+
+
+def test_matches_antlr_on_policy_corpus():
+    """The bundled policies take the fast path and lex identically."""
+    for path in DEFAULT_WARMUP_CORPUS:
+        assert assert_equivalent(path.read_text(encoding="utf-8"))
+
+
+def test_tokenize_falls_back_to_antlr_diagnostics():
+    """Lexical errors are reported exactly as the ANTLR lexer reports them."""
+    text = 'ROLE A { can: [ read ] resources: [ "x ] }\n@'
+    token_stream, errors = tokenize(text)
+    expected, expected_errors = antlr_tokens(text)
+
+    assert describe(token_stream.tokens) == expected
+    assert [(e.line_number, e.column_number, e.message) for e in errors] == \
+        [(e.line_number, e.column_number, e.message) for e in expected_errors]
@@ -0,0 +1,84 @@
+# tests/test_guardrails.py
+
+import pytest
+from app.api.utils.guardrails import (
+    AnalysisLimitError,
+    AnalysisLimits,
+    DiagnosticsSummary,
+    UNLIMITED,
+    cap_diagnostics,
+)
+from app.api.utils.rpl_analyzer import ParseMode, RPLAnalyzerService
+from app.models.error_response import ErrorResponse
+from app.tests.mocks.policy_generator import PolicyShape, generate_policy
+
+
+def limits(**overrides):
+    return AnalysisLimits(**{**UNLIMITED.__dict__, **overrides})
+
+
+def test_oversized_source_is_rejected_before_lexing():
+    """Sources over the byte limit fail fast with a structured limit error."""
+    with pytest.raises(AnalysisLimitError) as e:
+        RPLAnalyzerService.compile_source("ROLE A { can: [ read ] resources: [ x ] }" * 10, limits=limits(max_source_bytes=100))
+
+    assert e.value.as_dict()["limit"] == "max_source_bytes"
+    assert e.value.actual > 100
+
+
+@pytest.mark.asyncio
+async def test_oversized_source_is_rejected_before_the_cache_key(monkeypatch):
+    """The service rejects an oversized body before hashing it for the compile cache on the event loop."""
+    service = RPLAnalyzerService()
+    service.limits = limits(max_source_bytes=100)
+    keyed = []
+    monkeypatch.setattr("app.api.utils.rpl_analyzer.compile_cache_key", lambda *args: keyed.append(args))
+
+    with pytest.raises(AnalysisLimitError):
+        await service.analyze("ROLE A { can: [ read ] resources: [ x ] }" * 10)
+
+    assert keyed == []
+    service.shutdown()
+
+
+def test_token_limit():
+    """Token count is checked before any parsing work."""
+    with pytest.raises(AnalysisLimitError) as e:
+        RPLAnalyzerService.compile_source("ROLE A { can: [ read ] resources: [ x ] }", limits=limits(max_tokens=5))
+
+    assert e.value.limit == "max_tokens"
+
+
+@pytest.mark.parametrize("mode", list(ParseMode))
+def test_parse_deadline_aborts_inside_the_parse(mode):
+    """An expired deadline stops the parser mid-loop in either parse mode."""
+    source = generate_policy(PolicyShape.scaled(200))
+
+    with pytest.raises(AnalysisLimitError) as e:
+        RPLAnalyzerService.compile_source(source, mode, limits=limits(parse_deadline_seconds=1e-9))
+
+    assert e.value.limit == "parse_deadline_seconds"
+
+
+def test_syntax_errors_are_capped_with_summary():
+    """A flood of syntax errors is reported as the first N plus one summary entry."""
+    source = "\n".join("ROLE { }" for _ in range(50))
+
+    result = RPLAnalyzerService.compile_source(source, limits=limits(max_diagnostics=5))
+
+    errors = result["errors"]
+    assert len(errors) == 6
+    assert isinstance(errors[-1], DiagnosticsSummary)
+    assert errors[-1].message == f"{errors[-1].hidden} more errors"
+
+
+def test_cap_diagnostics_folds_earlier_summaries():
+    """Capping merged, already-capped lists keeps an exact hidden count."""
+    lexer = cap_diagnostics([ErrorResponse(f"lex {i}", 1, i) for i in range(4)], 2)
+    parser = cap_diagnostics([ErrorResponse(f"parse {i}", 2, i) for i in range(3)], 2, dropped=10)
+
+    merged = cap_diagnostics(lexer + parser, 3)
+
+    assert [e.message for e in merged[:3]] == ["lex 0", "lex 1", "parse 0"]
+    assert merged[3].hidden == 2 + 11 + 1
+    assert cap_diagnostics(merged, None) is merged
@@ -0,0 +1,231 @@
+# tests/test_incremental_parser.py
+
+import random
+import pytest
+from antlr4 import InputStream, CommonTokenStream
+from parsing.RPLLexer import RPLLexer
+from app.api.utils.guardrails import UNLIMITED, AnalysisLimitError, AnalysisLimits
+from app.api.utils.incremental_parser import IncrementalDocument, TextEdit
+from app.api.utils.rpl_analyzer import RPLAnalyzerService, parse_token_stream, render_parse_tree
+
+
+POLICY = """ROLE Reader {
+    CAN: [ READ ] RESOURCES: [ Data.* ]
+}
+
+// editors
+ROLE Editor EXTENDS Reader {
+    PERMISSIONS: [ { ACTIONS: [ WRITE ], RESOURCES: [ Data.docs ], CONDITIONS: level >= 2 } ]
+}
+USER Alice { ROLE: [ Editor ] } USER Bob { ROLE: [ Reader ] }
+
+GROUP Team { MEMBERS: [ Alice, Bob ], ROLE: [ Reader ] }
+"""
+
+
+def full_parse(text):
+    stream = CommonTokenStream(RPLLexer(InputStream(text)))
+    stream.fill()
+    return parse_token_stream(stream)
+
+
+def statement_snapshot(statements):
+    """Render each statement together with its token positions."""
+    return [
+        (render_parse_tree(s, 10 ** 6), s.start.line, s.start.column, s.stop.line, s.stop.column)
+        for s in statements
+    ]
+
+
+def assert_matches_full_parse(document):
+    tree, errors = full_parse(document.text)
+    if errors:
+        assert document.errors
+        return
+
+    assert not document.errors
+    assert statement_snapshot(document.program().statement()) == statement_snapshot(tree.statement())
+
+
+def test_initial_document_matches_full_parse():
+    """Opening a document parses it into one chunk per statement."""
+    document = IncrementalDocument(POLICY)
+
+    assert document.statement_count == 5
+    assert_matches_full_parse(document)
+
+
+def test_edit_reparses_only_touched_statement():
+    """Editing inside one statement re-parses that statement alone."""
+    document = IncrementalDocument(POLICY)
+    offset = POLICY.index("Data.docs")
+    document.apply_edit(TextEdit(offset, offset + len("Data.docs"), "Data.docs.\n  drafts"))
+
+    assert document.last_reparsed <= 2
+    assert_matches_full_parse(document)
+
+
+def test_broken_edit_is_repaired_by_later_edit():
+    """A syntax error stays local and is re-parsed once the user fixes it."""
+    document = IncrementalDocument(POLICY)
+    offset = POLICY.index("ROLE: [ Reader ] }")
+    document.apply_edit(TextEdit(offset, offset + 1, ""))
+
+    assert document.errors
+    assert_matches_full_parse(document)
+
+    document.apply_edit(TextEdit(offset, offset, "R"))
+    assert not document.errors
+    assert document.text == POLICY
+    assert_matches_full_parse(document)
+
+
+def test_block_comment_spanning_statements():
+    """Opening a block comment re-parses the rest of the document."""
+    document = IncrementalDocument(POLICY)
+    start = POLICY.index("USER Alice")
+    document.apply_edit(TextEdit(start, start, "/*"))
+
+    end = document.text.index("GROUP Team")
+    document.apply_edit(TextEdit(end, end, "*/"))
+
+    assert document.statement_count == 3
+    assert_matches_full_parse(document)
+
+
+def test_path_wildcard_string_is_not_a_comment():
+    """A "/files/*" literal in the edited statement keeps the re-parse local."""
+    text = 'ROLE Files { CAN: [ READ ] RESOURCES: [ "/files/*" ] }\n' + "".join(
+        f"ROLE R{i} {{ CAN: [ READ ] RESOURCES: [ Data.r{i} ] }}\n" for i in range(200)
+    )
+    document = IncrementalDocument(text)
+    offset = text.index("READ")
+    document.apply_edits([TextEdit(offset, offset + len("READ"), "WRITE")])
+
+    assert document.last_reparsed == 1
+    assert_matches_full_parse(document)
+
+
+def test_random_edits_match_full_parse():
+    """Random insertions and deletions always agree with a from-scratch parse."""
+    rng = random.Random(7)
+    snippets = ["\n", " ", "ROLE X { CAN: [ READ ] RESOURCES: [ Y ] }\n", "USER Z { }", "}", "[", "//c\n", "/*", "*/"]
+    document = IncrementalDocument(POLICY)
+
+    for _ in range(60):
+        start = rng.randrange(len(document.text) + 1)
+        end = min(len(document.text), start + rng.randrange(4))
+        document.apply_edit(TextEdit(start, end, rng.choice(snippets + [""])))
+        assert_matches_full_parse(document)
+
+
+def test_edits_do_not_visit_later_statements():
+    """Statements after an edit are moved lazily; positions are right once the program is read."""
+    text = "".join(f"ROLE R{i} {{ CAN: [ READ ] RESOURCES: [ Data.r{i} ] }}\n" for i in range(300))
+    document = IncrementalDocument(text)
+    later = document.chunks[-1].tokens[0]
+    offset_before = later.line_offset
+
+    document.apply_edits([TextEdit(0, 0, "\n\n"), TextEdit(text.index("R1 "), text.index("R1 "), "\n")])
+
+    assert document._resolved <= 4
+    assert later.line_offset == offset_before
+    assert_matches_full_parse(document)
+    assert later.line == 303
+
+
+def semantic_snapshot(result):
+    return [str(error) for error in result["errors"]], [str(warning) for warning in result["warnings"]]
+
+
+def analyze_document(document):
+    return RPLAnalyzerService._semantic_analysis(document.program(), {}, document.declarations)
+
+
+def test_edit_revisits_only_replaced_statements():
+    """Unchanged statements keep their declarations; only the edited role is visited again."""
+    text = "".join(
+        f"ROLE R{i} {{ PERMISSIONS: [ {{ ACTIONS: [ READ ], RESOURCES: [ Data.r{i} ], CONDITIONS: level >= {i} }} ] }}\n"
+        for i in range(200)
+    ) + "USER U { ROLE: [ R7, R150 ] }\n"
+    document = IncrementalDocument(text)
+    analyze_document(document)
+    assert document.declarations.visited == 201
+
+    start = text.index("R150 {")
+    document.apply_edit(TextEdit(start, start + 4, "R151"))
+    result = analyze_document(document)
+
+    assert document.declarations.visited == 1
+    assert len(document.declarations) == document.statement_count
+    tree, _ = full_parse(document.text)
+    assert semantic_snapshot(result) == semantic_snapshot(RPLAnalyzerService._semantic_analysis(tree, {}))
+    assert any("Role 'R151' already declared" in str(error) for error in result["errors"])
+    assert any("Role 'R150' not declared" in str(error) for error in result["errors"])
+
+
+def test_cached_declarations_report_current_positions():
+    """Symbols and diagnostics of reused declarations carry the lines they are on now."""
+    document = IncrementalDocument(POLICY + "ROLE Reader { CAN: [ READ ] RESOURCES: [ Data ] }\n")
+    first = analyze_document(document)
+
+    document.apply_edit(TextEdit(0, 0, "\n\n"))
+    result = analyze_document(document)
+
+    assert document.declarations.visited == document.last_reparsed < document.statement_count
+    assert [error.line_number for error in result["errors"]] == [error.line_number + 2 for error in first["errors"]]
+    assert result["symbol_table"]["users"]["Bob"].line_number == 11
+    assert result["symbol_table"]["roles"]["Editor"].parent_role is result["symbol_table"]["roles"]["Reader"]
+
+
+def test_failing_edit_batch_leaves_document_unchanged():
+    """A batch with an out-of-range edit is rejected before any edit is applied."""
+    document = IncrementalDocument(POLICY)
+
+    with pytest.raises(ValueError):
+        document.apply_edits([TextEdit(0, 0, "// note\n"), TextEdit(len(POLICY) + 20, len(POLICY) + 21, "")])
+
+    assert document.text == POLICY
+    assert_matches_full_parse(document)
+
+
+
+def limits(**overrides):
+    return AnalysisLimits(**{**UNLIMITED.__dict__, **overrides})
+
+
+def test_oversized_edit_batch_is_rejected_before_applying():
+    """The size the edits would produce is checked up front, like a full compile's source check."""
+    document = IncrementalDocument(POLICY, limits=limits(max_source_bytes=len(POLICY) + 10))
+
+    with pytest.raises(AnalysisLimitError) as e:
+        document.apply_edits([TextEdit(0, 0, "// a\n"), TextEdit(0, 0, "// long enough\n")])
+
+    assert e.value.limit == "max_source_bytes"
+    assert document.text == POLICY
+    assert_matches_full_parse(document)
+
+
+def test_token_count_is_kept_per_edit_and_capped():
+    """The document's token count follows its edits; re-lexing past ``max_tokens`` fails before the parse."""
+    document = IncrementalDocument(POLICY, limits=limits(max_tokens=200))
+    rng = random.Random(3)
+
+    for _ in range(20):
+        start = rng.randrange(len(document.text))
+        end = min(len(document.text), start + rng.randrange(8))
+        document.apply_edits([TextEdit(start, end, rng.choice(["", " x ", "}", "ROLE Z { }\n"]))])
+        stream = CommonTokenStream(RPLLexer(InputStream(document.text)))
+        stream.fill()
+        assert document.token_count == len(stream.tokens) - 1
+
+    with pytest.raises(AnalysisLimitError) as e:
+        document.apply_edits([TextEdit(0, 0, "USER U { ROLE: [ Reader ] }\n" * 30)])
+    assert e.value.limit == "max_tokens"
+
+
+def test_reparses_get_the_parse_deadline():
+    """Opening and editing a document run under the same parse deadline as a full compile."""
+    with pytest.raises(AnalysisLimitError) as e:
+        IncrementalDocument(POLICY * 20, limits=limits(parse_deadline_seconds=1e-9))
+    assert e.value.limit == "parse_deadline_seconds"
@@ -0,0 +1,68 @@
+# tests/test_inheritance_cycles.py
+
+import time
+from app.analyzer.policy_ir import RoleIR
+from app.api.validation.semantic_validation import SemanticValidation
+
+
+def chain(names, close_at=None):
+    """Roles where each name extends the previous one; optionally the first extends ``close_at``."""
+    roles = {}
+    parent = None
+    for name in names:
+        parent = roles[name] = RoleIR(name, parent_role=parent)
+    if close_at is not None:
+        roles[names[0]].parent_role = roles[close_at]
+    return roles
+
+
+def cycle_errors(roles):
+    validator = SemanticValidation()
+    validator.get_values(roles, {}, {}, {})
+    validator.detect_circular_inheritance()
+    return [error.message for error in validator.errors]
+
+
+def test_acyclic_roles_pass():
+    """Chains and undefined parents are not cycles."""
+    roles = chain(["A", "B", "C"])
+    roles["D"] = RoleIR("D", parent_role=RoleIR("Undefined"))
+    assert cycle_errors(roles) == []
+
+
+def test_each_cycle_reported_once_with_full_path():
+    """Cycles are reported once, from the role where the search entered them."""
+    roles = chain(["A", "B", "C"], close_at="C")
+    roles["Tail"] = RoleIR("Tail", parent_role=roles["B"])
+    roles["Self"] = RoleIR("Self")
+    roles["Self"].parent_role = roles["Self"]
+
+    assert cycle_errors(roles) == [
+        "Circular inheritance detected: A → C → B → A",
+        "Circular inheritance detected: Self → Self",
+    ]
+
+
+def test_entry_point_follows_declaration_order():
+    """A role outside the cycle that is declared first decides where the path starts."""
+    roles = {"Outside": RoleIR("Outside")}
+    roles.update(chain(["X", "Y"], close_at="Y"))
+    roles["Outside"].parent_role = roles["Y"]
+
+    assert cycle_errors(roles) == ["Circular inheritance detected: Y → X → Y"]
+
+
+def test_deep_hierarchy_stress():
+    """A 100k-deep chain neither recurses nor slows down, and closing it yields one 100k-role cycle."""
+    names = [f"R{i}" for i in range(100_000)]
+    roles = chain(names)
+
+    start = time.perf_counter()
+    assert cycle_errors(roles) == []
+    assert time.perf_counter() - start < 5
+
+    roles["R0"].parent_role = roles["R99999"]
+    errors = cycle_errors(roles)
+    assert len(errors) == 1
+    assert errors[0].count("→") == 100_000
+    assert errors[0].startswith("Circular inheritance detected: R0 → R99999 → R99998")
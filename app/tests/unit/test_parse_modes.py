@@ -0,0 +1,71 @@
+# tests/test_parse_modes.py
+
+from antlr4 import InputStream, CommonTokenStream
+from parsing.RPLLexer import RPLLexer
+from antlr4.tree.Trees import Trees
+from parsing.RPLParser import RPLParser
+from app.api.utils.rpl_analyzer import ParseMode, RPLAnalyzerService, TRUNCATION_MARKER, render_parse_tree
+
+
+VALID_POLICY = """
+ROLE Analyst {
+    PERMISSIONS: [
+        {
+            ACTIONS: [ READ ],
+            RESOURCES: [ Finance.records, Finance.* ],
+            CONDITIONS: (person.level >= 3 AND region IN [ "eu", "us" ]) OR NOT blocked == true
+        }
+    ]
+}
+ROLE Auditor EXTENDS Analyst {
+    CAN: [ READ, * ] RESOURCES: [ "/logs" ]
+}
+USER Alice { ROLE: [ Analyst ], VALID_FROM: "2025-01-01", VALID_UNTIL: "2026-01-01" }
+GROUP Audit { MEMBERS: [ Alice ], ROLE: [ Auditor ] }
+"""
+
+INVALID_POLICY = """
+ROLE { CAN: [ READ ] RESOURCES: [ Data ] }
+USER Bob { ROLE: [ Admin }
+"""
+
+
+def tokens_for(text):
+    stream = CommonTokenStream(RPLLexer(InputStream(text)))
+    stream.fill()
+    return stream
+
+
+def test_two_stage_matches_full_ll_on_valid_input():
+    """SLL succeeds on valid input and yields the same tree as full LL."""
+    sll_tree, sll_errors = RPLAnalyzerService._syntax_analysis(tokens_for(VALID_POLICY), ParseMode.TWO_STAGE)
+    ll_tree, ll_errors = RPLAnalyzerService._syntax_analysis(tokens_for(VALID_POLICY), ParseMode.LL)
+
+    assert sll_errors == ll_errors == []
+    assert render_parse_tree(sll_tree, 10 ** 6) == render_parse_tree(ll_tree, 10 ** 6)
+
+
+def test_two_stage_falls_back_to_ll_diagnostics():
+    """Syntax errors are reported exactly as the full LL parse reports them."""
+    _, two_stage_errors = RPLAnalyzerService._syntax_analysis(tokens_for(INVALID_POLICY), ParseMode.TWO_STAGE)
+    _, ll_errors = RPLAnalyzerService._syntax_analysis(tokens_for(INVALID_POLICY), ParseMode.LL)
+
+    assert len(two_stage_errors) > 0
+    assert two_stage_errors == ll_errors
+
+
+def test_rendered_tree_matches_antlr_format():
+    """The debug rendering is identical to Trees.toStringTree when under the cap."""
+    tree, _ = RPLAnalyzerService._syntax_analysis(tokens_for(VALID_POLICY))
+    expected = Trees.toStringTree(tree, ruleNames=RPLParser.ruleNames)
+
+    assert render_parse_tree(tree, len(expected)) == expected
+
+
+def test_rendered_tree_is_capped():
+    """Rendering stops at the size cap and marks the output as truncated."""
+    tree, _ = RPLAnalyzerService._syntax_analysis(tokens_for(VALID_POLICY))
+    rendered = render_parse_tree(tree, 40)
+
+    assert rendered.endswith(TRUNCATION_MARKER)
+    assert len(rendered) == 40 + len(TRUNCATION_MARKER)
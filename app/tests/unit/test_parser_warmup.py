@@ -0,0 +1,34 @@
+# tests/test_parser_warmup.py
+
+from antlr4 import InputStream, CommonTokenStream
+from app.api.utils.rpl_analyzer import DEFAULT_WARMUP_CORPUS, parse_token_stream, warm_up_parser
+from parsing.RPLLexer import RPLLexer
+from parsing.RPLParser import RPLParser
+
+
+def test_warmup_corpus_covers_every_parser_rule():
+    """The bundled corpus parses cleanly and reaches every rule of the grammar."""
+    seen = set()
+    for path in DEFAULT_WARMUP_CORPUS:
+        token_stream = CommonTokenStream(RPLLexer(InputStream(path.read_text(encoding="utf-8"))))
+        tree, errors = parse_token_stream(token_stream)
+        assert errors == [], path
+
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if hasattr(node, "getRuleIndex"):
+                seen.add(node.getRuleIndex())
+            stack.extend(getattr(node, "children", None) or [])
+
+    missing = [name for index, name in enumerate(RPLParser.ruleNames) if index not in seen]
+    assert missing == []
+
+
+def test_warm_up_reports_corpus_stats(tmp_path):
+    """Unreadable corpus files are skipped rather than failing startup."""
+    report = warm_up_parser(list(DEFAULT_WARMUP_CORPUS) + [tmp_path / "missing.rpl"])
+
+    assert report["files"] == len(DEFAULT_WARMUP_CORPUS)
+    assert report["statements"] > 0
+    assert report["elapsed_seconds"] >= 0
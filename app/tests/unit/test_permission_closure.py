@@ -0,0 +1,99 @@
+# tests/test_permission_closure.py
+
+import sys
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.permission_closure import PermissionClosure
+from app.analyzer.policy_ir import PermissionIR, RoleIR, UserIR
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.services.roles_service import RoleCatalog
+from app.api.utils.rpl_analyzer import parse_token_stream
+from app.models.permission import PermissionBlock
+from app.models.role import Role
+from app.tests.mocks.policy_generator import PolicyShape, generate_policy
+
+
+def test_matches_recursive_resolution():
+    """The closure gives exactly what get_all_permissions computes, for every user and role."""
+    shape = PolicyShape(roles=60, users=40, groups=0, resources=10, inheritance_depth=7)
+    token_stream, _ = tokenize(generate_policy(shape, seed=3))
+    tree, errors = parse_token_stream(token_stream)
+    assert errors == []
+
+    analyzer = SemanticAnalyzer({})
+    analyzer.visit(tree)
+    closure = PermissionClosure(analyzer.roles)
+
+    for name, role in analyzer.roles.items():
+        assert list(closure.permissions(name)) == role.get_all_permissions(analyzer.roles)
+    for name, user in analyzer.users.items():
+        assert analyzer.validator.get_user_permissions(name) == user.get_all_permissions(analyzer.roles)
+
+
+class CountingRole:
+    """Duck-typed role that records every read of its own permissions."""
+    reads = []
+
+    def __init__(self, name, permissions, parent_role=None):
+        self.name = name
+        self._permissions = permissions
+        self.parent_role = parent_role
+
+    @property
+    def permissions(self):
+        CountingRole.reads.append(self.name)
+        return self._permissions
+
+
+def test_deep_hierarchy_resolved_once():
+    """Each role's own permissions are read once, however deep the chain and however many users."""
+    CountingRole.reads = []
+    depth = sys.getrecursionlimit() * 2
+    roles = {}
+    parent = None
+    for i in range(depth):
+        parent = roles[f"R{i}"] = CountingRole(f"R{i}", [PermissionIR(("read",), (f"res{i}",))], parent)
+
+    closure = PermissionClosure(roles)
+    users = [UserIR(f"U{i}", roles=[roles[f"R{depth - 1}"], roles["R0"]]) for i in range(100)]
+
+    assert len(closure.permissions(f"R{depth - 1}")) == depth
+    assert all(len(closure.user_permissions(user)) == depth + 1 for user in users)
+    assert closure.permissions("missing") == ()
+    assert len(CountingRole.reads) == depth
+
+
+def test_cycles_terminate():
+    """A cycle (reported by validation) must not hang resolution."""
+    a = RoleIR("A", [PermissionIR(("read",), ("x",))])
+    b = RoleIR("B", [PermissionIR(("write",), ("y",))], parent_role=a)
+    a.parent_role = b
+
+    closure = PermissionClosure({"A": a, "B": b})
+    assert set(closure.permissions("A")) | set(closure.permissions("B")) == set(a.permissions + b.permissions)
+
+
+def test_catalog_snapshot_caches_its_closure():
+    """A catalog snapshot builds its closure once; a reloaded snapshot gets a fresh one."""
+    base = RoleIR("Base", [PermissionIR(("read",), ("x",))])
+    first = RoleCatalog(version="1", roles={"Base": base})
+
+    assert first.closure is first.closure
+    assert first.closure.permissions("Base") == tuple(base.permissions)
+
+    child = RoleIR("Child", [PermissionIR(("write",), ("y",))], parent_role=base)
+    second = RoleCatalog(version="2", roles={"Base": base, "Child": child})
+    assert second.closure is not first.closure
+    assert len(second.closure.permissions("Child")) == 2
+
+
+def test_persisted_rows_are_deduplicated_by_identity():
+    """PermissionBlock rows are unhashable; the same row inherited twice still appears once."""
+    shared = PermissionBlock(actions=["read"], resources=["x"])
+    base = Role(name="Base", permissions=[shared], attributes={})
+    child = Role(name="Child", permissions=[shared, PermissionBlock(actions=["read"], resources=["x"])],
+                 parent_role=base, attributes={})
+
+    closure = PermissionClosure({"Base": base, "Child": child})
+
+    assert len(closure.permissions("Child")) == 2
+    assert closure.permissions("Child")[0] is shared
@@ -0,0 +1,87 @@
+# tests/test_policy_ir.py
+
+from sqlmodel import Session, select
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.policy_ir import PermissionIR, PolicyRows, RoleIR, UserIR
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.database.database import DatabaseHandler, engine
+from app.api.services.roles_service import RoleCatalog
+from app.api.utils.rpl_analyzer import parse_token_stream
+from app.models.enums import Action
+from app.models.role import Role
+from app.models.user import User
+
+POLICY = """
+ROLE Reader { can: [ read ] resources: [ Data.* ] }
+ROLE Editor extends Reader {
+    permissions: [ { actions: [ write ], resources: [ "/docs/*" ], conditions: (level >= 3) } ]
+}
+USER Ana { ROLE: [ Editor, Persisted ] }
+USER Bo { ROLE: [ Reader ] }
+"""
+
+
+def analyze(source, catalog):
+    token_stream, _ = tokenize(source)
+    tree, errors = parse_token_stream(token_stream)
+    assert errors == []
+    analyzer = SemanticAnalyzer(catalog)
+    assert analyzer.visit(tree)
+    return analyzer
+
+
+def test_analyzer_builds_slotted_ir():
+    """Declarations become lightweight IR objects; persisted roles stay rows."""
+    persisted = Role(name="Persisted", permissions=[], attributes={})
+    analyzer = analyze(POLICY, {"Persisted": persisted})
+
+    editor = analyzer.roles["Editor"]
+    assert isinstance(editor, RoleIR) and not hasattr(editor, "__dict__")
+    assert editor.permissions == [PermissionIR(
+        ("write",), ("/docs/*",), "(level>=3)", (("load", "level"), ("const", 3), ("cmp", ">=")), Action.WRITE)
+    ]
+    assert editor.parent_role is analyzer.roles["Reader"]
+    assert isinstance(analyzer.users["Ana"], UserIR)
+    assert analyzer.users["Ana"].roles == [editor, persisted]
+    assert len(analyzer.validator.get_user_permissions("Ana")) == 2
+
+
+def test_rows_share_roles_and_persist():
+    """Conversion yields one row per IR role, linked from parents and users alike."""
+    analyzer = analyze(POLICY.replace(", Persisted", ""), {})
+    rows = PolicyRows()
+
+    roles = [rows.convert(role) for role in analyzer.roles.values()]
+    users = [rows.convert(user) for user in analyzer.users.values()]
+
+    reader, editor = roles
+    assert isinstance(editor, Role) and editor.parent_role is reader
+    assert users[0].roles == [editor] and users[1].roles == [reader]
+    assert editor.permissions[0].actions == ["write"]
+    assert editor.permissions[0].action_mask == Action.WRITE
+
+    with Session(engine) as session:
+        DatabaseHandler(session, Role).create_all(roles)
+        DatabaseHandler(session, User).create_all(users)
+        assert editor.parent_role_id == reader.id
+        assert [role.name for role in session.get(User, users[0].id).roles] == ["Editor"]
+
+
+def test_detached_catalog_roles_save_as_the_persisted_rows():
+    """Analyses see detached copies of persisted roles; saving links users to the existing rows."""
+    with Session(engine) as session:
+        persisted = Role(name="PersistedRow", permissions=[], attributes={})
+        session.add(persisted)
+        session.commit()
+        live = {"PersistedRow": persisted}
+        detached = RoleCatalog(version="v", roles=live).detached
+
+        analyzer = analyze("USER Cy { ROLE: [ PersistedRow ] }", detached)
+        assert analyzer.users["Cy"].roles[0] is not persisted
+
+        rows = PolicyRows(live)
+        DatabaseHandler(session, Role).create_all(rows.convert(role) for role in analyzer.roles.values())
+        users = DatabaseHandler(session, User).create_all(rows.convert(user) for user in analyzer.users.values())
+
+        assert users[0].roles == [persisted]
+        assert len(session.exec(select(Role).where(Role.name == "PersistedRow")).all()) == 1
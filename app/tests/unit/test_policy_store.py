@@ -0,0 +1,73 @@
+# tests/test_policy_store.py
+
+import threading
+from app.api.utils.decision_cache import DecisionCache
+from app.api.utils.policy_store import PolicyStore, policy_version
+
+
+def policy(resource):
+    return {
+        "users": {"ana": {"roles": ["Viewer"]}},
+        "policies": [{"type": "ALLOW", "actions": ["read"], "resource": resource, "roles": ["Viewer"]}],
+    }
+
+
+def test_swap_is_atomic_and_old_snapshots_keep_answering():
+    """A snapshot taken before a reload keeps its decisions; new checks see the new version."""
+    store = PolicyStore(DecisionCache(max_entries=100))
+    old = store.publish(policy("docs.*"))
+    assert old.engine.check_access("ana", "read", "docs.a")["allowed"]
+
+    new = store.publish(policy("wiki.*"))
+    assert store.current() is new and new.version != old.version
+    assert old.engine.check_access("ana", "read", "docs.a")["allowed"]
+    assert not new.engine.check_access("ana", "read", "docs.a")["allowed"]
+    assert new.engine.check_access("ana", "read", "wiki.a")["allowed"]
+
+
+def test_same_content_keeps_the_snapshot():
+    """Publishing an unchanged policy is a no-op; the version is a content digest."""
+    store = PolicyStore(DecisionCache(max_entries=100))
+    first = store.publish(policy("docs.*"))
+    assert store.publish(policy("docs.*")) is first
+    assert policy_version(policy("docs.*")) == first.version
+
+
+def test_new_version_is_prewarmed_from_hot_keys():
+    """Context-free decisions that were hot before the swap are cached for the new version."""
+    cache = DecisionCache(max_entries=100)
+    store = PolicyStore(cache, prewarm_keys=10)
+    old = store.publish(policy("docs.*"))
+    for name in "abc":
+        old.engine.check_access("ana", "read", f"docs.{name}")
+
+    new = store.publish({**policy("docs.*"), "resources": {"extra": {}}})
+    hits = cache.hits
+    for name in "abc":
+        assert new.engine.check_access("ana", "read", f"docs.{name}")["allowed"]
+    assert cache.hits == hits + 3
+
+
+def test_concurrent_checks_see_one_version_or_the_other():
+    """Readers racing a stream of reloads never see a decision from neither policy."""
+    store = PolicyStore(DecisionCache(max_entries=100))
+    store.publish(policy("docs.*"))
+    errors = []
+
+    def reader():
+        for _ in range(2000):
+            snapshot = store.current()
+            docs = snapshot.engine.check_access("ana", "read", "docs.a")["allowed"]
+            wiki = snapshot.engine.check_access("ana", "read", "wiki.a")["allowed"]
+            if docs == wiki:
+                errors.append(snapshot.version)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(50):
+        store.publish(policy("wiki.*" if i % 2 == 0 else "docs.*"))
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
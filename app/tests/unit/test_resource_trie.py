@@ -0,0 +1,87 @@
+# tests/test_resource_trie.py
+
+import random
+from app.api.utils.resource_trie import ResourceTrie, split_segments, wildcard_regex
+
+PATTERNS = [
+    "api.users.list",
+    "api.*.list",
+    "api.users.*",
+    "*",
+    "/files/123/*",
+    "/files/*/report",
+    "api/users/list",
+    "db.t*",
+    "/docs/*.pdf",
+    "/docs/report-*",
+]
+
+
+def matching(resource):
+    trie = ResourceTrie((pattern, pattern) for pattern in PATTERNS)
+    return sorted(trie.match(resource))
+
+
+def test_exact_single_and_trailing_wildcards():
+    """Whole-segment wildcards match one segment inside a pattern and everything below at its end."""
+    assert matching("api.users.list") == sorted(["api.users.list", "api.*.list", "api.users.*", "*"])
+    assert matching("api.orders.list") == ["*", "api.*.list"]
+    assert matching("api.users.a.b") == ["*", "api.users.*"]
+    assert matching("api.users") == ["*"]
+    assert matching("api.a.b.list") == ["*"]
+
+
+def test_path_style_and_separators_are_distinct():
+    """Dotted and slash references never match each other's patterns."""
+    assert matching("api/users/list") == ["*", "api/users/list"]
+    assert matching("/files/123/a/b") == ["*", "/files/123/*"]
+    assert matching("/files/9/report") == ["*", "/files/*/report"]
+    assert matching("/files/a.b/report") == ["*"]
+    assert matching("/docs/b.pdf") == ["*", "/docs/*.pdf"]
+    assert matching("/docs/a/b.pdf") == ["*"]
+
+
+def test_partial_segment_wildcards_fall_back_to_regex():
+    """'*' inside a segment is matched with a once-compiled, escaped regex."""
+    assert matching("db.t1") == ["*", "db.t*"]
+    assert matching("dbXt1") == ["*"]
+    assert matching("/docs/report-1/x") == ["*", "/docs/report-*"]
+
+
+def reference_match(pattern, resource):
+    """Direct segment-by-segment reading of the documented semantics."""
+    pattern_segments = split_segments(pattern)
+    if any("*" in s and s != "*" for s in pattern_segments):
+        return bool(wildcard_regex(pattern).match(resource))
+
+    segments = split_segments(resource)
+    for position, expected in enumerate(pattern_segments):
+        if expected == "*" and position == len(pattern_segments) - 1:
+            return len(segments) > position
+        if position >= len(segments):
+            return False
+        if expected == "*":
+            if segments[position] in (".", "/"):
+                return False
+        elif segments[position] != expected:
+            return False
+    return len(segments) == len(pattern_segments)
+
+
+def test_matches_reference_on_random_patterns():
+    """The trie agrees with a brute-force matcher on thousands of generated patterns and resources."""
+    rng = random.Random(0)
+    words = ["a", "b", "api", "", "*", "x*", "*b", "a*x"]
+
+    def name():
+        parts = [rng.choice(words) for _ in range(rng.randint(1, 4))]
+        return "".join(part + rng.choice(".//.") for part in parts[:-1]) + parts[-1]
+
+    patterns = [name() for _ in range(400)]
+    trie = ResourceTrie((pattern, i) for i, pattern in enumerate(patterns))
+    assert len(trie) == len(patterns)
+
+    for _ in range(1000):
+        resource = name().replace("*", "z")
+        expected = [i for i, pattern in enumerate(patterns) if reference_match(pattern, resource)]
+        assert sorted(trie.match(resource)) == expected, resource
@@ -0,0 +1,80 @@
+# tests/test_role_catalog.py
+
+import pytest
+from types import MappingProxyType
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.services import roles_service
+from app.api.services.roles_service import RoleCatalog, RoleCatalogCache
+from app.api.utils.rpl_analyzer import RPLAnalyzerService, parse_token_stream
+from app.models.role import Role
+
+
+def parse(source):
+    token_stream, _ = tokenize(source)
+    tree, errors = parse_token_stream(token_stream)
+    assert errors == []
+    return tree
+
+
+def count_role_queries(monkeypatch):
+    calls = []
+    original = roles_service.RoleService.get_roles
+
+    def counting_get_roles(self):
+        calls.append(1)
+        return original(self)
+
+    monkeypatch.setattr(roles_service.RoleService, "get_roles", counting_get_roles)
+    return calls
+
+
+def test_injected_catalog_resolves_without_queries(monkeypatch):
+    """With an injected snapshot, role and user declarations never touch the database."""
+    calls = count_role_queries(monkeypatch)
+    persisted = Role(name="Persisted", permissions=[], attributes={})
+    source = "ROLE Local extends Persisted { can: [ read ] resources: [ x ] }\n" + "\n".join(
+        f"USER U{i} {{ ROLE: [ Persisted, Local ] }}" for i in range(50)
+    )
+
+    analyzer = SemanticAnalyzer(MappingProxyType({"Persisted": persisted}))
+    assert analyzer.visit(parse(source))
+
+    assert calls == []
+    assert analyzer.roles["Local"].parent_role is persisted
+    assert analyzer.users["U49"].roles[0] is persisted
+
+
+def test_catalog_loaded_once_per_analysis(monkeypatch):
+    """Without injection the process-wide cache is queried at most once, however many declarations."""
+    calls = count_role_queries(monkeypatch)
+    monkeypatch.setattr(roles_service, "role_catalog", RoleCatalogCache())
+    monkeypatch.setattr("app.analyzer.semantic_analyzer.role_catalog_cache", roles_service.role_catalog)
+    source = "\n".join(f"ROLE R{i} {{ can: [ read ] resources: [ x ] }}" for i in range(30)) + "\n" + "\n".join(
+        f"USER U{i} {{ ROLE: [ R{i} ] }}" for i in range(30)
+    )
+
+    RPLAnalyzerService.compile_source(source)
+    RPLAnalyzerService.compile_source(source)
+
+    assert len(calls) == 1
+
+
+def test_catalog_version_tracks_content(monkeypatch):
+    """Reloads keep the version while roles are unchanged; invalidation picks up writes."""
+    rows = [Role(id=1, name="A", permissions=[], attributes={})]
+    monkeypatch.setattr(roles_service.RoleService, "get_roles", lambda self: list(rows))
+    cache = RoleCatalogCache(ttl_seconds=0)
+
+    first = cache.get()
+    assert cache.get().version == first.version
+
+    rows.append(Role(id=2, name="B", permissions=[], attributes={}))
+    cache.invalidate()
+    second = cache.get()
+
+    assert isinstance(second, RoleCatalog)
+    assert second.version != first.version
+    assert set(second.roles) == {"A", "B"}
+    with pytest.raises(TypeError):
+        second.roles["C"] = rows[0]
@@ -0,0 +1,68 @@
+# tests/test_rule_index.py
+
+import random
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.resource_trie import ResourceTrie
+from app.api.utils.rule_index import RuleIndex
+from app.models.enums import Action
+
+ACTIONS = ["read", "write", "delete", "deploy", "*", "list", "archive"]
+PATTERNS = ["*", "api.*", "api.users.*", "api.*.read", "api.users.read", "/files/*", "/files/1/*", "db.t*", ""]
+RESOURCES = ["api.users.read", "api.orders.read", "api.users", "/files/1/a", "/files/2", "db.t1", "other", ""]
+
+
+def random_rules(rng, count):
+    return [
+        {
+            "type": rng.choice(["ALLOW", "ALLOW", "DENY"]),
+            "actions": rng.sample(ACTIONS, rng.randint(1, 3)),
+            "resource": rng.choice(PATTERNS),
+        }
+        for _ in range(count)
+    ]
+
+
+def linear_scan(rules, action, resource):
+    """Every rule, in order, with the engine's matching semantics."""
+    requested = Action.parse(action)
+    matched = []
+    for rule in rules:
+        if requested is not None:
+            if Action.mask(rule["actions"]) & requested != requested:
+                continue
+        elif action not in rule["actions"] and "*" not in rule["actions"]:
+            continue
+        if not ResourceTrie([(rule["resource"], 0)]).match(resource):
+            continue
+        matched.append(rule)
+    return matched
+
+
+def test_index_finds_exactly_the_linear_matches():
+    """Candidates equal a full scan, in declaration order, for vocabulary, '*' and unknown actions."""
+    rng = random.Random(5)
+    for _ in range(20):
+        rules = random_rules(rng, 60)
+        index = RuleIndex(rules, [Action.mask(rule["actions"]) for rule in rules])
+        for action in ACTIONS + ["unknown"]:
+            for resource in RESOURCES:
+                expected = linear_scan(rules, action, resource)
+                found = [rules[i] for i in index.candidates(action, resource, Action.parse(action))]
+                assert found == expected, (action, resource)
+
+
+def test_engine_decisions_unchanged():
+    """DENY still overrides ALLOW, and matched rules are reported in declaration order."""
+    rng = random.Random(9)
+    rules = random_rules(rng, 300)
+    engine = PolicyEngine({"policies": rules})
+
+    for _ in range(500):
+        action, resource = rng.choice(ACTIONS + ["unknown"]), rng.choice(RESOURCES)
+        matched = linear_scan(rules, action, resource)
+        decision = engine.check_access("ana", action, resource, explain=True)
+
+        assert decision["matched_rules"] == matched
+        assert decision["allowed"] == (
+            any(r["type"] == "ALLOW" for r in matched) and not any(r["type"] == "DENY" for r in matched)
+        )
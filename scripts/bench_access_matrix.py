@@ -0,0 +1,90 @@
+"""
+Benchmark the dense access matrix against the rule evaluator on generated
+policies: compile time, matrix size, and per-decision time for requests on
+declared resources (decision cache off for both).
+
+Usage:
+    python scripts/bench_access_matrix.py [--statements 2000 10000] [--decisions 20000] [--seed 0]
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import structlog
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.services.enforcement_service import build_policy_data
+from app.api.utils.access_matrix import AccessMatrix
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.decision_cache import DecisionCache
+from app.api.utils.rpl_analyzer import parse_token_stream
+from app.tests.mocks.policy_generator import ACTIONS, PolicyShape, generate_policy
+
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+
+def analyze(statements: int, seed: int) -> SemanticAnalyzer:
+    token_stream, _ = tokenize(generate_policy(PolicyShape.scaled(statements), seed))
+    tree, _ = parse_token_stream(token_stream)
+    analyzer = SemanticAnalyzer({})
+    analyzer.visit(tree)
+    return analyzer
+
+
+# Satisfies the attributes generated conditions read, so they evaluate instead of failing.
+CONTEXT = {"person": {"level": 5}, "region": "eu", "device": {"trusted": True}, "tags": ["x"], "request": {"size": 2048}}
+
+
+def timed(engine: PolicyEngine, requests: list) -> float:
+    start = time.perf_counter()
+    for subject, action, resource in requests:
+        engine.check_access(subject, action, resource, CONTEXT)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--statements", type=int, nargs="+", default=[2000, 10000])
+    arg_parser.add_argument("--decisions", type=int, default=20000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    print(f"{'statements':>10} {'users':>6} {'columns':>8} {'MiB':>6} {'compile ms':>11} "
+          f"{'rules us':>9} {'matrix us':>10} {'answered':>9}")
+    for statements in args.statements:
+        analyzer = analyze(statements, args.seed)
+        users, groups = list(analyzer.users.values()), list(analyzer.groups.values())
+        policy = build_policy_data(analyzer.roles, users, groups)
+
+        start = time.perf_counter()
+        matrix = AccessMatrix.compile(analyzer.roles, users, analyzer.resources.values(), groups)
+        compile_time = time.perf_counter() - start
+
+        rules_only = PolicyEngine(policy, cache=DecisionCache(max_entries=0))
+        dense = PolicyEngine(policy, cache=DecisionCache(max_entries=0), matrix=matrix)
+
+        rng = random.Random(args.seed)
+        requests = [
+            (rng.choice(matrix.users), rng.choice(ACTIONS), rng.choice(matrix.resources))
+            for _ in range(args.decisions)
+        ]
+        answered = sum(matrix.lookup(*request) is not None for request in requests) / len(requests)
+
+        rules_time, dense_time = timed(rules_only, requests), timed(dense, requests)
+        print(f"{statements:>10} {len(matrix.users):>6} {len(matrix.resources):>8} "
+              f"{2 * len(matrix) / 2 ** 20:>6.1f} {compile_time * 1e3:>11.1f} "
+              f"{rules_time / len(requests) * 1e6:>9.2f} {dense_time / len(requests) * 1e6:>10.2f} {answered:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
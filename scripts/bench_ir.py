@@ -0,0 +1,113 @@
+"""
+Compare the slotted policy IR with the SQLModel rows the analyzer used to build.
+
+For each size, a generated policy is parsed once; then the semantic pass is
+timed building IR symbol tables, and the same tables are converted into
+SQLModel rows (exactly the objects the analyzer built before the IR). The
+IR column includes the tree walk; the rows column is row construction alone,
+i.e. what the analyzer paid on top of the walk before. Memory is what each
+representation keeps alive.
+
+Usage:
+    python scripts/bench_ir.py [--sizes 10000 100000] [--repeat 3]
+"""
+
+import gc
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Analyzer modules read these at import time; benchmarks never touch a real database.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import structlog
+from app.analyzer.fast_lexer import tokenize
+from app.analyzer.policy_ir import PolicyRows
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.utils.rpl_analyzer import parse_token_stream
+from app.tests.mocks.policy_generator import PolicyShape, generate_policy
+import app.models.auth_models  # noqa: F401  (User.details -> UserDetails)
+
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+KINDS = ("roles", "users", "resources", "groups")
+
+
+def build_ir(tree) -> SemanticAnalyzer:
+    # An empty catalog keeps the database out of the measurement.
+    analyzer = SemanticAnalyzer({})
+    for statement in tree.statement():
+        analyzer.visit(statement)
+    return analyzer
+
+
+def build_rows(analyzer: SemanticAnalyzer) -> dict:
+    rows = PolicyRows()
+    return {kind: [rows.convert(item) for item in getattr(analyzer, kind).values()] for kind in KINDS}
+
+
+def timed(build, *args):
+    gc.collect()
+    start = time.perf_counter()
+    result = build(*args)
+    return result, time.perf_counter() - start
+
+
+def retained_bytes(build, *args):
+    """Bytes still allocated by ``build``'s result; traced separately, tracemalloc skews timings."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(*args)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    print(f"{'statements':>10} {'ir s':>9} {'rows s':>9} {'ir MiB':>9} {'rows MiB':>9} {'memory':>7}")
+    for size in args.sizes:
+        shape = PolicyShape.scaled(size)
+        token_stream, _ = tokenize(generate_policy(shape, args.seed))
+        tree, errors = parse_token_stream(token_stream)
+        if errors:
+            raise RuntimeError(f"generated policy failed to parse: {errors[:3]}")
+
+        ir_times, row_times = [], []
+        for _ in range(args.repeat):
+            analyzer, elapsed = timed(build_ir, tree)
+            ir_times.append(elapsed)
+            rows, elapsed = timed(build_rows, analyzer)
+            row_times.append(elapsed)
+            del analyzer, rows
+
+        analyzer, ir_bytes = retained_bytes(build_ir, tree)
+        rows, row_bytes = retained_bytes(build_rows, analyzer)
+        del analyzer, rows
+
+        ir_mib = ir_bytes / 2 ** 20
+        rows_mib = row_bytes / 2 ** 20
+        print(
+            f"{shape.statements:>10} {statistics.median(ir_times):>9.3f} {statistics.median(row_times):>9.3f} "
+            f"{ir_mib:>9.1f} {rows_mib:>9.1f} {rows_mib / ir_mib:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
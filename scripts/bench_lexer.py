@@ -0,0 +1,75 @@
+"""
+Benchmark the regex fast-path tokenizer against the generated ANTLR lexer.
+
+Usage:
+    python scripts/bench_lexer.py [--sizes 1000 5000 10000 50000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Analyzer modules read these at import time; benchmarks never touch a real database.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import structlog
+from antlr4 import CommonTokenStream, InputStream
+from parsing.RPLLexer import RPLLexer
+from app.analyzer.fast_lexer import tokenize
+from app.tests.mocks.policy_generator import PolicyShape, generate_policy
+
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+
+def antlr_lex(source: str) -> CommonTokenStream:
+    stream = CommonTokenStream(RPLLexer(InputStream(source)))
+    stream.fill()
+    return stream
+
+
+def fast_lex(source: str) -> CommonTokenStream:
+    stream, errors = tokenize(source)
+    if errors:
+        raise RuntimeError(f"unexpected lexical errors: {errors}")
+    return stream
+
+
+def best_of(repeat: int, lex, source: str) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stream = lex(source)
+        timings.append(time.perf_counter() - start)
+    return min(timings), stream
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 50000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    print(f"{'statements':>10} {'tokens':>10} {'antlr (s)':>10} {'fast (s)':>10} {'speedup':>8}")
+    for size in args.sizes:
+        source = generate_policy(PolicyShape.scaled(size))
+        antlr_time, antlr_stream = best_of(args.repeat, antlr_lex, source)
+        fast_time, fast_stream = best_of(args.repeat, fast_lex, source)
+
+        if [(t.type, t.text) for t in antlr_stream.tokens] != [(t.type, t.text) for t in fast_stream.tokens]:
+            raise RuntimeError(f"token streams differ for {size} statements")
+
+        print(
+            f"{size:>10} {len(fast_stream.tokens):>10} {antlr_time:>10.3f} "
+            f"{fast_time:>10.3f} {antlr_time / fast_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
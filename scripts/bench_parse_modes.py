@@ -0,0 +1,73 @@
+"""
+Benchmark two-stage (SLL, then LL on failure) parsing against full LL parsing.
+
+Usage:
+    python scripts/bench_parse_modes.py [--sizes 1000 5000 10000 50000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Analyzer modules read these at import time; benchmarks never touch a real database.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import structlog
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.dfa.DFA import DFA
+from parsing.RPLLexer import RPLLexer
+from parsing.RPLParser import RPLParser
+from app.api.utils.rpl_analyzer import ParseMode, RPLAnalyzerService
+from app.tests.mocks.policy_generator import PolicyShape, generate_policy
+
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+
+def reset_dfa():
+    """Drop the parser's shared DFA cache so each run starts cold."""
+    RPLParser.decisionsToDFA = [DFA(ds, i) for i, ds in enumerate(RPLParser.atn.decisionToState)]
+
+
+def tokenize(source: str) -> CommonTokenStream:
+    stream = CommonTokenStream(RPLLexer(InputStream(source)))
+    stream.fill()
+    return stream
+
+
+def time_parse(stream: CommonTokenStream, mode: ParseMode) -> float:
+    stream.seek(0)
+    start = time.perf_counter()
+    tree, errors = RPLAnalyzerService._syntax_analysis(stream, mode)
+    elapsed = time.perf_counter() - start
+
+    if tree is None or errors:
+        raise RuntimeError(f"{mode.value} parse failed: {errors}")
+    return elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 50000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    print(f"{'statements':>10} {'mode':>10} {'cold (s)':>10} {'warm (s)':>10}")
+    for size in args.sizes:
+        stream = tokenize(generate_policy(PolicyShape.scaled(size)))
+
+        for mode in (ParseMode.LL, ParseMode.TWO_STAGE):
+            reset_dfa()
+            cold = time_parse(stream, mode)
+            warm = min(time_parse(stream, mode) for _ in range(args.repeat))
+            print(f"{size:>10} {mode.value:>10} {cold:>10.3f} {warm:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
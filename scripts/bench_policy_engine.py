@@ -0,0 +1,179 @@
+"""
+Benchmark PolicyEngine decisions on a large rule set: the indexed candidate
+lookup (RuleIndex) against a full scan of every rule, with identical
+matching semantics. Every decision is cross-checked between the two, and the
+fast path (stops at the first DENY) against explain mode (reports every
+matched rule and a condition trace). Then
+check_access_batch against one check_access per request for page-sized
+batches (many subjects, few resources), with the decision cache off.
+
+Usage:
+    python scripts/bench_policy_engine.py [--rules 50000] [--decisions 2000] [--batch 200] [--seed 0]
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import structlog
+from app.api.utils.access_service import PolicyEngine
+from app.api.utils.decision_cache import DecisionCache
+from app.api.utils.resource_trie import ResourceTrie
+
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+ACTIONS = ["read", "write", "modify", "start", "stop", "deploy", "delete", "execute"]
+
+
+def generate_rules(count: int, rng: random.Random) -> list:
+    services = max(count // 20, 1)
+    patterns = [
+        lambda: f"svc.s{rng.randrange(services)}.*",
+        lambda: f"svc.s{rng.randrange(services)}.r{rng.randrange(20)}",
+        lambda: f"api.v{rng.randrange(10)}.*.read",
+        lambda: f"/files/{rng.randrange(services)}/*",
+        lambda: f"db.t{rng.randrange(services)}*",
+    ]
+    rules = []
+    for _ in range(count):
+        rule = {
+            "type": "DENY" if rng.random() < 0.2 else "ALLOW",
+            "actions": ["*"] if rng.random() < 0.02 else rng.sample(ACTIONS, rng.randint(1, 3)),
+            "resource": rng.choice(patterns)(),
+        }
+        if rng.random() < 0.1:
+            rule["condition"] = f"level >= {rng.randrange(5)}"
+        rules.append(rule)
+    return rules
+
+
+def generate_requests(count: int, rules: int, rng: random.Random) -> list:
+    services = max(rules // 20, 1)
+    resources = [
+        lambda: f"svc.s{rng.randrange(services)}.r{rng.randrange(20)}",
+        lambda: f"api.v{rng.randrange(10)}.users.read",
+        lambda: f"/files/{rng.randrange(services)}/report.pdf",
+        lambda: f"db.t{rng.randrange(services)}",
+        lambda: f"unknown.{rng.randrange(1000)}",
+    ]
+    return [
+        (f"user{rng.randrange(100)}", rng.choice(ACTIONS), rng.choice(resources)(), {"level": rng.randrange(5)})
+        for _ in range(count)
+    ]
+
+
+class LinearEngine(PolicyEngine):
+    """Same decisions, but every check scans every rule."""
+
+    def __init__(self, policy_data):
+        super().__init__(policy_data)
+        self.matchers = [ResourceTrie([(rule.get("resource", ""), 0)]) for rule in self.rules]
+        self.rule_index = self
+
+    def candidates(self, action, resource, requested=None):
+        found = []
+        for index, rule in enumerate(self.rules):
+            if requested is not None:
+                if self.action_masks[index] & requested != requested:
+                    continue
+            elif action not in rule.get("actions", []) and "*" not in rule.get("actions", []):
+                continue
+            if self.matchers[index].match(resource):
+                found.append(index)
+        return found
+
+
+def run(engine: PolicyEngine, requests: list, explain: bool = False) -> tuple:
+    decisions = []
+    start = time.perf_counter()
+    for subject, action, resource, context in requests:
+        engine.cache.clear()
+        decisions.append(engine.check_access(subject, action, resource, context, explain=explain))
+    return decisions, time.perf_counter() - start
+
+
+def page_batches(requests: list, size: int, rng: random.Random) -> list:
+    """Batches of ``size`` requests from every subject over the same few resources."""
+    batches = []
+    for start in range(0, len(requests), size):
+        resources = [(action, resource) for _, action, resource, _ in requests[start:start + 10]]
+        batches.append([
+            {"subject": f"user{rng.randrange(100)}", "action": action, "resource": resource, "context": {"level": 1}}
+            for action, resource in (rng.choice(resources) for _ in range(size))
+        ])
+    return batches
+
+
+def run_batches(engine: PolicyEngine, batches: list) -> tuple:
+    start = time.perf_counter()
+    single = [
+        engine.check_access(r["subject"], r["action"], r["resource"], r["context"]) for batch in batches for r in batch
+    ]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = [decision for batch in batches for decision in engine.check_access_batch(batch)]
+    batch_time = time.perf_counter() - start
+
+    if single != batched:
+        raise RuntimeError("batch decisions differ from single checks")
+    return single_time, batch_time
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rules", type=int, default=50000)
+    arg_parser.add_argument("--decisions", type=int, default=2000)
+    arg_parser.add_argument("--batch", type=int, default=200)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    policy = {"policies": generate_rules(args.rules, rng)}
+    requests = generate_requests(args.decisions, args.rules, rng)
+
+    start = time.perf_counter()
+    indexed = PolicyEngine(policy)
+    build = time.perf_counter() - start
+    linear = LinearEngine(policy)
+
+    indexed_decisions, indexed_time = run(indexed, requests)
+    explained, explain_time = run(indexed, requests, explain=True)
+    # The scan is slow; a slice of the same workload is enough for a per-decision figure.
+    sample = requests[:max(len(requests) // 20, 1)]
+    linear_decisions, linear_time = run(linear, sample, explain=True)
+
+    for a, b in zip(explained, linear_decisions):
+        if (a["allowed"], a["matched_rules"]) != (b["allowed"], b["matched_rules"]):
+            raise RuntimeError(f"decisions differ for {a['action']} {a['resource']}")
+    for a, b in zip(indexed_decisions, explained):
+        if (a["allowed"], a["reason"]) != (b["allowed"], b["reason"]):
+            raise RuntimeError(f"explain mode differs for {a['action']} {a['resource']}")
+
+    allowed = sum(d["allowed"] for d in indexed_decisions)
+    candidates = sum(len(d["matched_rules"]) for d in explained) / len(explained)
+    print(f"rules: {args.rules}  decisions: {len(requests)}  allowed: {allowed}  matched rules/decision: {candidates:.1f}")
+    print(f"index build:      {build * 1e3:10.1f} ms")
+    print(f"linear scan:      {linear_time / len(sample) * 1e6:10.1f} us/decision")
+    print(f"indexed lookup:   {indexed_time / len(requests) * 1e6:10.1f} us/decision")
+    print(f"explain mode:     {explain_time / len(requests) * 1e6:10.1f} us/decision")
+    print(f"speedup:          {linear_time / len(sample) / (indexed_time / len(requests)):10.0f}x")
+
+    batches = page_batches(requests, args.batch, rng)
+    indexed.cache = DecisionCache(max_entries=0)
+    single_time, batch_time = run_batches(indexed, batches)
+    checks = sum(len(batch) for batch in batches)
+    print(f"batches: {len(batches)} x {args.batch}")
+    print(f"check_access:     {single_time / checks * 1e6:10.1f} us/decision")
+    print(f"check_access_batch: {batch_time / checks * 1e6:8.1f} us/decision")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Compiler benchmark suite: times lexing, parsing, semantic analysis, validation
+and persistence separately on generated policies and writes the results as JSON.
+
+Usage:
+    python scripts/benchmark.py [--sizes 100 1000 5000] [--repeat 3] [--seed 0]
+                                [--output benchmark_results.json] [--baseline previous.json]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Analyzer modules read these at import time; persistence goes to a throwaway SQLite file.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/rpl-benchmark.db")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import structlog
+from sqlmodel import Session, SQLModel
+from app.analyzer.policy_ir import PolicyRows
+from app.analyzer.semantic_analyzer import SemanticAnalyzer
+from app.api.database.database import DatabaseHandler, engine, next_session
+from app.api.utils.rpl_analyzer import ANALYZER_VERSION, GRAMMAR_VERSION, ParseMode, RPLAnalyzerService
+from app.models.group import Group
+from app.models.resource import Resource
+from app.models.role import Role
+from app.models.user import User
+from app.tests.mocks.policy_generator import PolicyShape, generate_policy
+import app.models.auth_models  # noqa: F401  (User.details -> UserDetails)
+import app.models.permission  # noqa: F401
+
+
+STAGES = ("lex", "parse", "semantic", "validation", "persistence")
+
+# Stages slower than the baseline by more than this factor are flagged.
+REGRESSION_THRESHOLD = 1.10
+
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+engine.echo = False
+
+
+def reset_database():
+    """Start every run from an empty catalog, as the first compile of a fresh install would."""
+    next_session.rollback()
+    next_session.expunge_all()
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+
+def run_once(source: str, mode: ParseMode) -> dict:
+    """Compile ``source`` once, returning seconds spent per stage."""
+    reset_database()
+    timings = {}
+
+    start = time.perf_counter()
+    token_stream, lex_errors = RPLAnalyzerService._lexical_analysis(source)
+    timings["lex"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree, parse_errors = RPLAnalyzerService._syntax_analysis(token_stream, mode)
+    timings["parse"] = time.perf_counter() - start
+
+    if lex_errors or parse_errors:
+        raise RuntimeError(f"generated policy failed to parse: {(lex_errors + parse_errors)[:3]}")
+
+    # SemanticAnalyzer.visitProgram, split so validation is timed on its own.
+    analyzer = SemanticAnalyzer()
+    start = time.perf_counter()
+    for statement in tree.statement():
+        analyzer.visit(statement)
+    timings["semantic"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer.validator.get_values(analyzer.roles, analyzer.users, analyzer.resources, analyzer.groups)
+    analyzer.validator.run_all()
+    timings["validation"] = time.perf_counter() - start
+
+    if analyzer.validator.errors:
+        raise RuntimeError(f"generated policy failed validation: {analyzer.validator.errors[:3]}")
+
+    # Same order and IR -> row conversion as rpl_editor_service.analyze_policies.
+    start = time.perf_counter()
+    rows = PolicyRows()
+    with Session(engine) as session:
+        for model, items in (
+                (Role, analyzer.roles),
+                (User, analyzer.users),
+                (Resource, analyzer.resources),
+                (Group, analyzer.groups),
+        ):
+            DatabaseHandler(session, model).create_all(rows.convert(item) for item in items.values())
+    timings["persistence"] = time.perf_counter() - start
+
+    return timings
+
+
+def summarize(samples: list) -> dict:
+    return {
+        "min": round(min(samples), 6),
+        "median": round(statistics.median(samples), 6),
+        "max": round(max(samples), 6),
+    }
+
+
+def benchmark(sizes: list, repeat: int, seed: int, mode: ParseMode) -> dict:
+    runs = []
+    for size in sizes:
+        shape = PolicyShape.scaled(size)
+        source = generate_policy(shape, seed)
+        samples = [run_once(source, mode) for _ in range(repeat)]
+
+        stages = {stage: summarize([sample[stage] for sample in samples]) for stage in STAGES}
+        total = summarize([sum(sample.values()) for sample in samples])
+        runs.append({
+            "statements": shape.statements,
+            "source_bytes": len(source.encode("utf-8")),
+            "shape": shape.as_dict(),
+            "stages": stages,
+            "total": total,
+        })
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "analyzer_version": ANALYZER_VERSION,
+        "grammar_version": GRAMMAR_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parse_mode": mode.value,
+        "seed": seed,
+        "repeat": repeat,
+        "runs": runs,
+    }
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """Median ratios against a previous result file, for sizes present in both."""
+    previous = {run["statements"]: run for run in baseline.get("runs", [])}
+    rows = []
+    for run in results["runs"]:
+        before = previous.get(run["statements"])
+        if before is None:
+            continue
+        for stage in STAGES:
+            old = before["stages"].get(stage, {}).get("median")
+            new = run["stages"][stage]["median"]
+            if old:
+                rows.append((run["statements"], stage, old, new, new / old))
+    return rows
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--mode", choices=[m.value for m in ParseMode], default=ParseMode.TWO_STAGE.value)
+    arg_parser.add_argument("--output", default="benchmark_results.json")
+    arg_parser.add_argument("--baseline", help="previous result file to compare medians against")
+    args = arg_parser.parse_args()
+
+    results = benchmark(args.sizes, args.repeat, args.seed, ParseMode(args.mode))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'statements':>10} " + " ".join(f"{stage:>12}" for stage in STAGES) + f" {'total':>10}")
+    for run in results["runs"]:
+        medians = " ".join(f"{run['stages'][stage]['median']:>12.4f}" for stage in STAGES)
+        print(f"{run['statements']:>10} {medians} {run['total']['median']:>10.4f}")
+    print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            rows = compare(results, json.load(f))
+
+        regressions = 0
+        print(f"\n{'statements':>10} {'stage':>12} {'before':>10} {'after':>10} {'ratio':>7}")
+        for statements, stage, old, new, ratio in rows:
+            flag = "  <-- slower" if ratio > REGRESSION_THRESHOLD else ""
+            regressions += bool(flag)
+            print(f"{statements:>10} {stage:>12} {old:>10.4f} {new:>10.4f} {ratio:>6.2f}x{flag}")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()